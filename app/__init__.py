@@ -1,8 +1,10 @@
 # app/__init__.py
+import click
 from flask import Flask
 from .config import get_config
 from .extensions import register_extensions
 from .api import register_blueprints
+from .json_provider import FastJSONProvider
 # NO importes db para crear tablas aquí; el test se encarga
 # from .models import db  # <- ya no lo necesitamos en este módulo
 
@@ -17,6 +19,10 @@ def create_app(env_name: str | None = None, config_overrides: dict | None = None
     if config_overrides:
         app.config.update(config_overrides)
 
+    # JSON rápido (orjson) con NUMERIC exactos; ver app/json_provider.py
+    app.json = FastJSONProvider(app)
+    app.json.sort_keys = app.config.get("JSON_SORT_KEYS", False)
+
     # Inicializa extensiones y registra blueprints
     register_extensions(app)
 
@@ -45,5 +51,80 @@ def create_app(env_name: str | None = None, config_overrides: dict | None = None
         with app.app_context():
             db.create_all()
         print("✔ Tablas creadas")
+
+    @app.cli.command("compact-versiones")
+    @click.option("--lote", default=500, help="Sesiones por transacción.")
+    @click.option("--expandir", is_flag=True, help="Revierte a snapshots completos.")
+    def compact_versiones_command(lote, expandir):
+        """Convierte el histórico de versiones a almacenamiento delta (o lo revierte)."""
+        from . import snapshots
+        with app.app_context():
+            n = snapshots.expandir(lote) if expandir else snapshots.compactar(lote)
+        print(f"✔ {n} campos {'expandidos' if expandir else 'comprimidos'}")
+
+    @app.cli.command("refresh-resumen")
+    def refresh_resumen_command():
+        """Refresca la vista materializada del resumen de catálogos."""
+        from .resumen import refrescar
+        with app.app_context():
+            refrescar()
+        print("✔ Resumen actualizado")
+
+    @app.cli.command("purge-cambios")
+    @click.option("--dias", default=30, help="Conserva los cambios de los últimos N días.")
+    def purge_cambios_command(dias):
+        """Borra el feed de cambios viejo (los clientes más atrasados resincronizan)."""
+        from .cambios import purgar
+        with app.app_context():
+            n = purgar(dias)
+        print(f"✔ {n} cambios borrados")
+
+    @app.cli.command("purge-idempotencia")
+    @click.option("--horas", type=int, default=None, help="Conserva las claves de las últimas N horas (default IDEMPOTENCIA_TTL_H).")
+    def purge_idempotencia_command(horas):
+        """Borra las respuestas guardadas por Idempotency-Key ya vencidas."""
+        from .idempotencia import purgar
+        with app.app_context():
+            n = purgar(horas or app.config["IDEMPOTENCIA_TTL_H"])
+        print(f"✔ {n} claves borradas")
+
+    @app.cli.command("purge-cotizaciones")
+    @click.option("--horas", type=float, default=None,
+                  help="Conserva las cotizaciones de las últimas N horas (default COTIZACION_IMAGEN_TTL_S).")
+    def purge_cotizaciones_command(horas):
+        """Borra cotizaciones viejas (fila y archivo en Supabase Storage)."""
+        from .cotizaciones import purgar
+        with app.app_context():
+            n = purgar(app.config, horas if horas is not None else app.config["COTIZACION_IMAGEN_TTL_S"] / 3600)
+        print(f"✔ {n} cotizaciones borradas")
+
+    @app.cli.command("archivar")
+    @click.option("--meses", default=12, help="Catálogos cerrados/cancelados sin cambios hace más de N meses.")
+    @click.option("--lote", default=200, help="Catálogos por transacción.")
+    def archivar_command(meses, lote):
+        """Mueve el historial de catálogos cerrados a las tablas de archivo."""
+        from .archivo import archivar
+        with app.app_context():
+            t = archivar(meses, lote)
+        print(f"✔ {t['catalogos']} catálogos: {t['sesiones']} sesiones y {t['versiones']} versiones archivadas")
+
+    @app.cli.command("seed")
+    @click.option("--escala", type=click.Choice(["chica", "mediana", "grande", "xl"]), default="chica")
+    @click.option("--clientes", type=int, help="Sobrescribe la escala.")
+    @click.option("--productos", type=int, help="Sobrescribe la escala.")
+    @click.option("--catalogos", type=int, help="Sobrescribe la escala.")
+    @click.option("--semilla", default=42, help="Misma semilla y lote => mismos datos.")
+    @click.option("--lote", default=5000, help="Catálogos por transacción / COPY.")
+    @click.option("--workers", default=4, help="Procesos en paralelo (solo PostgreSQL).")
+    def seed_command(escala, clientes, productos, catalogos, semilla, lote, workers):
+        """Genera clientes, productos, catálogos, sesiones y versiones sintéticos."""
+        from .seed import ESCALAS, sembrar
+        tam = dict(ESCALAS[escala])
+        for k, v in (("clientes", clientes), ("productos", productos), ("catalogos", catalogos)):
+            if v:
+                tam[k] = v
+        with app.app_context():
+            conteo = sembrar(**tam, semilla=semilla, lote=lote, workers=workers)
+        print(f"✔ {conteo}")
         
     return app
@@ -4,16 +4,26 @@ def create_api_bp():
     api_bp = Blueprint("api", __name__, url_prefix="/api")
 
     from .auth import auth_bp
+    from .cambios import cambios_bp
     from .catalogo import catalogo_bp
     from .clientes import clientes_bp      
+    from .cotizaciones import cotizaciones_bp
+    from .eventos import eventos_bp
+    from .logistica import logistica_bp
     from .productos import productos_bp    
+    from .resumen import resumen_bp
     from .sesiones import sesiones_bp
     from .versiones import versiones_bp
     
     api_bp.register_blueprint(auth_bp)
+    api_bp.register_blueprint(cambios_bp)
     api_bp.register_blueprint(catalogo_bp)
     api_bp.register_blueprint(clientes_bp)     
+    api_bp.register_blueprint(cotizaciones_bp)
+    api_bp.register_blueprint(eventos_bp)
+    api_bp.register_blueprint(logistica_bp)
     api_bp.register_blueprint(productos_bp)    
+    api_bp.register_blueprint(resumen_bp)
     api_bp.register_blueprint(sesiones_bp)
     api_bp.register_blueprint(versiones_bp)
     
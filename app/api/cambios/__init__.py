@@ -0,0 +1,30 @@
+from flask import Blueprint, request, jsonify, abort, current_app
+from ...decorators import require_auth
+from ... import cambios
+
+cambios_bp = Blueprint("cambios", __name__, url_prefix="/changes")
+
+
+@cambios_bp.get("")
+@require_auth
+def listar_cambios():
+    """
+    GET /api/changes?since=<cursor>&limit=500
+
+    Sin `since`: solo el cursor actual (hacer la descarga completa antes).
+    Con `mas: true` hay más lotes: volver a llamar con el `cursor` devuelto.
+    """
+    since = request.args.get("since")
+    if not since:
+        return jsonify({"cambios": {}, "cursor": cambios.cabeza(), "mas": False})
+    try:
+        limite = int(request.args.get("limit", 500))
+    except ValueError:
+        abort(400, description="limit inválido")
+    limite = max(1, min(limite, current_app.config["CAMBIOS_LOTE_MAX"]))
+    try:
+        return jsonify(cambios.leer(since, limite))
+    except cambios.CursorInvalido:
+        abort(400, description="cursor inválido")
+    except cambios.CursorExpirado:
+        return jsonify({"error": "cursor expirado: hacer descarga completa"}), 410
@@ -1,73 +1,61 @@
 # app/api/catalogo/__init__.py
-from flask import Blueprint, request, jsonify, abort
+from flask import Blueprint, request, jsonify, abort, current_app
+import sqlalchemy as sa
 from sqlalchemy import func
+from sqlalchemy.orm import contains_eager, joinedload, selectinload
 from sqlalchemy.exc import IntegrityError
 from ...models import (
     db, Catalogo, CatalogoSesion, CatalogoSesionVersion,
     Cliente, Producto
 )
 from ...decorators import require_auth
+from ...idempotencia import idempotente
+from ...serializers import VERSION, VERSION_MIN, CATALOGO, CLIENTE, PRODUCTO, SESION
+from ...query_params import parse_fields, parse_ids, multi_get, parse_expand
+from ...snapshots import materializar
+from ... import archivo, conteos
 
 catalogo_bp = Blueprint("catalogo", __name__, url_prefix="/catalogos")
 
 ESTADOS_CATALOGO = {"EN_PROCESO", "CERRADA", "CANCELADA"}
-
-def _num(x):
-    return float(x) if x is not None else None
+EXPANSIONES = {"cliente", "producto", "sesiones", "sesiones.current", "sesiones.versiones"}
+FACETAS = {"estado": Catalogo.estado, "familia": Producto.familia,
+           "pais": Cliente.pais, "ciudad": Cliente.ciudad}
 
 def serialize_version(v: CatalogoSesionVersion) -> dict:
-    if not v:
-        return None
-    return {
-        "id": v.id,
-        "sesion_id": v.sesion_id,
-        "catalogo_id": v.catalogo_id,
-        "producto_id": v.producto_id,
-        "version_num": v.version_num,
-        "estado": v.estado,
-        "is_current": v.is_current,
-        "is_final": v.is_final,
-        # snapshot
-        "um": v.um,
-        "doc_x_bulto_caja": _num(v.doc_x_bulto_caja),
-        "doc_x_paq": _num(v.doc_x_paq),
-        "precio_exw": _num(v.precio_exw),
-        "porc_desc": _num(v.porc_desc),
-        "cant_bultos": _num(v.cant_bultos),
-        "peso_gr": _num(v.peso_gr),
-        "largo_cm": _num(v.largo_cm),
-        "ancho_cm": _num(v.ancho_cm),
-        "alto_cm": _num(v.alto_cm),
-        "familia": v.familia,
-        "foto_key": v.foto_key,
-        "observaciones": v.observaciones,
-        "created_at": v.created_at.isoformat() if v.created_at else None,
-        # calculados (column_property en BD)
-        "precio_x_docena": _num(v.precio_x_docena),
-        "cantidad_por_paquete": _num(v.cantidad_por_paquete),
-        "precio_unidad_exw": _num(v.precio_unidad_exw),
-        "volumen_paquete_cbm": _num(v.volumen_paquete_cbm),
-        "cantidad_unidades": _num(v.cantidad_unidades),
-        "subtotal_exw": _num(v.subtotal_exw),
-        "cbm_total": _num(v.cbm_total),
-        "peso_neto_kg": _num(v.peso_neto_kg),
-        "peso_bruto_kg": _num(v.peso_bruto_kg),
-    }
+    return VERSION.dump(v)
 
 def serialize_catalogo(c: Catalogo) -> dict:
-    return {
-        "id": c.id,
-        "cliente_id": c.cliente_id,
-        "producto_id": c.producto_id,
-        "estado": c.estado,
-        "final_version_id": c.final_version_id,
-        "created_at": c.created_at.isoformat() if c.created_at else None,
-        # opcionalmente, nombres para UI:
-        "cliente_nombre": c.cliente.nombre if c.cliente else None,
-        "producto_nombre": c.producto.nombre if c.producto else None,
-        # y si quieres devolver un resumen de la final:
-        "final_version": serialize_version(c.final_version) if c.final_version else None,
-    }
+    return CATALOGO.dump(c)
+
+def _eager_catalogo(campos, con_join=False, expand=()) -> list:
+    """
+    Carga anticipada de lo que usan los campos derivados de CATALOGO
+    (cliente_nombre, producto_nombre, final_version); sin esto cada fila
+    dispara sus propios lazy loads. `con_join`: la consulta ya hace JOIN
+    con Cliente y Producto. `expand`: cliente/producto se cargan completos.
+    """
+    def pide(n):
+        return campos is None or n in campos
+
+    cargar = contains_eager if con_join else joinedload
+    opts = []
+    if "cliente" in expand:
+        opts.append(cargar(Catalogo.cliente))
+    elif pide("cliente_nombre"):
+        opts.append(cargar(Catalogo.cliente).load_only(Cliente.nombre))
+    if "producto" in expand:
+        opts.append(cargar(Catalogo.producto))
+    elif pide("producto_nombre"):
+        opts.append(cargar(Catalogo.producto).load_only(Producto.nombre))
+    if pide("final_version"):
+        opts.append(selectinload(Catalogo.final_version))
+    return opts
+
+def _materializar_finales(catalogos, campos):
+    if campos is None or "final_version" in campos:
+        # una sola consulta para completar snapshots delta de las finales
+        materializar([c.final_version for c in catalogos if c.final_version_id])
 
 def _paginated(q):
     try:
@@ -82,6 +70,13 @@ def _paginated(q):
 @catalogo_bp.get("")
 @require_auth
 def listar_catalogos():
+    campos = parse_fields(CATALOGO)
+    ids = parse_ids()
+    if ids is not None:
+        return jsonify(multi_get(Catalogo, CATALOGO, ids, campos, _eager_catalogo(campos),
+                                 antes=lambda cs: _materializar_finales(cs, campos)))
+    modo = conteos.parse_count()
+    pedidas = conteos.parse_facets(FACETAS)
     q = Catalogo.query.join(Cliente, Catalogo.cliente_id == Cliente.id) \
                       .join(Producto, Catalogo.producto_id == Producto.id)
 
@@ -116,15 +111,22 @@ def listar_catalogos():
             func.lower(Producto.nombre).like(like)
         )
 
-    q = q.order_by(Catalogo.created_at.desc(), Catalogo.id.desc())
-    items, page, per_page = _paginated(q)
-    return jsonify({
-        "data": [serialize_catalogo(i) for i in items],
-        "page": page, "per_page": per_page
-    })
+    items, page, per_page = _paginated(
+        q.options(*CATALOGO.load_only(Catalogo, campos), *_eager_catalogo(campos, con_join=True))
+         .order_by(Catalogo.created_at.desc(), Catalogo.id.desc())
+    )
+    _materializar_finales(items, campos)
+    out = {"data": CATALOGO.dump_many(items, campos), "page": page, "per_page": per_page}
+    filtrado = any(request.args.get(k) for k in ("cliente_id", "producto_id", "estado", "search")) \
+        or with_final is not None
+    out.update(conteos.totales(q, modo, "catalogo", filtrado))
+    if pedidas:
+        out["facets"] = conteos.facetas(q, {f: FACETAS[f] for f in pedidas}, conteos.clave_request())
+    return jsonify(out)
 
 @catalogo_bp.post("")
 @require_auth
+@idempotente
 def crear_catalogo():
     """
     Crea un catálogo (único por cliente_id + producto_id).
@@ -174,20 +176,113 @@ def crear_catalogo():
 @catalogo_bp.get("/<int:catalogo_id>")
 @require_auth
 def obtener_catalogo(catalogo_id: int):
-    c = db.session.get(Catalogo, catalogo_id)
+    """
+    `?expand=cliente,producto,sesiones.current,sesiones.versiones`: la vista
+    completa de una negociación en una respuesta, con un número fijo de
+    consultas (catálogo + cliente + producto en un JOIN, sesiones, vigentes,
+    versiones). Las sesiones y las versiones por sesión se recortan a
+    EXPAND_SESIONES_MAX / EXPAND_VERSIONES_MAX (las más recientes); los
+    `*_total` dicen cuántas hay.
+    """
+    campos = parse_fields(CATALOGO)
+    expand = parse_expand(EXPANSIONES)
+    c = db.session.get(Catalogo, catalogo_id,
+                       options=[*CATALOGO.load_only(Catalogo, campos), *_eager_catalogo(campos, expand=expand)])
     if not c:
         abort(404)
-    return jsonify(serialize_catalogo(c))
+    d = CATALOGO.dump(c, campos)
+    if "cliente" in expand:
+        d["cliente"] = CLIENTE.dump(c.cliente)
+    if "producto" in expand:
+        d["producto"] = PRODUCTO.dump(c.producto)
+    if "sesiones" in expand:
+        d["sesiones"], d["sesiones_total"] = _expandir_sesiones(c, expand)
+    return jsonify(d)
+
+def _expandir_sesiones(c: Catalogo, expand) -> tuple[list, int]:
+    S, V = CatalogoSesion, CatalogoSesionVersion
+    tope_s = current_app.config["EXPAND_SESIONES_MAX"]
+    tope_v = current_app.config["EXPAND_VERSIONES_MAX"]
+    archivado = c.archivado_at is not None
+
+    filas = db.session.execute(
+        sa.select(S, sa.func.count().over().label("total"))
+        .where(S.catalogo_id == c.id)
+        .order_by(S.created_at.desc(), S.id.desc())
+        .limit(tope_s)
+    ).all()
+    sesiones = [f[0] for f in filas]
+    total = filas[0].total if filas else 0
+    if archivado:
+        # las del archivo (pocas: catálogo cerrado) se mezclan en memoria
+        viejas = archivo.sesiones_de_catalogo(c.id)
+        total += len(viejas)
+        sesiones = sorted([*sesiones, *viejas], key=lambda s: (s.created_at, s.id), reverse=True)[:tope_s]
+    data = [SESION.dump(s) for s in sesiones]
+    sids = [s.id for s in sesiones]
+
+    if "sesiones.current" in expand:
+        ids = [s.current_version_id for s in sesiones if s.current_version_id is not None]
+        currents = {
+            v.id: v for v in db.session.scalars(
+                sa.select(V).options(*VERSION.load_only(V, VERSION_MIN)).where(V.id.in_(ids))
+            )
+        } if ids else {}
+        for s, d in zip(sesiones, data):
+            v = currents.get(s.current_version_id)
+            d["current_version"] = VERSION.dump(v, VERSION_MIN) if v else None
+
+    if "sesiones.versiones" in expand and sids:
+        # las `tope_v` más recientes de cada sesión, en una consulta
+        ventana = sa.select(
+            V.id,
+            sa.func.row_number().over(partition_by=V.sesion_id, order_by=V.version_num.desc()).label("n"),
+            sa.func.count().over(partition_by=V.sesion_id).label("total"),
+        ).where(V.sesion_id.in_(sids)).subquery()
+        filas = db.session.execute(
+            sa.select(V, ventana.c.total)
+            .join(ventana, ventana.c.id == V.id)
+            .where(ventana.c.n <= tope_v)
+            .order_by(V.sesion_id, V.version_num.desc())
+        ).all()
+        versiones = [f[0] for f in filas]
+        totales = {}
+        for f in filas:
+            totales[f[0].sesion_id] = f.total
+        if archivado:
+            viejas = archivo.versiones_de_sesiones(sids)
+            for v in viejas:
+                totales[v.sesion_id] = totales.get(v.sesion_id, 0) + 1
+            recortadas = {}
+            for v in sorted([*versiones, *viejas], key=lambda v: (v.sesion_id, -v.version_num)):
+                recortadas.setdefault(v.sesion_id, [])
+                if len(recortadas[v.sesion_id]) < tope_v:
+                    recortadas[v.sesion_id].append(v)
+            versiones = [v for vs in recortadas.values() for v in vs]
+        por_sesion = {}
+        for v, dv in zip(versiones, VERSION.dump_many(versiones)):
+            por_sesion.setdefault(v.sesion_id, []).append(dv)
+        for s, d in zip(sesiones, data):
+            d["versiones"] = por_sesion.get(s.id, [])
+            d["versiones_total"] = totales.get(s.id, 0)
+
+    return data, total
 
 @catalogo_bp.get("/<int:catalogo_id>/final")
 @require_auth
 def obtener_final(catalogo_id: int):
+    campos = parse_fields(VERSION)
     c = db.session.get(Catalogo, catalogo_id)
     if not c:
         abort(404)
-    if not c.final_version_id or not c.final_version:
+    if not c.final_version_id:
+        abort(404, description="catálogo sin versión final")
+    v = db.session.get(CatalogoSesionVersion, c.final_version_id,
+                       options=VERSION.load_only(CatalogoSesionVersion, campos)) \
+        or archivo.version(c.final_version_id)
+    if not v:
         abort(404, description="catálogo sin versión final")
-    return jsonify(serialize_version(c.final_version))
+    return jsonify(VERSION.dump(v, campos))
 
 @catalogo_bp.patch("/<int:catalogo_id>")
 @require_auth
@@ -4,25 +4,17 @@ from sqlalchemy import func
 from sqlalchemy.exc import IntegrityError
 from ...models import db, Cliente
 from ...decorators import require_auth
+from ...serializers import CLIENTE
+from ...query_params import parse_fields, parse_ids, multi_get
+from ... import conteos
 
 clientes_bp = Blueprint("clientes", __name__, url_prefix="/clientes")
 
 TIPOS_DOC = {"DNI","RUC","CE","PASAPORTE","OTRO"}
+FACETAS = {"pais": Cliente.pais, "ciudad": Cliente.ciudad}
 
 def serialize_cliente(c: Cliente) -> dict:
-    return {
-        "id": c.id,
-        "tipo_doc": c.tipo_doc,
-        "num_doc": c.num_doc,
-        "nombre": c.nombre,
-        "descripcion": c.descripcion,
-        "pais": c.pais,
-        "ciudad": c.ciudad,
-        "zona": c.zona,
-        "direccion": c.direccion,
-        "clasificacion_riesgo": c.clasificacion_riesgo,
-        "created_at": c.created_at.isoformat() if c.created_at else None,
-    }
+    return CLIENTE.dump(c)
 
 def _paginated(query):
     try:
@@ -41,6 +33,12 @@ def listar_clientes():
     if request.method == "OPTIONS":
         return make_response(("", 204))
 
+    campos = parse_fields(CLIENTE)
+    ids = parse_ids()
+    if ids is not None:
+        return jsonify(multi_get(Cliente, CLIENTE, ids, campos))
+    modo = conteos.parse_count()
+    pedidas = conteos.parse_facets(FACETAS)
     q = Cliente.query
     search = (request.args.get("search") or "").strip()
     pais = (request.args.get("pais") or "").strip()
@@ -57,12 +55,16 @@ def listar_clientes():
     if ciudad:
         q = q.filter(Cliente.ciudad == ciudad)
 
-    q = q.order_by(Cliente.created_at.desc(), Cliente.id.desc())
-    items, page, per_page = _paginated(q)
-    return jsonify({
-        "data": [serialize_cliente(i) for i in items],
-        "page": page, "per_page": per_page
-    })
+    filtrado = bool(search or pais or ciudad)
+    items, page, per_page = _paginated(
+        q.options(*CLIENTE.load_only(Cliente, campos))
+         .order_by(Cliente.created_at.desc(), Cliente.id.desc())
+    )
+    out = {"data": CLIENTE.dump_many(items, campos), "page": page, "per_page": per_page}
+    out.update(conteos.totales(q, modo, "cliente", filtrado))
+    if pedidas:
+        out["facets"] = conteos.facetas(q, {f: FACETAS[f] for f in pedidas}, conteos.clave_request())
+    return jsonify(out)
 
 @clientes_bp.route("", methods=["POST", "OPTIONS"])
 @clientes_bp.route("/", methods=["POST", "OPTIONS"])
@@ -101,10 +103,11 @@ def crear_cliente():
 def obtener_cliente(cliente_id: int):
     if request.method == "OPTIONS":
         return make_response(("", 204))
-    c = db.session.get(Cliente, cliente_id)
+    campos = parse_fields(CLIENTE)
+    c = db.session.get(Cliente, cliente_id, options=CLIENTE.load_only(Cliente, campos))
     if not c:
         abort(404)
-    return jsonify(serialize_cliente(c))
+    return jsonify(CLIENTE.dump(c, campos))
 
 @clientes_bp.route("/<int:cliente_id>", methods=["PATCH", "OPTIONS"])
 @require_auth
@@ -0,0 +1,75 @@
+from flask import Blueprint, request, jsonify, abort, current_app, redirect, url_for
+from ...decorators import require_auth
+from ... import cotizaciones
+
+cotizaciones_bp = Blueprint("cotizaciones", __name__, url_prefix="/cotizaciones")
+
+
+def _respuesta(clave: str, formato: str, estado: str):
+    d = {"id": f"{clave}.{formato}", "estado": estado}
+    if estado == "listo":
+        d["url"] = url_for(".descargar_cotizacion", cotizacion_id=d["id"])
+    return d
+
+
+def _partir(cotizacion_id: str) -> tuple[str, str]:
+    clave, _, formato = cotizacion_id.partition(".")
+    if formato not in cotizaciones.FORMATOS or not clave.isalnum():
+        abort(404)
+    return clave, formato
+
+
+@cotizaciones_bp.route("", methods=["POST", "OPTIONS"])
+@require_auth
+def crear_cotizacion():
+    """
+    Body: {"cliente_id": 1, "origen": "final"|"current", "formato": "xlsx"|"csv"}
+    200 si ya estaba generada (mismas entradas), 202 si quedó en cola.
+    """
+    data = request.get_json() or {}
+    origen = data.get("origen") or "final"
+    formato = data.get("formato") or "xlsx"
+    if origen not in cotizaciones.ORIGENES:
+        abort(400, description="origen inválido (final|current)")
+    if formato not in cotizaciones.FORMATOS:
+        abort(400, description="formato inválido (xlsx|csv)")
+    try:
+        cliente_id = int(data.get("cliente_id"))
+    except (TypeError, ValueError):
+        abort(400, description="cliente_id es requerido")
+
+    res = cotizaciones.solicitar(current_app._get_current_object(), cliente_id, origen, formato)
+    if res is None:
+        abort(404, description="cliente no existe")
+    clave, estado = res
+    d = _respuesta(clave, formato, estado)
+    if estado == "listo":
+        return jsonify(d)
+    r = jsonify(d)
+    r.status_code = 202
+    r.headers["Location"] = url_for(".estado_cotizacion", cotizacion_id=d["id"])
+    return r
+
+
+@cotizaciones_bp.get("/<cotizacion_id>")
+@require_auth
+def estado_cotizacion(cotizacion_id: str):
+    clave, formato = _partir(cotizacion_id)
+    estado = cotizaciones.estado(cotizacion_id)
+    if estado is None:
+        abort(404)
+    return jsonify(_respuesta(clave, formato, estado))
+
+
+@cotizaciones_bp.get("/<cotizacion_id>/archivo")
+@require_auth
+def descargar_cotizacion(cotizacion_id: str):
+    """Redirige a una URL firmada de Supabase Storage (válida unos minutos)."""
+    _partir(cotizacion_id)
+    try:
+        url = cotizaciones.url_archivo(current_app.config, cotizacion_id)
+    except RuntimeError as e:
+        abort(502, description=str(e))
+    if url is None:
+        abort(404)
+    return redirect(url)
@@ -0,0 +1,61 @@
+from flask import Blueprint, Response, request, abort, current_app, jsonify
+from ...models import db, Catalogo, Cliente
+from ...security import decode_access_token
+from ...eventos import hub, dsn_de, stream, worker_asincrono
+
+eventos_bp = Blueprint("eventos", __name__, url_prefix="/eventos")
+
+
+@eventos_bp.before_request
+def _solo_async():
+    # En un worker de hilos cada stream retendría un hilo de la API minutos enteros
+    if current_app.config["SSE_SOLO_ASYNC"] and not worker_asincrono():
+        r = jsonify({"error": "eventos en vivo no disponibles en este worker"})
+        r.status_code = 503
+        r.headers["Retry-After"] = "30"
+        return r
+
+
+def _autenticar():
+    # EventSource no permite cabeceras: se acepta también ?access_token=
+    auth = request.headers.get("Authorization", "")
+    token = auth.split()[1] if auth.startswith("Bearer ") else request.args.get("access_token")
+    if not token:
+        abort(401)
+    try:
+        request.user = decode_access_token(token)
+    except Exception:
+        abort(401)
+
+
+def _suscribir(clave):
+    cfg = current_app.config
+    dsn = dsn_de(db.engine)
+    if dsn:
+        hub.iniciar(dsn)
+    s = hub.suscribir([clave], cfg["SSE_COLA_MAX"])
+    # el stream no usa la BD: devolver la conexión al pool antes de quedarse esperando
+    db.session.remove()
+    return Response(
+        stream(s, cfg["SSE_LATIDO_S"], cfg["SSE_MAX_S"]),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@eventos_bp.get("/catalogos/<int:catalogo_id>")
+def eventos_catalogo(catalogo_id: int):
+    """Versiones nuevas, cambios de estado y de vigente/final de un catálogo."""
+    _autenticar()
+    if db.session.get(Catalogo, catalogo_id) is None:
+        abort(404, description="catálogo no existe")
+    return _suscribir(("catalogo", catalogo_id))
+
+
+@eventos_bp.get("/clientes/<int:cliente_id>")
+def eventos_cliente(cliente_id: int):
+    """Lo mismo, para todos los catálogos de un cliente."""
+    _autenticar()
+    if db.session.get(Cliente, cliente_id) is None:
+        abort(404, description="cliente no existe")
+    return _suscribir(("cliente", cliente_id))
@@ -0,0 +1,78 @@
+# app/api/logistica/__init__.py
+from flask import Blueprint, request, jsonify, abort, current_app
+import sqlalchemy as sa
+from ...models import db, Catalogo, CatalogoSesionVersion
+from ...decorators import require_auth
+from ...contenedores import Linea, planificar
+
+logistica_bp = Blueprint("logistica", __name__, url_prefix="/logistica")
+
+# ---------------------------
+# POST /api/logistica/contenedores
+# ---------------------------
+@logistica_bp.route("/contenedores", methods=["POST", "OPTIONS"])
+@require_auth
+def planificar_contenedores():
+    """
+    Body: {"cliente_id": 1} o {"catalogo_ids": [..]}; opcional
+    "perfiles": ["20", "40HC"] (por defecto todos los de CONTENEDORES).
+
+    Toma las versiones finales en una sola consulta y devuelve, por perfil,
+    cuántos contenedores hacen falta, su llenado (cbm/kg) y el reparto de
+    bultos por contenedor.
+    """
+    cfg = current_app.config
+    data = request.get_json(silent=True) or {}
+    cliente_id = data.get("cliente_id")
+    catalogo_ids = data.get("catalogo_ids")
+
+    if not cliente_id and not catalogo_ids:
+        abort(400, description="cliente_id o catalogo_ids requerido")
+
+    q = (
+        sa.select(
+            CatalogoSesionVersion.id,
+            CatalogoSesionVersion.catalogo_id,
+            CatalogoSesionVersion.producto_id,
+            CatalogoSesionVersion.cant_bultos,
+            CatalogoSesionVersion.volumen_paquete_cbm,
+            CatalogoSesionVersion.peso_bruto_kg,
+        )
+        .join(Catalogo, Catalogo.final_version_id == CatalogoSesionVersion.id)
+    )
+    if cliente_id:
+        try:
+            cliente_id = int(cliente_id)
+        except (TypeError, ValueError):
+            abort(400, description="cliente_id inválido")
+        q = q.where(Catalogo.cliente_id == cliente_id)
+    if catalogo_ids:
+        try:
+            ids = {int(x) for x in catalogo_ids}
+        except (TypeError, ValueError):
+            abort(400, description="catalogo_ids inválido")
+        if len(ids) > cfg["CONTENEDOR_MAX_CATALOGOS"]:
+            abort(400, description=f"máximo {cfg['CONTENEDOR_MAX_CATALOGOS']} catálogos")
+        q = q.where(Catalogo.id.in_(ids))
+
+    perfiles = cfg["CONTENEDORES"]
+    pedidos = data.get("perfiles")
+    if pedidos:
+        desconocidos = [p for p in pedidos if p not in perfiles]
+        if desconocidos:
+            abort(400, description=f"perfiles desconocidos: {', '.join(desconocidos)}")
+        perfiles = {p: perfiles[p] for p in pedidos}
+
+    lineas = [
+        Linea(
+            r.id, r.catalogo_id, r.producto_id, r.cant_bultos,
+            r.volumen_paquete_cbm,
+            (r.peso_bruto_kg / r.cant_bultos) if r.cant_bultos else 0,
+        )
+        for r in db.session.execute(q)
+    ]
+
+    plan = planificar(lineas, perfiles, cfg["CONTENEDOR_FACTOR_ESTIBA"])
+    plan["perfiles"] = perfiles
+    plan["factor_estiba"] = cfg["CONTENEDOR_FACTOR_ESTIBA"]
+    return jsonify(plan)
@@ -1,28 +1,22 @@
-from flask import Blueprint, request, jsonify, abort
+from flask import Blueprint, request, jsonify, abort, current_app
 from sqlalchemy import func
 from sqlalchemy.exc import IntegrityError
 from ...models import db, Producto
 from ...decorators import require_auth
+from ...serializers import PRODUCTO
+from ...query_params import parse_fields, parse_ids, multi_get
+from ... import conteos
+from ... import metrics
+from ...precios import repreciar, CAMPOS_MAESTRO, ESTADOS_EDITABLES
+from ...retry import reintentar
 
 productos_bp = Blueprint("productos", __name__, url_prefix="/productos")
 
 UM_VALIDAS = {"DOC","UNID","CIENTO"}
-
-def _num(n):
-    return float(n) if n is not None else None
+FACETAS = {"familia": Producto.familia}
 
 def serialize_producto(p: Producto) -> dict:
-    return {
-        "id": p.id,
-        "nombre": p.nombre,
-        "um": p.um,
-        "doc_x_bulto_caja": _num(p.doc_x_bulto_caja),
-        "doc_x_paq": _num(p.doc_x_paq),
-        "precio_exw": _num(p.precio_exw),
-        "familia": p.familia,
-        "imagen_key": p.imagen_key,
-        "created_at": p.created_at.isoformat() if p.created_at else None,
-    }
+    return PRODUCTO.dump(p)
 
 def _paginated(query):
     try:
@@ -37,6 +31,12 @@ def _paginated(query):
 @productos_bp.get("")
 @require_auth
 def listar_productos():
+    campos = parse_fields(PRODUCTO)
+    ids = parse_ids()
+    if ids is not None:
+        return jsonify(multi_get(Producto, PRODUCTO, ids, campos))
+    modo = conteos.parse_count()
+    pedidas = conteos.parse_facets(FACETAS)
     q = Producto.query
     search = (request.args.get("search") or "").strip()
     familia = (request.args.get("familia") or "").strip()
@@ -47,12 +47,15 @@ def listar_productos():
     if familia:
         q = q.filter(Producto.familia == familia)
 
-    q = q.order_by(Producto.created_at.desc(), Producto.id.desc())
-    items, page, per_page = _paginated(q)
-    return jsonify({
-        "data": [serialize_producto(i) for i in items],
-        "page": page, "per_page": per_page
-    })
+    items, page, per_page = _paginated(
+        q.options(*PRODUCTO.load_only(Producto, campos))
+         .order_by(Producto.created_at.desc(), Producto.id.desc())
+    )
+    out = {"data": PRODUCTO.dump_many(items, campos), "page": page, "per_page": per_page}
+    out.update(conteos.totales(q, modo, "producto", bool(search or familia)))
+    if pedidas:
+        out["facets"] = conteos.facetas(q, {f: FACETAS[f] for f in pedidas}, conteos.clave_request())
+    return jsonify(out)
 
 @productos_bp.post("")
 @require_auth
@@ -85,13 +88,15 @@ def crear_producto():
 @productos_bp.get("/<int:producto_id>")
 @require_auth
 def obtener_producto(producto_id: int):
-    p = db.session.get(Producto, producto_id)
+    campos = parse_fields(PRODUCTO)
+    p = db.session.get(Producto, producto_id, options=PRODUCTO.load_only(Producto, campos))
     if not p:
         abort(404)
-    return jsonify(serialize_producto(p))
+    return jsonify(PRODUCTO.dump(p, campos))
 
 @productos_bp.patch("/<int:producto_id>")
 @require_auth
+@reintentar("editar_producto")
 def editar_producto(producto_id: int):
     p = db.session.get(Producto, producto_id)
     if not p:
@@ -112,12 +117,39 @@ def editar_producto(producto_id: int):
         if k in data:
             setattr(p, k, data[k])
 
+    # ?repreciar=true: lleva los cambios de maestro a las versiones BORRADOR abiertas
+    repreciar_flag = (request.args.get("repreciar") or "").lower() in ("1", "true", "yes", "y")
     try:
         db.session.commit()
     except IntegrityError:
         db.session.rollback()
         abort(400, description="error de integridad (valores inválidos)")
-    return jsonify(serialize_producto(p))
+    out = serialize_producto(p)
+    campos = [k for k in CAMPOS_MAESTRO if k in data]
+    if repreciar_flag and campos:
+        out["repreciado"] = repreciar(p, campos=campos, lote=current_app.config["REPRECIAR_LOTE"])
+    return jsonify(out)
+
+@productos_bp.route("/<int:producto_id>/repreciar", methods=["POST", "OPTIONS"])
+@require_auth
+@reintentar("repreciar")
+def repreciar_producto(producto_id: int):
+    """
+    Copia precio_exw/doc_x_paq/um del producto a sus versiones editables de
+    catálogos EN_PROCESO. Body opcional:
+    {"estados": ["BORRADOR", "ENVIADA"], "campos": ["precio_exw"]}
+    """
+    p = db.session.get(Producto, producto_id)
+    if not p:
+        abort(404)
+    data = request.get_json(silent=True) or {}
+    estados = tuple(data.get("estados") or ("BORRADOR",))
+    campos = tuple(data.get("campos") or CAMPOS_MAESTRO)
+    if any(e not in ESTADOS_EDITABLES for e in estados):
+        abort(400, description=f"estados editables: {', '.join(ESTADOS_EDITABLES)}")
+    if any(c not in CAMPOS_MAESTRO for c in campos):
+        abort(400, description=f"campos: {', '.join(CAMPOS_MAESTRO)}")
+    return jsonify(repreciar(p, estados, campos, current_app.config["REPRECIAR_LOTE"]))
 
 @productos_bp.patch("/<int:producto_id>/imagen")
 @require_auth
@@ -194,7 +226,9 @@ def subir_imagen(producto_id: int):
         "x-upsert": "true",
     }
     files = {"file": (f.filename, f.stream, f.mimetype or "application/octet-stream")}
-    r = requests.post(url, headers=headers, files=files)
+    with metrics.supabase("upload") as m:
+        r = requests.post(url, headers=headers, files=files)
+        m["status"] = r.status_code
     if r.status_code >= 400:
         abort(r.status_code, description=f"supabase error: {r.text}")
 
@@ -223,11 +257,13 @@ def url_imagen(producto_id: int):
         abort(400, description="expires_in debe estar entre 60 y 86400 segundos")
 
     url = f"{supa_url}/storage/v1/object/sign/{bucket}/{p.imagen_key}"
-    r = requests.post(
-        url,
-        headers={"Authorization": f"Bearer {service_key}", "apikey": service_key},
-        json={"expiresIn": expires_in},
-    )
+    with metrics.supabase("sign") as m:
+        r = requests.post(
+            url,
+            headers={"Authorization": f"Bearer {service_key}", "apikey": service_key},
+            json={"expiresIn": expires_in},
+        )
+        m["status"] = r.status_code
     if r.status_code >= 400:
         abort(r.status_code, description=f"supabase error: {r.text}")
 
@@ -0,0 +1,99 @@
+# app/api/resumen/__init__.py
+from flask import Blueprint, request, jsonify, abort
+import sqlalchemy as sa
+from ...models import db, Cliente, resumen_catalogo_mv, resumen_catalogo_select
+from ...decorators import require_auth
+from ...resumen import disponible
+
+resumen_bp = Blueprint("resumen", __name__, url_prefix="/resumen")
+
+ESTADOS_CATALOGO = ("EN_PROCESO", "CERRADA", "CANCELADA")
+AGRUPACIONES = {"cliente", "familia"}
+
+def _paginated(stmt):
+    try:
+        page = int(request.args.get("page", 1))
+        per_page = int(request.args.get("per_page", 100))
+    except ValueError:
+        abort(400, description="page/per_page inválidos")
+    per_page = max(1, min(per_page, 1000))
+    rows = db.session.execute(stmt.limit(per_page).offset((page-1)*per_page)).all()
+    return rows, page, per_page
+
+# ---------------------------
+# GET /api/resumen/catalogos
+# ---------------------------
+@resumen_bp.get("/catalogos")
+@require_auth
+def resumen_catalogos():
+    """
+    Totales por cliente y/o familia (subtotal_exw, cbm_total, peso_bruto_kg)
+    sobre la versión final (o current) de cada catálogo, más conteo por estado.
+
+    Lee de `mv_resumen_catalogo`; `?fresh=true` (o BD sin vistas
+    materializadas) calcula lo mismo en vivo con una sola consulta agrupada.
+    """
+    agrupar = [a.strip() for a in (request.args.get("agrupar") or "cliente,familia").split(",") if a.strip()]
+    if not agrupar or any(a not in AGRUPACIONES for a in agrupar):
+        abort(400, description="agrupar inválido (cliente|familia|cliente,familia)")
+
+    fresh = (request.args.get("fresh") or "").lower() in ("1", "true", "yes", "y")
+    usa_mv = disponible() and not fresh
+    src = resumen_catalogo_mv if usa_mv else resumen_catalogo_select().subquery("r")
+
+    grupo = []
+    if "cliente" in agrupar:
+        grupo += [src.c.cliente_id, Cliente.nombre.label("cliente_nombre")]
+    if "familia" in agrupar:
+        grupo.append(src.c.familia)
+
+    stmt = sa.select(
+        *grupo,
+        sa.func.sum(src.c.catalogos).label("catalogos"),
+        *[
+            sa.func.coalesce(sa.func.sum(src.c.catalogos).filter(src.c.estado == e), 0).label(e)
+            for e in ESTADOS_CATALOGO
+        ],
+        sa.func.sum(src.c.con_version).label("con_version"),
+        sa.func.sum(src.c.subtotal_exw).label("subtotal_exw"),
+        sa.func.sum(src.c.cbm_total).label("cbm_total"),
+        sa.func.sum(src.c.peso_bruto_kg).label("peso_bruto_kg"),
+        sa.func.max(src.c.generado_at).label("generado_at"),
+    )
+    if "cliente" in agrupar:
+        stmt = stmt.join(Cliente, Cliente.id == src.c.cliente_id)
+
+    # filtros
+    cliente_id = request.args.get("cliente_id")
+    familia = (request.args.get("familia") or "").strip()
+    estado = request.args.get("estado")
+    if cliente_id:
+        try:
+            stmt = stmt.where(src.c.cliente_id == int(cliente_id))
+        except ValueError:
+            abort(400, description="cliente_id inválido")
+    if familia:
+        stmt = stmt.where(src.c.familia == familia)
+    if estado:
+        if estado not in ESTADOS_CATALOGO:
+            abort(400, description="estado inválido")
+        stmt = stmt.where(src.c.estado == estado)
+
+    stmt = stmt.group_by(*grupo).order_by(*grupo)
+    rows, page, per_page = _paginated(stmt)
+
+    data = []
+    generado_at = None
+    for r in rows:
+        d = {k: getattr(r, k) for k in r._fields if k not in ESTADOS_CATALOGO and k != "generado_at"}
+        d["por_estado"] = {e: getattr(r, e) for e in ESTADOS_CATALOGO}
+        data.append(d)
+        if r.generado_at and (generado_at is None or r.generado_at > generado_at):
+            generado_at = r.generado_at
+
+    return jsonify({
+        "data": data,
+        "fuente": "mv" if usa_mv else "vivo",
+        "generado_at": generado_at.isoformat() if generado_at else None,
+        "page": page, "per_page": per_page,
+    })
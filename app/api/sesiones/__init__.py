@@ -3,38 +3,35 @@ from sqlalchemy import func
 from sqlalchemy.exc import IntegrityError
 from ...models import db, Catalogo, CatalogoSesion, CatalogoSesionVersion
 from ...decorators import require_auth
+from ...serializers import SESION, VERSION, VERSION_MIN
+from ...query_params import parse_fields
+from ... import archivo
 
 sesiones_bp = Blueprint("sesiones", __name__, url_prefix="")
 
 
-def _num(x):
-    return float(x) if x is not None else None
+def serialize_sesion(s: CatalogoSesion, current: CatalogoSesionVersion | None = None,
+                     campos: tuple[str, ...] | None = None) -> dict:
+    if campos is None:
+        d = SESION.dump(s)
+    else:
+        d = SESION.dump(s, [n for n in campos if n != "current_version"])
+    if campos is None or "current_version" in campos:
+        d["current_version"] = VERSION.dump(current, VERSION_MIN) if current else None
+    return d
 
 
-def _serialize_version_min(v: CatalogoSesionVersion | None) -> dict | None:
-    if not v:
-        return None
-    return {
-        "id": v.id,
-        "version_num": v.version_num,
-        "estado": v.estado,
-        "is_current": v.is_current,
-        "is_final": v.is_final,
-        "precio_exw": _num(v.precio_exw),
-        "porc_desc": _num(v.porc_desc),
-        "subtotal_exw": _num(v.subtotal_exw),
-    }
+def _parse_fields_sesion():
+    return parse_fields(SESION, extras=("current_version",))
 
 
-def serialize_sesion(s: CatalogoSesion, current: CatalogoSesionVersion | None = None) -> dict:
-    return {
-        "id": s.id,
-        "catalogo_id": s.catalogo_id,
-        "etiqueta": s.etiqueta,
-        "is_active": s.is_active,
-        "created_at": s.created_at.isoformat() if s.created_at else None,
-        "current_version": _serialize_version_min(current) if current else None,
-    }
+def _load_only_sesion(campos):
+    if campos is None:
+        return []
+    # current_version se resuelve por el puntero current_version_id
+    return SESION.load_only(
+        CatalogoSesion, {"current_version_id" if n == "current_version" else n for n in campos}
+    )
 
 
 def _get_catalogo_or_404(catalogo_id: int) -> Catalogo:
@@ -49,13 +46,17 @@ def _catalogo_editable(c: Catalogo):
         abort(409, description="catálogo no editable (estado != EN_PROCESO)")
 
 
-def _paginated(q):
+def _pagina():
     try:
         page = int(request.args.get("page", 1))
         per_page = int(request.args.get("per_page", 20))
     except ValueError:
         abort(400, description="page/per_page inválidos")
-    per_page = max(1, min(per_page, 100))
+    return page, max(1, min(per_page, 100))
+
+
+def _paginated(q):
+    page, per_page = _pagina()
     items = q.limit(per_page).offset((page-1)*per_page).all()
     return items, page, per_page
 
@@ -67,34 +68,45 @@ def _paginated(q):
 def listar_sesiones(catalogo_id: int):
     c = _get_catalogo_or_404(catalogo_id)
 
-    q = CatalogoSesion.query.filter(CatalogoSesion.catalogo_id == c.id)
+    campos = _parse_fields_sesion()
+    q = CatalogoSesion.query.options(*_load_only_sesion(campos)) \
+        .filter(CatalogoSesion.catalogo_id == c.id)
     is_active = request.args.get("is_active")
+    flag = None
     if is_active is not None:
         flag = is_active.lower() in ("1", "true", "yes", "y")
         q = q.filter(CatalogoSesion.is_active == flag)
 
     q = q.order_by(CatalogoSesion.created_at.desc(), CatalogoSesion.id.desc())
-    items, page, per_page = _paginated(q)
+    if c.archivado_at is not None:
+        # Catálogo archivado: pocas sesiones, se mezclan en memoria con las del
+        # archivo (que nunca tienen current: esas quedan en caliente)
+        viejas = [s for s in archivo.sesiones_de_catalogo(c.id) if flag is None or s.is_active == flag]
+        todas = sorted([*q.all(), *viejas], key=lambda s: (s.created_at, s.id), reverse=True)
+        page, per_page = _pagina()
+        items = todas[(page-1)*per_page:page*per_page]
+    else:
+        items, page, per_page = _paginated(q)
 
     # with_current=true para adjuntar versión vigente de cada sesión
     with_current = (request.args.get("with_current") or "").lower() in ("1", "true", "yes", "y")
+    if campos is not None and "current_version" not in campos:
+        with_current = False
 
     data = []
     if with_current:
-        for s in items:
-            current = db.session.scalar(
+        # una sola consulta para las versiones vigentes de toda la página
+        ids = [s.current_version_id for s in items if s.current_version_id is not None]
+        currents = {
+            v.id: v for v in db.session.scalars(
                 db.select(CatalogoSesionVersion)
-                .where(
-                    CatalogoSesionVersion.sesion_id == s.id,
-                    CatalogoSesionVersion.catalogo_id == s.catalogo_id,
-                    CatalogoSesionVersion.is_current.is_(True),
-                )
-                .order_by(CatalogoSesionVersion.version_num.desc())
-                .limit(1)
+                .options(*VERSION.load_only(CatalogoSesionVersion, VERSION_MIN))
+                .where(CatalogoSesionVersion.id.in_(ids))
             )
-            data.append(serialize_sesion(s, current))
+        } if ids else {}
+        data = [serialize_sesion(s, currents.get(s.current_version_id), campos) for s in items]
     else:
-        data = [serialize_sesion(s) for s in items]
+        data = [serialize_sesion(s, campos=campos) for s in items]
 
     return jsonify({"data": data, "page": page, "per_page": per_page})
 
@@ -127,25 +139,23 @@ def crear_sesion(catalogo_id: int):
 @sesiones_bp.get("/<int:sesion_id>")
 @require_auth
 def obtener_sesion(sesion_id: int):
-    s = db.session.get(CatalogoSesion, sesion_id)
+    campos = _parse_fields_sesion()
+    s = db.session.get(CatalogoSesion, sesion_id, options=_load_only_sesion(campos)) \
+        or archivo.sesion(sesion_id)
     if not s:
         abort(404)
 
     # with_current=true para traer también la versión vigente
     with_current = (request.args.get("with_current") or "").lower() in ("1", "true", "yes", "y")
+    if campos is not None and "current_version" not in campos:
+        with_current = False
     current = None
-    if with_current:
-        current = db.session.scalar(
-            db.select(CatalogoSesionVersion)
-            .where(
-                CatalogoSesionVersion.sesion_id == s.id,
-                CatalogoSesionVersion.catalogo_id == s.catalogo_id,
-                CatalogoSesionVersion.is_current.is_(True),
-            )
-            .order_by(CatalogoSesionVersion.version_num.desc())
-            .limit(1)
+    if with_current and s.current_version_id is not None:
+        current = db.session.get(
+            CatalogoSesionVersion, s.current_version_id,
+            options=VERSION.load_only(CatalogoSesionVersion, VERSION_MIN),
         )
-    return jsonify(serialize_sesion(s, current))
+    return jsonify(serialize_sesion(s, current, campos))
 
 # ---------------------------
 # PATCH /api/sesiones/{sesion_id}
@@ -1,49 +1,21 @@
 # app/api/versiones/__init__.py
-from flask import Blueprint, request, jsonify, abort
+from flask import Blueprint, request, jsonify, abort, current_app
 import sqlalchemy as sa
 from sqlalchemy.exc import IntegrityError
-from ...models import db, Catalogo, CatalogoSesion, CatalogoSesionVersion
+from ...models import db, Catalogo, CatalogoSesion, CatalogoSesionVersion, Producto
 from ...decorators import require_auth
+from ...idempotencia import idempotente
+from ...serializers import VERSION
+from ...query_params import parse_fields, parse_ids, multi_get
+from ...resumen import solicitar_refresco
+from ...diff import CAMPOS_CARGA, diff_versiones, timeline
+from ... import archivo, snapshots
+from ...retry import preparar_tx, reintentar
 
 versiones_bp = Blueprint("versiones", __name__)  # <- sin url_prefix aquí
 
-def _num(x):
-    return float(x) if x is not None else None
-
 def _version_to_json(v: CatalogoSesionVersion) -> dict:
-    return {
-        "id": v.id,
-        "sesion_id": v.sesion_id,
-        "catalogo_id": v.catalogo_id,
-        "producto_id": v.producto_id,
-        "version_num": v.version_num,
-        "estado": v.estado,
-        "is_current": v.is_current,
-        "is_final": v.is_final,
-        "um": v.um,
-        "doc_x_bulto_caja": _num(v.doc_x_bulto_caja),
-        "doc_x_paq": _num(v.doc_x_paq),
-        "precio_exw": _num(v.precio_exw),
-        "porc_desc": _num(v.porc_desc),
-        "cant_bultos": _num(v.cant_bultos),
-        "peso_gr": _num(v.peso_gr),
-        "largo_cm": _num(v.largo_cm),
-        "ancho_cm": _num(v.ancho_cm),
-        "alto_cm": _num(v.alto_cm),
-        "familia": v.familia,
-        "foto_key": v.foto_key,
-        "observaciones": v.observaciones,
-        "precio_x_docena": _num(getattr(v, "precio_x_docena", None)),
-        "precio_unidad_exw": _num(getattr(v, "precio_unidad_exw", None)),
-        "subtotal_exw": _num(getattr(v, "subtotal_exw", None)),
-        "volumen_paquete_cbm": _num(getattr(v, "volumen_paquete_cbm", None)),
-        "cbm_total": _num(getattr(v, "cbm_total", None)),
-        "cantidad_por_paquete": _num(getattr(v, "cantidad_por_paquete", None)),
-        "cantidad_unidades": _num(getattr(v, "cantidad_unidades", None)),
-        "peso_neto_kg": _num(getattr(v, "peso_neto_kg", None)),
-        "peso_bruto_kg": _num(getattr(v, "peso_bruto_kg", None)),
-        "created_at": v.created_at.isoformat() if v.created_at else None,
-    }
+    return VERSION.dump(v)
 
 def _get_version_or_404(version_id: int) -> CatalogoSesionVersion:
     v = db.session.get(CatalogoSesionVersion, int(version_id))
@@ -53,61 +25,69 @@ def _get_version_or_404(version_id: int) -> CatalogoSesionVersion:
 
 @versiones_bp.route("/versiones/<int:version_id>/current", methods=["POST", "OPTIONS"])
 @require_auth
+@reintentar("forzar_current")
 def forzar_current(version_id: int):
     v = _get_version_or_404(version_id)
     if v.is_final:
         return jsonify({"error": "no se puede marcar current una versión final"}), 409
 
     try:
-        with db.session.begin_nested():
-            # Lock de la sesión para serializar el cambio de current
-            s_locked = db.session.execute(
-                sa.select(CatalogoSesion)
-                .where(CatalogoSesion.id == v.sesion_id)
-                .with_for_update()
-            ).scalar_one()
-
-            # Apagar todos los current de la sesión
-            db.session.execute(
-                sa.update(CatalogoSesionVersion)
-                .where(CatalogoSesionVersion.sesion_id == s_locked.id)
-                .values(is_current=False)
-            )
-            # Prender el de esta versión
-            db.session.execute(
-                sa.update(CatalogoSesionVersion)
-                .where(CatalogoSesionVersion.id == v.id)
-                .values(is_current=True)
-            )
-
-        db.session.refresh(v)
-        return jsonify(_version_to_json(v))
-
+        # mismo lock por catálogo que aprobar: no compite con una aprobación en curso
+        preparar_tx(v.catalogo_id)
+
+        # Un solo UPDATE de una fila: el puntero de la sesión
+        db.session.execute(
+            sa.update(CatalogoSesion)
+            .where(CatalogoSesion.id == v.sesion_id)
+            .values(current_version_id=v.id)
+        )
+        db.session.commit()
     except IntegrityError:
+        # la versión se leyó antes del lock: si otro la borró, falla la FK
         db.session.rollback()
         return jsonify({"error": "no se pudo marcar current (conflicto de concurrencia)"}), 409
+    db.session.refresh(v)
+    return jsonify(_version_to_json(v))
 
-def _paginated(q):
+def _pagina():
     try:
         page = int(request.args.get("page", 1))
         per_page = int(request.args.get("per_page", 20))
     except ValueError:
         abort(400, description="page/per_page inválidos")
-    per_page = max(1, min(per_page, 100))
+    return page, max(1, min(per_page, 100))
+
+def _paginated(q):
+    page, per_page = _pagina()
     items = q.limit(per_page).offset((page-1)*per_page).all()
     return items, page, per_page
 
+def _sesion_or_404(sesion_id: int) -> tuple[CatalogoSesion, bool]:
+    """(sesión, catálogo archivado): la sesión puede estar en la tabla de archivo."""
+    row = db.session.execute(
+        sa.select(CatalogoSesion, Catalogo.archivado_at)
+        .join(Catalogo, Catalogo.id == CatalogoSesion.catalogo_id)
+        .where(CatalogoSesion.id == sesion_id)
+    ).first()
+    if row:
+        return row[0], row[1] is not None
+    s = archivo.sesion(sesion_id)
+    if not s:
+        abort(404, description="sesión no existe")
+    return s, True
+
 # ---------------------------
 # GET /api/sesiones/{sesion_id}/versiones
 # ---------------------------
 @versiones_bp.get("/sesiones/<int:sesion_id>/versiones")
 @require_auth
 def listar_versiones(sesion_id: int):
-    s = db.session.get(CatalogoSesion, sesion_id)
-    if not s:
-        abort(404, description="sesión no existe")
+    s, archivado = _sesion_or_404(sesion_id)
 
-    q = CatalogoSesionVersion.query.filter(CatalogoSesionVersion.sesion_id == s.id)
+    campos = parse_fields(VERSION)
+    q = CatalogoSesionVersion.query \
+        .options(*VERSION.load_only(CatalogoSesionVersion, campos)) \
+        .filter(CatalogoSesionVersion.sesion_id == s.id)
 
     # Filtros opcionales
     estado = request.args.get("estado")
@@ -117,79 +97,131 @@ def listar_versiones(sesion_id: int):
     is_current = request.args.get("is_current")
     if is_current is not None:
         flag = is_current.lower() in ("1","true","yes","y")
-        q = q.filter(CatalogoSesionVersion.is_current == flag)
+        # contra el puntero ya cargado, sin la subconsulta de is_current
+        if flag:
+            q = q.filter(CatalogoSesionVersion.id == s.current_version_id)
+        elif s.current_version_id is not None:
+            q = q.filter(CatalogoSesionVersion.id != s.current_version_id)
 
     q = q.order_by(CatalogoSesionVersion.version_num.desc())
-    items, page, per_page = _paginated(q)
+    if archivado:
+        # Historial de un catálogo cerrado: pocas filas, se mezclan en memoria.
+        # Lo archivado nunca es current.
+        viejas = [] if is_current is not None and flag else \
+            archivo.versiones_de_sesion(s.id, [estado] if estado else None)
+        todas = sorted([*q.all(), *viejas], key=lambda v: v.version_num, reverse=True)
+        page, per_page = _pagina()
+        items = todas[(page-1)*per_page:page*per_page]
+    else:
+        items, page, per_page = _paginated(q)
 
     return jsonify({
-        "data": [_version_to_json(v) for v in items],
+        "data": VERSION.dump_many(items, campos),
         "page": page,
         "per_page": per_page
     })
 
+def _reservar_version_num(sesion_id: int):
+    """
+    Avanza `next_version_num` de la sesión y devuelve el número reservado
+    junto con los valores por defecto del producto, en una sola sentencia.
+    Solo avanza si el catálogo está EN_PROCESO. Locks hasta el commit: la
+    fila de la sesión y, en PostgreSQL, la del catálogo FOR SHARE (una
+    aprobación que lo cierra, con su FOR UPDATE, espera a este commit; o
+    esta sentencia al suyo, y entonces ya lo ve CERRADA). Crear versiones en
+    paralelo no se bloquea entre sí. En SQLite la escritura ya es exclusiva.
+    """
+    s = CatalogoSesion.__table__
+    c = Catalogo.__table__
+    p = Producto.__table__
+    reserva = (
+        sa.update(s)
+        .values(next_version_num=s.c.next_version_num + 1)
+    )
+    if db.engine.dialect.name == "postgresql":
+        abierto = c.alias("abierto")
+        r = db.session.execute(
+            reserva
+            .where(
+                s.c.id == sesion_id,
+                c.c.id == s.c.catalogo_id,
+                p.c.id == c.c.producto_id,
+                sa.exists(
+                    sa.select(abierto.c.id)
+                    .where(abierto.c.id == s.c.catalogo_id, abierto.c.estado == "EN_PROCESO")
+                    .with_for_update(read=True)
+                ),
+            )
+            .returning(
+                (s.c.next_version_num - 1).label("version_num"),
+                s.c.catalogo_id,
+                p.c.id.label("producto_id"),
+                p.c.um, p.c.doc_x_bulto_caja, p.c.doc_x_paq, p.c.precio_exw,
+                p.c.familia, p.c.imagen_key,
+            )
+        ).first()
+        return r._asdict() if r else None
+
+    # SQLite no admite RETURNING de columnas de otras tablas: producto aparte
+    r = db.session.execute(
+        reserva
+        .where(
+            s.c.id == sesion_id,
+            sa.exists().where(c.c.id == s.c.catalogo_id, c.c.estado == "EN_PROCESO"),
+        )
+        .returning((s.c.next_version_num - 1).label("version_num"), s.c.catalogo_id)
+    ).first()
+    if r is None:
+        return None
+    prod = db.session.execute(
+        sa.select(p.c.id.label("producto_id"), p.c.um, p.c.doc_x_bulto_caja, p.c.doc_x_paq,
+                  p.c.precio_exw, p.c.familia, p.c.imagen_key)
+        .join(c, c.c.producto_id == p.c.id)
+        .where(c.c.id == r.catalogo_id)
+    ).one()
+    return {**r._asdict(), **prod._asdict()}
+
 @versiones_bp.route("/sesiones/<int:sesion_id>/versiones", methods=["POST", "OPTIONS"])
 @require_auth
+@idempotente
+@reintentar("crear_version")
 def crear_version(sesion_id: int):
-    s = db.session.get(CatalogoSesion, sesion_id)
-    if not s:
-        abort(404, description="sesión no existe")
+    body = request.get_json(silent=True) or {}
 
     try:
-        with db.session.begin_nested():
-            c = db.session.execute(
-                sa.select(Catalogo)
-                .where(Catalogo.id == s.catalogo_id)
-                .with_for_update()
-            ).scalar_one()
-
-            if c.estado != "EN_PROCESO":
-                return jsonify({"error": "catálogo no admite nuevas versiones"}), 409
-
-            s_locked = db.session.execute(
-                sa.select(CatalogoSesion)
-                .where(CatalogoSesion.id == s.id)
-                .with_for_update()
-            ).scalar_one()
-
-            last_num = db.session.scalar(
-                sa.select(CatalogoSesionVersion.version_num)
-                .where(CatalogoSesionVersion.sesion_id == s_locked.id)
-                .order_by(CatalogoSesionVersion.version_num.desc())
-                .limit(1)
-                .with_for_update()
-            ) or 0
-            next_num = int(last_num) + 1
-
-            prod = c.producto
-            body = request.get_json(silent=True) or {}
-
-            v = CatalogoSesionVersion(
-                sesion_id=s_locked.id,
-                catalogo_id=c.id,
-                producto_id=prod.id,
-                version_num=next_num,
-                estado="BORRADOR",
-                is_current=False,  # no tocar current aquí
-                is_final=False,
-                um=body.get("um", prod.um),
-                doc_x_bulto_caja=body.get("doc_x_bulto_caja", prod.doc_x_bulto_caja),
-                doc_x_paq=body.get("doc_x_paq", prod.doc_x_paq),
-                precio_exw=body.get("precio_exw", prod.precio_exw),
-                familia=body.get("familia", prod.familia),
-                foto_key=body.get("foto_key", prod.imagen_key),
-                cant_bultos=body.get("cant_bultos", 0),
-                porc_desc=body.get("porc_desc"),
-                observaciones=body.get("observaciones"),
-                peso_gr=body.get("peso_gr"),
-                largo_cm=body.get("largo_cm"),
-                ancho_cm=body.get("ancho_cm"),
-                alto_cm=body.get("alto_cm"),
-            )
-
-            db.session.add(v)
-
-        # fuera del savepoint, commit principal para persistir cambios
+        preparar_tx()
+        r = _reservar_version_num(sesion_id)
+        if r is None:
+            db.session.rollback()
+            if db.session.get(CatalogoSesion, sesion_id) is None:
+                abort(404, description="sesión no existe")
+            return jsonify({"error": "catálogo no admite nuevas versiones"}), 409
+
+        v = CatalogoSesionVersion(
+            sesion_id=sesion_id,
+            catalogo_id=r["catalogo_id"],
+            producto_id=r["producto_id"],
+            version_num=r["version_num"],
+            estado="BORRADOR",
+            is_final=False,
+            um=body.get("um", r["um"]),
+            doc_x_bulto_caja=body.get("doc_x_bulto_caja", r["doc_x_bulto_caja"]),
+            doc_x_paq=body.get("doc_x_paq", r["doc_x_paq"]),
+            precio_exw=body.get("precio_exw", r["precio_exw"]),
+            familia=body.get("familia", r["familia"]),
+            foto_key=body.get("foto_key", r["imagen_key"]),
+            cant_bultos=body.get("cant_bultos", 0),
+            porc_desc=body.get("porc_desc"),
+            observaciones=body.get("observaciones"),
+            peso_gr=body.get("peso_gr"),
+            largo_cm=body.get("largo_cm"),
+            ancho_cm=body.get("ancho_cm"),
+            alto_cm=body.get("alto_cm"),
+        )
+
+        if snapshots.activo():
+            snapshots.comprimir_nueva(v)
+        db.session.add(v)
         db.session.commit()
         return jsonify(_version_to_json(v)), 201
 
@@ -200,8 +232,81 @@ def crear_version(sesion_id: int):
 @versiones_bp.get("/versiones/<int:version_id>")
 @require_auth
 def obtener_version(version_id: int):
-    v = _get_version_or_404(version_id)
-    return jsonify(_version_to_json(v))
+    campos = parse_fields(VERSION)
+    v = db.session.get(CatalogoSesionVersion, version_id,
+                       options=VERSION.load_only(CatalogoSesionVersion, campos)) \
+        or archivo.version(version_id)
+    if not v:
+        abort(404, description="versión no existe")
+    return jsonify(VERSION.dump(v, campos))
+
+@versiones_bp.get("/versiones")
+@require_auth
+def obtener_versiones():
+    """`?ids=1,2,3`: varias versiones en una consulta, en el orden pedido."""
+    campos = parse_fields(VERSION)
+    ids = parse_ids()
+    if ids is None:
+        abort(400, description="ids es requerido")
+    out = multi_get(CatalogoSesionVersion, VERSION, ids, campos)
+    return jsonify(archivo.completar(out, ids, VERSION, campos))
+
+# ---------------------------
+# GET /api/versiones/{a}/diff/{b}
+# ---------------------------
+@versiones_bp.get("/versiones/<int:a_id>/diff/<int:b_id>")
+@require_auth
+def diff_version(a_id: int, b_id: int):
+    """Solo los campos (snapshot y calculados) que cambian de `a` a `b`, con delta numérico."""
+    rows = db.session.scalars(
+        sa.select(CatalogoSesionVersion)
+        .options(*VERSION.load_only(CatalogoSesionVersion, CAMPOS_CARGA))
+        .where(CatalogoSesionVersion.id.in_((a_id, b_id)))
+    ).all()
+    por_id = {v.id: v for v in rows}
+    por_id.update((v.id, v) for v in archivo.versiones({a_id, b_id} - por_id.keys()))
+    if a_id not in por_id or b_id not in por_id:
+        abort(404, description="versión no existe")
+
+    a, b = por_id[a_id], por_id[b_id]
+    return jsonify({
+        "desde_id": a.id,
+        "hasta_id": b.id,
+        "cambios": diff_versiones(a, b),
+    })
+
+# ---------------------------
+# GET /api/sesiones/{sesion_id}/versiones/timeline
+# ---------------------------
+@versiones_bp.get("/sesiones/<int:sesion_id>/versiones/timeline")
+@require_auth
+def timeline_versiones(sesion_id: int):
+    """
+    Historia de la sesión como pasos consecutivos: la primera versión
+    (campos comparables) y, para cada siguiente, solo lo que cambió.
+    `?estado=ENVIADA,CONTRAOFERTA` limita la comparación a esos estados.
+    """
+    s, archivado = _sesion_or_404(sesion_id)
+
+    q = (
+        sa.select(CatalogoSesionVersion)
+        .options(*VERSION.load_only(CatalogoSesionVersion, CAMPOS_CARGA))
+        .where(CatalogoSesionVersion.sesion_id == s.id)
+    )
+    estados = [e.strip() for e in (request.args.get("estado") or "").split(",") if e.strip()]
+    if estados:
+        q = q.where(CatalogoSesionVersion.estado.in_(estados))
+    versiones = db.session.scalars(q.order_by(CatalogoSesionVersion.version_num)).all()
+    if archivado:
+        versiones = sorted([*versiones, *archivo.versiones_de_sesion(s.id, estados)],
+                           key=lambda v: v.version_num)
+    snapshots.materializar(versiones)
+
+    return jsonify({
+        "sesion_id": s.id,
+        "base": VERSION.dump(versiones[0], CAMPOS_CARGA) if versiones else None,
+        "pasos": timeline(versiones),
+    })
 
 @versiones_bp.patch("/versiones/<int:version_id>")
 @require_auth
@@ -215,6 +320,7 @@ def editar_version(version_id: int):
         return jsonify({"error": "versión no editable en este estado"}), 409
 
     body = request.get_json(silent=True) or {}
+    snapshots.antes_de_editar(v, body)
     for f in (
         "um", "doc_x_bulto_caja", "doc_x_paq", "precio_exw", "porc_desc",
         "cant_bultos", "peso_gr", "largo_cm", "ancho_cm", "alto_cm",
@@ -226,40 +332,131 @@ def editar_version(version_id: int):
     db.session.commit()
     return jsonify(_version_to_json(v))
 
-def _set_estado(v: CatalogoSesionVersion, nuevo: str):
-    v.estado = nuevo
+# ---------------------------
+# Máquina de estados: destino -> (orígenes permitidos, error si no aplica)
+# ---------------------------
+TRANSICIONES = {
+    "ENVIADA":      (("BORRADOR",),                "solo BORRADOR puede ENVIARSE"),
+    "CONTRAOFERTA": (("ENVIADA",),                 "solo ENVIADA puede pasar a CONTRAOFERTA"),
+    "RECHAZADA":    (("ENVIADA", "CONTRAOFERTA"),  "solo ENVIADA/CONTRAOFERTA puede RECHAZARSE"),
+    "APROBADA":     (("ENVIADA", "CONTRAOFERTA"),  "solo ENVIADA/CONTRAOFERTA puede APROBARSE"),
+}
+
+def _returning_version():
+    """Columnas de VERSION (incluidas las calculadas) para un RETURNING."""
+    V = CatalogoSesionVersion
+    return [getattr(V, c).label(c) for c in VERSION.columnas(VERSION.nombres())]
+
+def _set_estado(version_id: int, nuevo: str):
+    """
+    Transición en una sola sentencia: UPDATE ... WHERE estado IN (orígenes)
+    RETURNING con las columnas calculadas. Sin carrera entre el chequeo y la
+    escritura; 0 filas = no existe o no está en un estado de origen.
+    """
+    V = CatalogoSesionVersion
+    origenes, error = TRANSICIONES[nuevo]
+    stmt = (
+        sa.update(V)
+        .where(V.id == version_id, V.estado.in_(origenes))
+        .values(estado=nuevo)
+    )
+    # SQLite emite el RETURNING sin calificar: dentro de la subconsulta de
+    # is_current, `id` se resolvería a catalogo_sesion.id. Ahí se relee la fila.
+    pg = db.engine.dialect.name == "postgresql"
+    row = db.session.execute(stmt.returning(*(_returning_version() if pg else [V.id]))).first()
+    if row is None:
+        db.session.rollback()
+        _get_version_or_404(version_id)
+        return jsonify({"error": error}), 409
+
+    if pg and not row.campos_heredados:
+        data = VERSION.dump(row)
+    else:
+        # snapshot delta: materializar necesita la entidad
+        data = _version_to_json(db.session.get(V, row.id, populate_existing=True))
     db.session.commit()
-    return jsonify(_version_to_json(v))
+    return jsonify(data)
 
 @versiones_bp.route("/versiones/<int:version_id>/enviar", methods=["POST", "OPTIONS"])
 @require_auth
 def enviar_version(version_id: int):
-    v = _get_version_or_404(version_id)
-    if v.estado != "BORRADOR":
-        return jsonify({"error": "solo BORRADOR puede ENVIARSE"}), 409
-    return _set_estado(v, "ENVIADA")
+    return _set_estado(version_id, "ENVIADA")
 
 @versiones_bp.route("/versiones/<int:version_id>/contraoferta", methods=["POST", "OPTIONS"])
 @require_auth
 def contraoferta_version(version_id: int):
-    v = _get_version_or_404(version_id)
-    if v.estado != "ENVIADA":
-        return jsonify({"error": "solo ENVIADA puede pasar a CONTRAOFERTA"}), 409
-    return _set_estado(v, "CONTRAOFERTA")
+    return _set_estado(version_id, "CONTRAOFERTA")
 
 @versiones_bp.route("/versiones/<int:version_id>/rechazar", methods=["POST", "OPTIONS"])
 @require_auth
 def rechazar_version(version_id: int):
-    v = _get_version_or_404(version_id)
-    if v.estado not in ("ENVIADA", "CONTRAOFERTA"):
-        return jsonify({"error": "solo ENVIADA/CONTRAOFERTA puede RECHAZARSE"}), 409
-    return _set_estado(v, "RECHAZADA")
+    return _set_estado(version_id, "RECHAZADA")
+
+# ---------------------------
+# POST /api/versiones/estado  (transición en lote)
+# ---------------------------
+@versiones_bp.route("/versiones/estado", methods=["POST", "OPTIONS"])
+@require_auth
+def estado_en_lote():
+    """
+    {"ids": [..], "estado": "ENVIADA"|"CONTRAOFERTA"|"RECHAZADA"}
+
+    Mismas reglas que las transiciones individuales (TRANSICIONES), con un
+    UPDATE por estado de origen y un solo commit. APROBADA no se admite: cierra
+    el catálogo y va por /aprobar.
+    """
+    data = request.get_json(silent=True) or {}
+    nuevo = data.get("estado")
+    if nuevo not in TRANSICIONES or nuevo == "APROBADA":
+        abort(400, description="estado debe ser ENVIADA, CONTRAOFERTA o RECHAZADA")
+    try:
+        ids = list(dict.fromkeys(int(x) for x in data.get("ids") or []))
+    except (TypeError, ValueError):
+        abort(400, description="ids inválido")
+    if not ids:
+        abort(400, description="ids es requerido")
+    maximo = current_app.config["VERSIONES_LOTE_MAX"]
+    if len(ids) > maximo:
+        abort(400, description=f"máximo {maximo} versiones por llamada")
+
+    V = CatalogoSesionVersion
+    origenes, error = TRANSICIONES[nuevo]
+    desde = {}
+    for origen in origenes:
+        hechos = db.session.scalars(
+            sa.update(V)
+            .where(V.id.in_(ids), V.estado == origen)
+            .values(estado=nuevo)
+            .returning(V.id)
+        ).all()
+        desde.update(dict.fromkeys(hechos, origen))
+
+    # motivo de los que no pasaron (solo si hay alguno)
+    faltan = [i for i in ids if i not in desde]
+    actuales = dict(db.session.execute(
+        sa.select(V.id, V.estado).where(V.id.in_(faltan))
+    ).all()) if faltan else {}
+    db.session.commit()
+
+    resultados = []
+    for i in ids:
+        if i in desde:
+            resultados.append({"id": i, "ok": True, "desde": desde[i]})
+        elif i in actuales:
+            resultados.append({"id": i, "ok": False, "estado": actuales[i], "error": error})
+        else:
+            resultados.append({"id": i, "ok": False, "error": "versión no existe"})
+    return jsonify({"estado": nuevo, "resultados": resultados, "rechazados": faltan})
 
 @versiones_bp.route("/versiones/<int:version_id>/aprobar", methods=["POST", "OPTIONS"])
 @require_auth
+@idempotente
+@reintentar("aprobar")
 def aprobar_version(version_id: int):
     base_v = _get_version_or_404(version_id)
     try:
+        # lock por catálogo y luego FOR UPDATE en orden catálogo -> sesión -> versión
+        preparar_tx(base_v.catalogo_id)
         with db.session.begin_nested():
             c = db.session.execute(
                 sa.select(Catalogo)
@@ -282,25 +479,22 @@ def aprobar_version(version_id: int):
                 .with_for_update()
             ).scalar_one()
 
-            if v.estado not in ("ENVIADA", "CONTRAOFERTA"):
-                return jsonify({"error": "solo ENVIADA/CONTRAOFERTA puede APROBARSE"}), 409
+            origenes, error = TRANSICIONES["APROBADA"]
+            if v.estado not in origenes:
+                return jsonify({"error": error}), 409
 
             if c.final_version_id is not None:
                 return jsonify({"error": "el catálogo ya tiene una versión final"}), 409
 
             v.estado = "APROBADA"
-
-            db.session.execute(
-                sa.update(CatalogoSesionVersion)
-                .where(CatalogoSesionVersion.sesion_id == s_locked.id)
-                .values(is_current=False)
-            )
-            v.is_current = True
             v.is_final = True
+            s_locked.current_version_id = v.id
 
             c.final_version_id = v.id
             c.estado = "CERRADA"
 
+        db.session.commit()
+        solicitar_refresco(current_app._get_current_object())
         db.session.refresh(v)
         return jsonify(_version_to_json(v)), 200
 
@@ -0,0 +1,170 @@
+# app/archivo.py
+"""
+Archivo del historial de catálogos cerrados (`flask archivar`).
+
+Los catálogos CERRADA/CANCELADA sin cambios hace más de `meses` mueven sus
+versiones y sesiones a `catalogo_sesion_version_archivo` /
+`catalogo_sesion_archivo`, por lotes de catálogos (una transacción por lote).
+En la tabla caliente queda solo lo que otra fila apunta: la versión final
+(`catalogo.final_version_id`), la current de cada sesión y las sesiones que
+las contienen. Así las FKs compuestas, los índices únicos parciales y el
+resumen siguen valiendo sin cambios; el resto del historial deja de pesar en
+cada índice.
+
+Tablas aparte y no particiones: las FKs compuestas hacia
+`catalogo_sesion_version(id, ...)` exigirían la clave de partición en todas
+las claves únicas.
+
+Las filas se archivan con el snapshot completo (sin delta) y no pasan por el
+feed de cambios ni por los eventos: para los clientes siguen existiendo.
+
+Lectura: `VersionArchivo` / `SesionArchivo` son los modelos sobre las tablas
+de archivo (mismas columnas calculadas y esquemas VERSION / SESION). Las
+vistas de versiones y de sesiones miran la tabla caliente y, si no
+encuentran o el catálogo está archivado, también la de archivo.
+"""
+import sqlalchemy as sa
+from sqlalchemy.orm import aliased
+
+from .models import (
+    db, Cambio, Catalogo, CatalogoSesion, CatalogoSesionVersion,
+    catalogo_sesion_archivo, catalogo_sesion_version_archivo,
+)
+from .retry import preparar_tx
+from . import snapshots
+
+ESTADOS_ARCHIVABLES = ("CERRADA", "CANCELADA")
+
+VersionArchivo = aliased(CatalogoSesionVersion, catalogo_sesion_version_archivo.alias("va"), adapt_on_names=True)
+SesionArchivo = aliased(CatalogoSesion, catalogo_sesion_archivo.alias("sa"), adapt_on_names=True)
+
+
+def _hace_meses(meses: int):
+    if db.engine.dialect.name == "postgresql":
+        return sa.func.now() - sa.text(f"interval '{int(meses)} months'")
+    return sa.func.datetime("now", f"-{int(meses)} months")
+
+
+def _candidatos(meses: int, lote: int, desde: int) -> list[int]:
+    return db.session.scalars(
+        sa.select(Catalogo.id)
+        .where(
+            Catalogo.id > desde,
+            Catalogo.estado.in_(ESTADOS_ARCHIVABLES),
+            Catalogo.archivado_at.is_(None),
+            Catalogo.updated_at < _hace_meses(meses),
+        )
+        .order_by(Catalogo.id)
+        .limit(lote)
+    ).all()
+
+
+def _mover(origen: sa.Table, destino: sa.Table, donde) -> int:
+    cols = [c.name for c in origen.columns]
+    db.session.execute(
+        sa.insert(destino).from_select(cols, sa.select(*(origen.c[c] for c in cols)).where(donde))
+    )
+    return db.session.execute(sa.delete(origen).where(donde)).rowcount or 0
+
+
+def _archivar_lote(ids: list[int]) -> tuple[int, int]:
+    v = CatalogoSesionVersion.__table__
+    s = CatalogoSesion.__table__
+    pg = db.engine.dialect.name == "postgresql"
+
+    preparar_tx()
+    if pg:
+        db.session.execute(sa.text("SET LOCAL app.sin_cambios = 'on'"))
+    else:
+        # SQLite (dev/tests): triggers por fila sin interruptor; se descartan después
+        marca = db.session.scalar(sa.select(sa.func.coalesce(sa.func.max(Cambio.id), 0)))
+
+    # Snapshot completo: lo que queda no puede heredar de lo que se va
+    snapshots.expandir_filas(v.c.catalogo_id.in_(ids))
+
+    versiones = _mover(v, catalogo_sesion_version_archivo, sa.and_(
+        v.c.catalogo_id.in_(ids),
+        v.c.is_final.is_(False),
+        ~sa.exists().where(s.c.current_version_id == v.c.id),
+    ))
+    sesiones = _mover(s, catalogo_sesion_archivo, sa.and_(
+        s.c.catalogo_id.in_(ids),
+        ~sa.exists().where(v.c.sesion_id == s.c.id),
+    ))
+    db.session.execute(
+        sa.update(Catalogo.__table__)
+        .where(Catalogo.id.in_(ids))
+        .values(archivado_at=sa.func.now(), updated_at=Catalogo.__table__.c.updated_at)
+    )
+    if not pg:
+        db.session.execute(sa.delete(Cambio).where(Cambio.id > marca))
+    db.session.commit()
+    return sesiones, versiones
+
+
+def archivar(meses: int = 12, lote: int = 200, log=print) -> dict:
+    """Archiva por lotes de `lote` catálogos. Devuelve totales movidos."""
+    total = {"catalogos": 0, "sesiones": 0, "versiones": 0}
+    desde = 0
+    while True:
+        ids = _candidatos(meses, lote, desde)
+        if not ids:
+            return total
+        sesiones, versiones = _archivar_lote(ids)
+        total["catalogos"] += len(ids)
+        total["sesiones"] += sesiones
+        total["versiones"] += versiones
+        desde = ids[-1]
+        log(f"  {total['catalogos']} catálogos, {total['versiones']} versiones archivadas")
+
+
+# -------------------------
+# LECTURA
+# -------------------------
+# Siempre con todas las columnas: un atributo diferido se recargaría desde
+# la tabla caliente, donde la fila ya no está.
+def version(version_id: int):
+    return db.session.scalars(sa.select(VersionArchivo).where(VersionArchivo.id == version_id)).first()
+
+
+def versiones(ids) -> list:
+    if not ids:
+        return []
+    return db.session.scalars(sa.select(VersionArchivo).where(VersionArchivo.id.in_(ids))).all()
+
+
+def versiones_de_sesion(sesion_id: int, estados=None) -> list:
+    q = sa.select(VersionArchivo).where(VersionArchivo.sesion_id == sesion_id)
+    if estados:
+        q = q.where(VersionArchivo.estado.in_(estados))
+    return db.session.scalars(q.order_by(VersionArchivo.version_num)).all()
+
+
+def versiones_de_sesiones(sesion_ids) -> list:
+    if not sesion_ids:
+        return []
+    return db.session.scalars(
+        sa.select(VersionArchivo).where(VersionArchivo.sesion_id.in_(sesion_ids))
+    ).all()
+
+
+def sesiones_de_catalogo(catalogo_id: int) -> list:
+    return db.session.scalars(sa.select(SesionArchivo).where(SesionArchivo.catalogo_id == catalogo_id)).all()
+
+
+def sesion(sesion_id: int):
+    return db.session.scalars(sa.select(SesionArchivo).where(SesionArchivo.id == sesion_id)).first()
+
+
+def completar(out: dict, ids, esquema, campos=None) -> dict:
+    """Completa un resultado de `multi_get` con las versiones archivadas."""
+    if not out["no_encontrados"]:
+        return out
+    por_id = {v.id: v for v in versiones(out["no_encontrados"])}
+    if por_id:
+        out["data"] = [
+            esquema.dump(por_id[i], campos) if d is None and i in por_id else d
+            for i, d in zip(ids, out["data"])
+        ]
+        out["no_encontrados"] = [i for i in out["no_encontrados"] if i not in por_id]
+    return out
@@ -0,0 +1,118 @@
+# app/cambios.py
+"""
+Feed incremental de cambios para sincronizar clientes (`GET /api/changes`).
+
+Los triggers de app/models.py escriben en `cambio` una fila por fila
+insertada/editada/borrada, en la misma transacción. El cursor es el par
+(txid, id) de la última fila entregada:
+
+- `id` (IDENTITY) se asigna al insertar, no al commitear: una transacción
+  lenta puede commitear ids menores a otros ya leídos. Por eso se ordena por
+  (txid, id) y solo se entregan filas con txid < xmin del snapshot actual:
+  todas esas transacciones ya terminaron y no aparecerán filas nuevas por
+  debajo del cursor.
+- Fuera de PostgreSQL txid es 0 y el orden es solo por id.
+
+Cada lote se compacta a la última operación por entidad; los upserts viajan
+serializados, los deletes solo como id. `flask purge-cambios` borra lo viejo;
+un cursor que apunta a una fila purgada responde 410 (descarga completa).
+"""
+import sqlalchemy as sa
+
+from .models import (
+    db, Cambio, Catalogo, CatalogoSesion, CatalogoSesionVersion, Cliente, Producto,
+)
+from .serializers import CATALOGO, CLIENTE, PRODUCTO, SESION, VERSION
+
+# tabla -> (modelo, esquema, campos); catálogos sin los derivados (nombres,
+# final anidada): el cliente ya los tiene por sus propias tablas
+ENTIDADES = {
+    "cliente": (Cliente, CLIENTE, None),
+    "producto": (Producto, PRODUCTO, None),
+    "catalogo": (Catalogo, CATALOGO, ("id", "cliente_id", "producto_id", "estado",
+                                      "final_version_id", "created_at", "updated_at")),
+    "catalogo_sesion": (CatalogoSesion, SESION, None),
+    "catalogo_sesion_version": (CatalogoSesionVersion, VERSION, None),
+}
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+class CursorExpirado(Exception):
+    pass
+
+
+def parse_cursor(raw: str) -> tuple[int, int]:
+    try:
+        txid, id_ = (int(x) for x in raw.split(":"))
+    except ValueError:
+        raise CursorInvalido(raw)
+    return txid, id_
+
+
+def _fmt(txid: int, id_: int) -> str:
+    return f"{txid}:{id_}"
+
+
+def _xmin_filtro():
+    if db.engine.dialect.name != "postgresql":
+        return sa.true()
+    return Cambio.txid < sa.func.txid_snapshot_xmin(sa.func.txid_current_snapshot())
+
+
+def cabeza() -> str:
+    """Cursor actual (para empezar a sincronizar tras una descarga completa)."""
+    fila = db.session.execute(
+        sa.select(Cambio.txid, Cambio.id).where(_xmin_filtro())
+        .order_by(Cambio.txid.desc(), Cambio.id.desc()).limit(1)
+    ).first()
+    return _fmt(*fila) if fila else _fmt(0, 0)
+
+
+def leer(since: str, limite: int) -> dict:
+    txid, id_ = parse_cursor(since)
+    if id_ and db.session.get(Cambio, id_) is None:
+        raise CursorExpirado(since)
+
+    filas = db.session.execute(
+        sa.select(Cambio.txid, Cambio.id, Cambio.tabla, Cambio.entidad_id, Cambio.op)
+        .where(sa.tuple_(Cambio.txid, Cambio.id) > sa.tuple_(txid, id_), _xmin_filtro())
+        .order_by(Cambio.txid, Cambio.id)
+        .limit(limite + 1)
+    ).all()
+    mas = len(filas) > limite
+    filas = filas[:limite]
+
+    ultima = {}  # (tabla, id) -> op, gana la última
+    for f in filas:
+        ultima[(f.tabla, f.entidad_id)] = f.op
+
+    out = {}
+    for tabla, (modelo, esquema, campos) in ENTIDADES.items():
+        ups = [i for (t, i), op in ultima.items() if t == tabla and op == "U"]
+        dels = [i for (t, i), op in ultima.items() if t == tabla and op == "D"]
+        objs = db.session.scalars(
+            sa.select(modelo).options(*esquema.load_only(modelo, campos)).where(modelo.id.in_(ups))
+        ).all() if ups else []
+        # una entidad editada y luego borrada en un lote posterior llega como delete ahí
+        if objs or dels:
+            out[tabla] = {"upserts": esquema.dump_many(objs, campos), "deletes": dels}
+
+    cursor = _fmt(filas[-1].txid, filas[-1].id) if filas else since
+    return {"cambios": out, "cursor": cursor, "mas": mas}
+
+
+def purgar(dias: int, lote: int = 10_000) -> int:
+    total = 0
+    corte = sa.func.now() - sa.text(f"interval '{int(dias)} days'") \
+        if db.engine.dialect.name == "postgresql" \
+        else sa.func.datetime("now", f"-{int(dias)} days")
+    while True:
+        ids = sa.select(Cambio.id).where(Cambio.created_at < corte).limit(lote).scalar_subquery()
+        n = db.session.execute(sa.delete(Cambio).where(Cambio.id.in_(ids))).rowcount
+        db.session.commit()
+        total += n or 0
+        if not n or n < lote:
+            return total
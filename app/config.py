@@ -1,5 +1,6 @@
 # app/config.py
 import os
+import json
 
 class BaseConfig:
     SECRET_KEY = os.getenv("SECRET_KEY", "change-me")
@@ -16,16 +17,116 @@ class BaseConfig:
     JWT_ALG = "HS256"
     ACCESS_TTL_MIN = int(os.getenv("ACCESS_TTL_MIN", "15"))
     REFRESH_TTL_D = int(os.getenv("REFRESH_TTL_D", "7"))
+
+    # Resumen de catálogos (vista materializada)
+    RESUMEN_REFRESH_ON_APPROVE = os.getenv("RESUMEN_REFRESH_ON_APPROVE", "1") == "1"
+    RESUMEN_REFRESH_DEBOUNCE_S = float(os.getenv("RESUMEN_REFRESH_DEBOUNCE_S", "5"))
+
+    # Logística: perfiles de contenedor (volumen interno m³, carga útil kg)
+    CONTENEDORES = json.loads(os.getenv("CONTENEDORES_JSON") or "null") or {
+        "20": {"cbm": 33.2, "kg": 28200},
+        "40": {"cbm": 67.7, "kg": 26700},
+        "40HC": {"cbm": 76.3, "kg": 26500},
+    }
+    CONTENEDOR_FACTOR_ESTIBA = float(os.getenv("CONTENEDOR_FACTOR_ESTIBA", "0.9"))
+    CONTENEDOR_MAX_CATALOGOS = int(os.getenv("CONTENEDOR_MAX_CATALOGOS", "2000"))
+
+    # Versiones: guardar solo los campos descriptivos que cambian (app/snapshots.py)
+    VERSION_DELTA_STORAGE = os.getenv("VERSION_DELTA_STORAGE", "0") == "1"
+    # POST /api/versiones/estado: ids por llamada
+    VERSIONES_LOTE_MAX = int(os.getenv("VERSIONES_LOTE_MAX", "500"))
+
+    # Repreciado de versiones abiertas (app/precios.py): filas por UPDATE
+    REPRECIAR_LOTE = int(os.getenv("REPRECIAR_LOTE", "1000"))
+
+    # Idempotency-Key (app/idempotencia.py)
+    IDEMPOTENCIA_TTL_H = int(os.getenv("IDEMPOTENCIA_TTL_H", "24"))
+
+    # Pool de conexiones por proceso (solo PostgreSQL; app/extensions.py). Con
+    # workers gevent todas las greenlets del proceso comparten este pool.
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+    DB_POOL_TIMEOUT_S = float(os.getenv("DB_POOL_TIMEOUT_S", "5"))
+
+    # Contención en BD (app/retry.py)
+    DB_LOCK_TIMEOUT_MS = int(os.getenv("DB_LOCK_TIMEOUT_MS", "2000"))
+    DB_RETRY_MAX = int(os.getenv("DB_RETRY_MAX", "3"))
+    DB_RETRY_BASE_S = float(os.getenv("DB_RETRY_BASE_S", "0.05"))
+    DB_RETRY_MAX_S = float(os.getenv("DB_RETRY_MAX_S", "1.0"))
+
+    # Instrumentación por request (app/instrumentacion.py)
+    SERVER_TIMING = os.getenv("SERVER_TIMING", "1") == "1"
+    SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+    SLOW_REQUEST_QUERIES = int(os.getenv("SLOW_REQUEST_QUERIES", "30"))
+    DB_DETECT_N1 = os.getenv("DB_DETECT_N1", "0") == "1"
+    DB_N1_THRESHOLD = int(os.getenv("DB_N1_THRESHOLD", "5"))
+
+    # ?ids= (multi-get): ids por llamada
+    MULTIGET_MAX = int(os.getenv("MULTIGET_MAX", "200"))
+
+    # GET /api/catalogos/<id>?expand=: tope de colecciones anidadas
+    EXPAND_SESIONES_MAX = int(os.getenv("EXPAND_SESIONES_MAX", "20"))
+    EXPAND_VERSIONES_MAX = int(os.getenv("EXPAND_VERSIONES_MAX", "20"))
+
+    # Cotizaciones XLSX/CSV (app/cotizaciones.py)
+    COTIZACIONES_WORKERS = int(os.getenv("COTIZACIONES_WORKERS", "2"))
+    COTIZACION_TIMEOUT_S = float(os.getenv("COTIZACION_TIMEOUT_S", "600"))
+    COTIZACION_IMAGEN_TTL_S = int(os.getenv("COTIZACION_IMAGEN_TTL_S", "86400"))
+    # 1 = enlaces de imagen públicos (bucket público): no vencen en el archivo
+    COTIZACION_IMAGEN_PUBLICA = os.getenv("COTIZACION_IMAGEN_PUBLICA", "0") == "1"
+
+    # SSE /api/eventos/... (app/eventos.py)
+    SSE_LATIDO_S = float(os.getenv("SSE_LATIDO_S", "15"))
+    SSE_MAX_S = float(os.getenv("SSE_MAX_S", "300"))
+    SSE_COLA_MAX = int(os.getenv("SSE_COLA_MAX", "100"))
+    # 503 si el worker no es gevent (cada stream ocuparía un hilo)
+    SSE_SOLO_ASYNC = os.getenv("SSE_SOLO_ASYNC", "1") == "1"
+
+    # GET /api/changes: cambios por lote
+    CAMBIOS_LOTE_MAX = int(os.getenv("CAMBIOS_LOTE_MAX", "1000"))
+
+    # Listados: ?count=estimate cuenta exacto por debajo de esto; cache de ?facets=
+    COUNT_EXACT_BELOW = int(os.getenv("COUNT_EXACT_BELOW", "1000"))
+    FACETS_TTL_S = float(os.getenv("FACETS_TTL_S", "30"))
+
+    # Límite de tasa por usuario/IP (app/limites.py): "N/S" = N requests cada S segundos
+    RATELIMIT_ENABLED = os.getenv("RATELIMIT_ENABLED", "1") == "1"
+    RATELIMIT_AUTH = os.getenv("RATELIMIT_AUTH", "10/60")
+    RATELIMIT_LECTURA = os.getenv("RATELIMIT_LECTURA", "300/60")
+    RATELIMIT_ESCRITURA = os.getenv("RATELIMIT_ESCRITURA", "60/60")
+    RATELIMIT_REDIS_URL = os.getenv("RATELIMIT_REDIS_URL") or os.getenv("REDIS_URL", "")
+    RATELIMIT_PROXIES = int(os.getenv("RATELIMIT_PROXIES", "1"))  # Heroku: 1
+
+    # Admisión: 503 + Retry-After antes de encolar más trabajo (0 = sin tope).
+    # Por defecto, las conexiones del pool: más requests a la vez solo
+    # esperarían una conexión.
+    ADMISION_MAX_EN_CURSO = int(os.getenv("ADMISION_MAX_EN_CURSO", str(DB_POOL_SIZE + DB_MAX_OVERFLOW)))
+    ADMISION_MAX_COLA_MS = float(os.getenv("ADMISION_MAX_COLA_MS", "10000"))
+    ADMISION_RETRY_AFTER_S = float(os.getenv("ADMISION_RETRY_AFTER_S", "2"))
+
+    # GET /metrics (app/metrics.py): exige `Authorization: Bearer <token>`.
+    # Vacío = sin auth, solo fuera de producción (red interna / local).
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+    METRICS_REQUIERE_TOKEN = False
     
 class DevConfig(BaseConfig):
     DEBUG = True
+    DB_DETECT_N1 = True
+    SSE_SOLO_ASYNC = False  # flask run: un hilo por stream está bien
 
 class ProdConfig(BaseConfig):
     DEBUG = False
+    # El dyno web es público: sin METRICS_TOKEN, /metrics responde 404
+    METRICS_REQUIERE_TOKEN = True
 
 class TestConfig(BaseConfig):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL_TEST", "sqlite:///test.db")
+    RESUMEN_REFRESH_ON_APPROVE = False
+    DB_DETECT_N1 = True
+    RATELIMIT_ENABLED = False
+    RATELIMIT_REDIS_URL = ""
+    SSE_SOLO_ASYNC = False
 
 
 def get_config(env_name: str | None):
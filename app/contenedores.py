@@ -0,0 +1,145 @@
+# app/contenedores.py
+"""
+Planificación de carga en contenedores a partir de versiones finales.
+
+Cada versión final es una `Linea` liviana (`__slots__`, solo bultos, cbm y
+kg por bulto). Se ordenan una vez de mayor a menor volumen por bulto y se
+recorren una vez por perfil (first-fit en orden, sin búsqueda), partiendo
+una línea en bultos enteros cuando no cabe completa.
+"""
+import math
+
+
+class Linea:
+    __slots__ = ("version_id", "catalogo_id", "producto_id", "bultos", "cbm_bulto", "kg_bulto")
+
+    def __init__(self, version_id, catalogo_id, producto_id, bultos, cbm_bulto, kg_bulto):
+        self.version_id = version_id
+        self.catalogo_id = catalogo_id
+        self.producto_id = producto_id
+        self.bultos = int(bultos)
+        self.cbm_bulto = float(cbm_bulto or 0)
+        self.kg_bulto = float(kg_bulto or 0)
+
+
+def _capacidad(perfil: dict, factor: float) -> tuple[float, float]:
+    return float(perfil["cbm"]) * factor, float(perfil["kg"])
+
+
+def _llenar(lineas: list[Linea], cap_cbm: float, cap_kg: float):
+    """
+    Llena contenedores en orden (líneas ya ordenadas de mayor a menor volumen
+    por bulto), partiendo una línea en bultos enteros cuando no cabe completa.
+    Devuelve (contenedores, no_caben).
+    """
+    contenedores = []
+    no_caben = []
+    actual = {"cbm": 0.0, "kg": 0.0, "items": []}
+
+    for ln in lineas:
+        if ln.cbm_bulto > cap_cbm or ln.kg_bulto > cap_kg:
+            no_caben.append(ln.version_id)
+            continue
+        restantes = ln.bultos
+        while restantes > 0:
+            libre_cbm = cap_cbm - actual["cbm"]
+            libre_kg = cap_kg - actual["kg"]
+            por_cbm = math.floor(libre_cbm / ln.cbm_bulto + 1e-9) if ln.cbm_bulto > 0 else restantes
+            por_kg = math.floor(libre_kg / ln.kg_bulto + 1e-9) if ln.kg_bulto > 0 else restantes
+            caben = min(restantes, por_cbm, por_kg)
+            if caben <= 0:
+                contenedores.append(actual)
+                actual = {"cbm": 0.0, "kg": 0.0, "items": []}
+                continue
+            actual["cbm"] += caben * ln.cbm_bulto
+            actual["kg"] += caben * ln.kg_bulto
+            actual["items"].append({
+                "version_id": ln.version_id,
+                "catalogo_id": ln.catalogo_id,
+                "producto_id": ln.producto_id,
+                "bultos": caben,
+            })
+            restantes -= caben
+
+    if actual["items"]:
+        contenedores.append(actual)
+    return contenedores, no_caben
+
+
+def _resumen(nombre: str, perfil: dict, contenedores: list[dict]) -> dict:
+    cap_cbm, cap_kg = float(perfil["cbm"]), float(perfil["kg"])
+    return {
+        "perfil": nombre,
+        "cantidad": len(contenedores),
+        "contenedores": [
+            {
+                "n": i + 1,
+                "perfil": nombre,
+                "cbm": round(c["cbm"], 4),
+                "kg": round(c["kg"], 2),
+                "llenado_cbm": round(c["cbm"] / cap_cbm, 4),
+                "llenado_kg": round(c["kg"] / cap_kg, 4),
+                "items": c["items"],
+            }
+            for i, c in enumerate(contenedores)
+        ],
+    }
+
+
+def planificar(lineas: list[Linea], perfiles: dict, factor: float = 1.0) -> dict:
+    """
+    `perfiles`: {"20": {"cbm": 33.2, "kg": 28200}, ...}.
+    `factor`: fracción del volumen nominal aprovechable (estiba).
+
+    Devuelve un plan por perfil (con sus `no_caben`: versiones con un bulto
+    más grande que ese perfil) y un plan `recomendado`: contenedores del
+    perfil más grande y, para el último, el perfil más chico en que entra.
+    El `no_caben` general son las versiones que no entran en ningún perfil.
+    """
+    lineas = [ln for ln in lineas if ln.bultos > 0]
+    lineas.sort(key=lambda ln: (ln.cbm_bulto, ln.kg_bulto), reverse=True)
+
+    totales = {
+        "lineas": len(lineas),
+        "bultos": sum(ln.bultos for ln in lineas),
+        "cbm": round(sum(ln.bultos * ln.cbm_bulto for ln in lineas), 4),
+        "kg": round(sum(ln.bultos * ln.kg_bulto for ln in lineas), 2),
+    }
+
+    planes = []
+    llenados = {}
+    no_caben = None
+    for nombre, perfil in perfiles.items():
+        cap_cbm, cap_kg = _capacidad(perfil, factor)
+        conts, nc = _llenar(lineas, cap_cbm, cap_kg)
+        llenados[nombre] = conts
+        no_caben = set(nc) if no_caben is None else no_caben & set(nc)
+        plan = _resumen(nombre, perfil, conts)
+        plan["no_caben"] = nc
+        plan["minimo_teorico"] = max(
+            math.ceil(totales["cbm"] / cap_cbm) if cap_cbm else 0,
+            math.ceil(totales["kg"] / cap_kg) if cap_kg else 0,
+        )
+        planes.append(plan)
+
+    recomendado = None
+    if perfiles and lineas:
+        por_tamano = sorted(perfiles.items(), key=lambda kv: (float(kv[1]["cbm"]), float(kv[1]["kg"])))
+        grande_nombre, grande = por_tamano[-1]
+        conts = llenados[grande_nombre]
+        items = []
+        for i, c in enumerate(conts):
+            nombre, perfil = grande_nombre, grande
+            if i == len(conts) - 1:
+                for n, p in por_tamano:
+                    cap_cbm, cap_kg = _capacidad(p, factor)
+                    if c["cbm"] <= cap_cbm + 1e-9 and c["kg"] <= cap_kg + 1e-9:
+                        nombre, perfil = n, p
+                        break
+            d = _resumen(nombre, perfil, [c])["contenedores"][0]
+            d["n"] = i + 1
+            items.append(d)
+        recomendado = {"cantidad": len(items), "contenedores": items}
+
+    no_caben = [ln.version_id for ln in lineas if ln.version_id in (no_caben or ())]
+    return {"totales": totales, "planes": planes, "recomendado": recomendado, "no_caben": no_caben}
@@ -0,0 +1,153 @@
+# app/conteos.py
+"""
+Totales y facetas para los listados (`?count=` y `?facets=`).
+
+- `?count=none` (por defecto): no se cuenta nada, como antes.
+- `?count=exact`: `count(*)` sobre la consulta filtrada.
+- `?count=estimate`: sin filtros, `pg_class.reltuples` (lo mantiene
+  autovacuum/ANALYZE, coste cero); con filtros, las filas estimadas por el
+  planner (`EXPLAIN`). Si la estimación queda por debajo de
+  `COUNT_EXACT_BELOW` se cuenta exacto: en tablas/filtros chicos el
+  `count(*)` es barato y el usuario ve el número real.
+  Fuera de PostgreSQL siempre es exacto.
+
+Las facetas (`?facets=pais,ciudad`) salen de una sola consulta agrupada
+(GROUPING SETS en PostgreSQL) con los filtros aplicados, y se cachean
+`FACETS_TTL_S` segundos por endpoint + filtros.
+"""
+import json
+import threading
+import time
+
+import sqlalchemy as sa
+from flask import abort, current_app, request
+
+from . import metrics
+from .models import db
+
+MODOS = ("none", "exact", "estimate")
+_CACHE_MAX = 512
+
+
+def parse_count() -> str:
+    modo = (request.args.get("count") or "none").strip().lower()
+    if modo not in MODOS:
+        abort(400, description="count inválido (exact|estimate|none)")
+    return modo
+
+
+def _exacto(q) -> int:
+    return q.order_by(None).count()
+
+
+def _reltuples(tabla: str) -> int | None:
+    n = db.session.scalar(
+        sa.text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:t)"), {"t": tabla}
+    )
+    # -1: tabla nunca analizada
+    return n if n is not None and n >= 0 else None
+
+
+def _plan_rows(q) -> int:
+    stmt = q.order_by(None).statement
+    comp = stmt.compile(dialect=db.engine.dialect)
+    plan = db.session.connection().exec_driver_sql(
+        "EXPLAIN (FORMAT JSON) " + str(comp), comp.params
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def totales(q, modo: str, tabla: str, filtrado: bool) -> dict:
+    """Campos a sumar a la respuesta: {} | {"total", "total_estimado"}."""
+    if modo == "none":
+        return {}
+    if modo == "estimate" and db.engine.dialect.name == "postgresql":
+        n = _plan_rows(q) if filtrado else _reltuples(tabla)
+        if n is not None and n >= current_app.config["COUNT_EXACT_BELOW"]:
+            return {"total": n, "total_estimado": True}
+    return {"total": _exacto(q), "total_estimado": False}
+
+
+# ---------------------------
+# Facetas
+# ---------------------------
+_cache: dict[tuple, tuple[float, dict]] = {}
+_lock = threading.Lock()
+
+
+def parse_facets(permitidas) -> tuple[str, ...]:
+    raw = request.args.get("facets")
+    if not raw:
+        return ()
+    nombres = tuple(dict.fromkeys(n.strip() for n in raw.split(",") if n.strip()))
+    desconocidas = [n for n in nombres if n not in permitidas]
+    if desconocidas:
+        abort(400, description=f"facets desconocidas: {', '.join(desconocidas)}")
+    return nombres
+
+
+def _agrupar(q, columnas: dict) -> dict:
+    nombres = list(columnas)
+    cols = [columnas[n] for n in nombres]
+    base = q.order_by(None)
+    if len(cols) == 1:
+        filas = base.with_entities(cols[0], sa.func.count()).group_by(cols[0]).all()
+        return {nombres[0]: {v: n for v, n in filas}}
+
+    res = {n: {} for n in nombres}
+    if db.engine.dialect.name == "postgresql":
+        # un solo recorrido; GROUPING() dice a qué conjunto pertenece la fila
+        gs = [sa.func.grouping(c) for c in cols]
+        filas = base.with_entities(*cols, *gs, sa.func.count()) \
+                    .group_by(sa.func.grouping_sets(*[sa.tuple_(c) for c in cols])).all()
+        for f in filas:
+            i = [f[len(cols) + j] for j in range(len(cols))].index(0)
+            res[nombres[i]][f[i]] = f[-1]
+        return res
+
+    sub = [
+        base.with_entities(sa.literal(i).label("k"), sa.cast(c, sa.String).label("v"),
+                           sa.func.count().label("n")).group_by(c)
+        for i, c in enumerate(cols)
+    ]
+    for k, v, n in sub[0].union_all(*sub[1:]).all():
+        res[nombres[k]][v] = n
+    return res
+
+
+def facetas(q, columnas: dict, clave: tuple) -> dict:
+    """
+    `columnas`: {"pais": Cliente.pais, ...} (solo las pedidas).
+    Devuelve {"pais": [{"valor": "PE", "n": 10}, ...], ...} ordenado por n.
+    """
+    if not columnas:
+        return {}
+    ttl = current_app.config["FACETS_TTL_S"]
+    clave = (clave, tuple(columnas))
+    ahora = time.monotonic()
+    with _lock:
+        hit = _cache.get(clave)
+    if hit and hit[0] > ahora:
+        metrics.cache("facetas", True)
+        return hit[1]
+    metrics.cache("facetas", False)
+
+    grupos = _agrupar(q, columnas)
+    out = {
+        nombre: [{"valor": v, "n": n} for v, n in sorted(d.items(), key=lambda kv: -kv[1])]
+        for nombre, d in grupos.items()
+    }
+    if ttl > 0:
+        with _lock:
+            if len(_cache) >= _CACHE_MAX:
+                _cache.clear()
+            _cache[clave] = (ahora + ttl, out)
+    return out
+
+
+def clave_request() -> tuple:
+    """Endpoint + filtros (sin paginación ni proyección) para la cache de facetas."""
+    ignorar = {"page", "per_page", "fields", "count"}
+    return (request.endpoint, tuple(sorted((k, v) for k, v in request.args.items(multi=True) if k not in ignorar)))
@@ -0,0 +1,360 @@
+# app/cotizaciones.py
+"""
+Cotizaciones de un cliente (XLSX / CSV) generadas fuera del request.
+
+- `origen="final"`: versión final de cada catálogo del cliente;
+  `origen="current"`: vigente de cada sesión activa de sus catálogos EN_PROCESO.
+- La clave es un hash del contenido de entrada (columnas guardadas de las
+  versiones, nombre/imagen de los productos, cliente, formato y origen),
+  leído con una consulta liviana: si nada cambió la cotización ya está lista
+  y se entrega al instante.
+- El estado vive en la tabla `cotizacion` y el archivo en Supabase Storage
+  (`cotizaciones/<id>` en `SUPABASE_BUCKET`), así lo ven todos los workers y
+  dynos. Una sola generación por clave: la reclama quien inserta la fila (o
+  la retoma con un UPDATE condicional si falló o quedó abandonada).
+- La generación corre en un ThreadPoolExecutor por proceso y lee las filas
+  en streaming (`yield_per`) hacia el escritor, así la memoria no crece con
+  el tamaño de la cotización. Escribe a un temporal local que se sube y se
+  borra.
+- Los enlaces de imagen dentro del archivo son URLs firmadas que vencen a
+  las `COTIZACION_IMAGEN_TTL_S`; la clave incluye el medio TTL en curso, así
+  que cada medio TTL se genera un archivo nuevo y los viejos los borra
+  `flask purge-cotizaciones`. Con `COTIZACION_IMAGEN_PUBLICA` (bucket
+  público) los enlaces no vencen y la clave depende solo del contenido.
+"""
+import csv
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import sqlalchemy as sa
+from sqlalchemy.exc import IntegrityError
+
+from .models import db, Catalogo, CatalogoSesion, CatalogoSesionVersion, Cliente, Cotizacion, Producto
+from .snapshots import materializar
+from .xlsx import EscritorXlsx
+from . import metrics
+
+log = logging.getLogger(__name__)
+
+FORMATOS = {"xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "csv": "text/csv"}
+ORIGENES = ("final", "current")
+LOTE = 500
+PREFIJO = "cotizaciones/"
+URL_TTL_S = 300  # enlace de descarga del archivo
+
+COLUMNAS = (
+    ("Producto", lambda v, p: p.nombre),
+    ("Familia", lambda v, p: v.familia),
+    ("UM", lambda v, p: v.um),
+    ("Doc x paquete", lambda v, p: v.doc_x_paq),
+    ("Bultos", lambda v, p: v.cant_bultos),
+    ("Precio EXW", lambda v, p: v.precio_exw),
+    ("Descuento", lambda v, p: v.porc_desc),
+    ("Precio x docena", lambda v, p: v.precio_x_docena),
+    ("Precio unidad EXW", lambda v, p: v.precio_unidad_exw),
+    ("Unidades", lambda v, p: v.cantidad_unidades),
+    ("Subtotal EXW", lambda v, p: v.subtotal_exw),
+    ("CBM", lambda v, p: v.cbm_total),
+    ("Peso bruto kg", lambda v, p: v.peso_bruto_kg),
+)
+TOTALES = ("Subtotal EXW", "CBM", "Peso bruto kg")
+# columnas guardadas de la versión de las que sale todo lo que se escribe
+CAMPOS_HUELLA = ("id", "um", "doc_x_paq", "precio_exw", "porc_desc", "cant_bultos", "peso_gr",
+                 "largo_cm", "ancho_cm", "alto_cm", "familia", "campos_heredados", "delta_base_id")
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _pool(cfg) -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:  # dos requests a la vez crearían dos pools
+                _executor = ThreadPoolExecutor(cfg["COTIZACIONES_WORKERS"], thread_name_prefix="cotizacion")
+    return _executor
+
+
+def _versiones(cliente_id: int, origen: str):
+    V, C = CatalogoSesionVersion, Catalogo
+    q = sa.select(V).join(C, C.id == V.catalogo_id).where(C.cliente_id == cliente_id)
+    if origen == "final":
+        q = q.where(C.final_version_id == V.id)
+    else:
+        S = CatalogoSesion
+        q = q.join(S, S.current_version_id == V.id) \
+             .where(C.estado == "EN_PROCESO", S.is_active)
+    return q
+
+
+def huella(cliente_id: int, origen: str, formato: str, cfg) -> str | None:
+    """Hash de las entradas; None si el cliente no existe."""
+    c = db.session.get(Cliente, cliente_id)
+    if c is None:
+        return None
+    V, P = CatalogoSesionVersion, Producto
+    sub = _versiones(cliente_id, origen) \
+        .with_only_columns(V.producto_id, *(V.__table__.c[n] for n in CAMPOS_HUELLA)).subquery()
+    filas = db.session.execute(
+        sa.select(sub, P.nombre, P.imagen_key)
+        .join(P, P.id == sub.c.producto_id)
+        .order_by(sub.c.id)
+    )
+    h = hashlib.sha256(f"{formato}|{origen}|{c.id}|{c.nombre}|".encode())
+    for f in filas:
+        h.update(repr(tuple(f)).encode())
+    if not cfg.get("COTIZACION_IMAGEN_PUBLICA"):
+        # las URLs firmadas de imágenes vencen: el archivo se regenera cada medio TTL
+        h.update(str(int(time.time() // (cfg["COTIZACION_IMAGEN_TTL_S"] / 2))).encode())
+    return h.hexdigest()[:32]
+
+
+def _hace(segundos: float):
+    if db.engine.dialect.name == "postgresql":
+        return sa.func.now() - sa.text(f"interval '{int(segundos)} seconds'")
+    return sa.func.datetime("now", f"-{int(segundos)} seconds")
+
+
+def estado(cotizacion_id: str) -> str | None:
+    return db.session.scalar(sa.select(Cotizacion.estado).where(Cotizacion.id == cotizacion_id))
+
+
+def _reclamar(cfg, cotizacion_id: str) -> str | None:
+    """None si esta llamada debe generarla; si no, el estado actual."""
+    try:
+        db.session.execute(sa.insert(Cotizacion).values(id=cotizacion_id, estado="en_proceso"))
+        db.session.commit()
+        return None
+    except IntegrityError:
+        db.session.rollback()
+    # falló, o quedó "en_proceso" de un worker que murió: se retoma
+    retomada = db.session.execute(
+        sa.update(Cotizacion)
+        .where(Cotizacion.id == cotizacion_id, sa.or_(
+            Cotizacion.estado == "error",
+            sa.and_(Cotizacion.estado == "en_proceso",
+                    Cotizacion.updated_at < _hace(cfg["COTIZACION_TIMEOUT_S"])),
+        ))
+        .values(estado="en_proceso", updated_at=sa.func.now())
+    ).rowcount
+    db.session.commit()
+    return None if retomada else estado(cotizacion_id)
+
+
+def solicitar(app, cliente_id: int, origen: str, formato: str) -> tuple[str, str] | None:
+    """Devuelve (clave, estado) y encola la generación si hace falta."""
+    cfg = app.config
+    clave = huella(cliente_id, origen, formato, cfg)
+    if clave is None:
+        return None
+    cid = f"{clave}.{formato}"
+    if estado(cid) == "listo":  # el caso común: una lectura por PK
+        metrics.cache("cotizaciones", True)
+        return clave, "listo"
+    metrics.cache("cotizaciones", False)
+    actual = _reclamar(cfg, cid)
+    if actual is not None:
+        return clave, actual
+    _pool(cfg).submit(_generar, app, cid, cliente_id, origen, formato)
+    return clave, "en_proceso"
+
+
+def purgar(cfg, horas: float) -> int:
+    """
+    Borra las cotizaciones sin tocar hace más de `horas`: primero los
+    archivos de Storage y después las filas (si Storage falla, las filas
+    quedan para el próximo intento). Nunca antes de `COTIZACION_TIMEOUT_S`,
+    para no pisar una generación en curso.
+    """
+    limite = _hace(max(float(horas) * 3600, cfg["COTIZACION_TIMEOUT_S"]))
+    n = 0
+    while True:
+        filas = db.session.execute(
+            sa.select(Cotizacion.id, Cotizacion.archivo_key)
+            .where(Cotizacion.updated_at < limite)
+            .limit(LOTE)
+        ).all()
+        if not filas:
+            return n
+        claves = [k for _, k in filas if k]
+        db.session.rollback()  # no retener la conexión durante la llamada a Storage
+        if claves:
+            _borrar(cfg, claves)
+        db.session.execute(sa.delete(Cotizacion).where(Cotizacion.id.in_([i for i, _ in filas])))
+        db.session.commit()
+        n += len(filas)
+
+
+def _generar(app, cotizacion_id, cliente_id, origen, formato):
+    fd, tmp = tempfile.mkstemp(suffix=f".{formato}")
+    os.close(fd)
+    with app.app_context():
+        try:
+            _escribir(app.config, tmp, cliente_id, origen, formato)
+            db.session.rollback()  # no retener la conexión durante la subida
+            key = PREFIJO + cotizacion_id
+            _subir(app.config, key, tmp, FORMATOS[formato])
+            valores = {"estado": "listo", "archivo_key": key}
+        except Exception:
+            log.exception("cotización %s falló", cotizacion_id)
+            db.session.rollback()
+            valores = {"estado": "error"}
+        finally:
+            os.remove(tmp)
+        db.session.execute(
+            sa.update(Cotizacion).where(Cotizacion.id == cotizacion_id)
+            .values(updated_at=sa.func.now(), **valores)
+        )
+        db.session.commit()
+        db.session.remove()
+
+
+# -------------------------
+# SUPABASE STORAGE
+# -------------------------
+def _supabase(cfg) -> tuple[str, dict]:
+    supa_url = cfg["SUPABASE_URL"].rstrip("/")
+    key = cfg["SUPABASE_SERVICE_ROLE_KEY"]
+    if not supa_url or not key:
+        raise RuntimeError("SUPABASE_URL o SERVICE_ROLE_KEY no configurados")
+    return supa_url, {"Authorization": f"Bearer {key}", "apikey": key}
+
+
+def _subir(cfg, key: str, path: str, mimetype: str):
+    import requests
+
+    supa_url, headers = _supabase(cfg)
+    with open(path, "rb") as fh, metrics.supabase("upload") as m:
+        r = requests.post(
+            f"{supa_url}/storage/v1/object/{cfg['SUPABASE_BUCKET']}/{key}",
+            headers={**headers, "x-upsert": "true", "Content-Type": mimetype},
+            data=fh,
+            timeout=120,
+        )
+        m["status"] = r.status_code
+    if r.status_code >= 400:
+        raise RuntimeError(f"supabase error: {r.text[:200]}")
+
+
+def _borrar(cfg, keys: list[str]):
+    import requests
+
+    supa_url, headers = _supabase(cfg)
+    with metrics.supabase("delete") as m:
+        r = requests.delete(
+            f"{supa_url}/storage/v1/object/{cfg['SUPABASE_BUCKET']}",
+            headers=headers,
+            json={"prefixes": keys},
+            timeout=30,
+        )
+        m["status"] = r.status_code
+    if r.status_code >= 400:
+        raise RuntimeError(f"supabase error: {r.text[:200]}")
+
+
+def url_archivo(cfg, cotizacion_id: str) -> str | None:
+    """URL firmada (URL_TTL_S) para descargar el archivo; None si no está lista."""
+    key = db.session.scalar(
+        sa.select(Cotizacion.archivo_key)
+        .where(Cotizacion.id == cotizacion_id, Cotizacion.estado == "listo")
+    )
+    if key is None:
+        return None
+    return _firmar_archivo(cfg, key, f"cotizacion.{cotizacion_id.rsplit('.', 1)[1]}")
+
+
+def _firmar_archivo(cfg, key: str, nombre: str) -> str:
+    import requests
+
+    supa_url, headers = _supabase(cfg)
+    with metrics.supabase("sign") as m:
+        r = requests.post(
+            f"{supa_url}/storage/v1/object/sign/{cfg['SUPABASE_BUCKET']}/{key}",
+            headers=headers,
+            json={"expiresIn": URL_TTL_S},
+            timeout=10,
+        )
+        m["status"] = r.status_code
+    if r.status_code >= 400:
+        raise RuntimeError(f"supabase error: {r.text[:200]}")
+    return f"{supa_url}/storage/v1{r.json()['signedURL']}&download={nombre}"
+
+
+def _filas(cfg, cliente_id, origen):
+    """(version, producto, url_imagen) en streaming, con imágenes firmadas por lote."""
+    V, P = CatalogoSesionVersion, Producto
+    stmt = _versiones(cliente_id, origen).add_columns(P) \
+        .join(P, P.id == V.producto_id) \
+        .order_by(P.nombre, V.id) \
+        .execution_options(yield_per=LOTE)
+    for parte in db.session.execute(stmt).partitions():
+        materializar([v for v, _ in parte])
+        claves = sorted({p.imagen_key for _, p in parte if p.imagen_key})
+        urls = _firmar(cfg, claves)
+        for v, p in parte:
+            yield v, p, urls.get(p.imagen_key)
+
+
+def _firmar(cfg, claves) -> dict:
+    """Firma varias imágenes en una llamada a Supabase Storage; sin Supabase, {}."""
+    if not claves or not cfg.get("SUPABASE_URL"):
+        return {}
+    supa_url = cfg["SUPABASE_URL"].rstrip("/")
+    if cfg.get("COTIZACION_IMAGEN_PUBLICA"):
+        return {k: f"{supa_url}/storage/v1/object/public/{cfg['SUPABASE_BUCKET']}/{k}" for k in claves}
+    import requests
+
+    key = cfg["SUPABASE_SERVICE_ROLE_KEY"]
+    with metrics.supabase("sign_lote") as m:
+        r = requests.post(
+            f"{supa_url}/storage/v1/object/sign/{cfg['SUPABASE_BUCKET']}",
+            headers={"Authorization": f"Bearer {key}", "apikey": key},
+            json={"expiresIn": int(cfg["COTIZACION_IMAGEN_TTL_S"]), "paths": claves},
+            timeout=10,
+        )
+        m["status"] = r.status_code
+    if r.status_code >= 400:
+        log.warning("no se pudieron firmar imágenes: %s", r.text[:200])
+        return {}
+    return {
+        d["path"]: f"{supa_url}/storage/v1{d['signedURL']}"
+        for d in r.json() if d.get("signedURL")
+    }
+
+
+def _escribir(cfg, path, cliente_id, origen, formato):
+    cliente = db.session.get(Cliente, cliente_id)
+    encabezado = [n for n, _ in COLUMNAS] + ["Imagen"]
+    idx_tot = [i for i, (n, _) in enumerate(COLUMNAS) if n in TOTALES]
+    totales = {i: 0 for i in idx_tot}
+
+    def filas():
+        for v, p, url in _filas(cfg, cliente_id, origen):
+            valores = [fn(v, p) for _, fn in COLUMNAS]
+            for i in idx_tot:
+                totales[i] += valores[i] or 0
+            yield valores + [url]
+
+    def fila_totales():
+        return ["TOTAL"] + [totales.get(i) for i in range(1, len(COLUMNAS))] + [None]
+
+    titulo = f"Cotización {cliente.nombre} ({'final' if origen == 'final' else 'vigente'})"
+    if formato == "xlsx":
+        with EscritorXlsx(path, "Cotización") as x:
+            x.fila([titulo], negrita=True)
+            x.fila(encabezado, negrita=True)
+            for f in filas():
+                x.fila(f)
+            x.fila(fila_totales(), negrita=True)
+    else:
+        with open(path, "w", newline="", encoding="utf-8-sig") as fh:
+            w = csv.writer(fh)
+            w.writerow(encabezado)
+            for f in filas():
+                w.writerow(f)
+            w.writerow(fila_totales())
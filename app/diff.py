@@ -0,0 +1,73 @@
+# app/diff.py
+"""
+Diferencias campo a campo entre versiones (snapshot + calculados).
+"""
+from decimal import Decimal
+
+from .serializers import VERSION
+
+# Lo que se compara: estado/flags, snapshot y columnas calculadas.
+CAMPOS_DIFF = (
+    "estado", "is_current", "is_final",
+    "um", "doc_x_bulto_caja", "doc_x_paq", "precio_exw", "porc_desc",
+    "cant_bultos", "peso_gr", "largo_cm", "ancho_cm", "alto_cm",
+    "familia", "foto_key", "observaciones",
+    "precio_x_docena", "precio_unidad_exw", "subtotal_exw",
+    "volumen_paquete_cbm", "cbm_total", "cantidad_por_paquete",
+    "cantidad_unidades", "peso_neto_kg", "peso_bruto_kg",
+)
+
+# Columnas que hay que cargar para poder comparar
+CAMPOS_CARGA = ("id", "sesion_id", "version_num") + CAMPOS_DIFF
+
+
+def _es_num(x) -> bool:
+    return isinstance(x, (int, float, Decimal)) and not isinstance(x, bool)
+
+
+def _delta(va, vb):
+    # float recién asignado vs Decimal leído de la BD
+    if isinstance(va, float) != isinstance(vb, float):
+        va, vb = Decimal(str(va)), Decimal(str(vb))
+    return vb - va
+
+
+def diff_dicts(a: dict, b: dict) -> dict:
+    """
+    {campo: {"de": a, "a": b[, "delta": b - a]}} solo para los campos que cambian.
+    """
+    cambios = {}
+    for f in CAMPOS_DIFF:
+        va, vb = a.get(f), b.get(f)
+        if va == vb:
+            continue
+        c = {"de": va, "a": vb}
+        if _es_num(va) and _es_num(vb):
+            c["delta"] = _delta(va, vb)
+        cambios[f] = c
+    return cambios
+
+
+def diff_versiones(a, b) -> dict:
+    da = VERSION.dump(a, CAMPOS_DIFF)
+    db_ = VERSION.dump(b, CAMPOS_DIFF)
+    return diff_dicts(da, db_)
+
+
+def timeline(versiones: list) -> list[dict]:
+    """
+    Pasos consecutivos (ordenados por version_num) con solo lo que cambió.
+    """
+    pasos = []
+    previa = None
+    for v in versiones:
+        actual = VERSION.dump(v, CAMPOS_DIFF)
+        if previa is not None:
+            pasos.append({
+                "desde_id": previa[0],
+                "hasta_id": v.id,
+                "version_num": v.version_num,
+                "cambios": diff_dicts(previa[1], actual),
+            })
+        previa = (v.id, actual)
+    return pasos
@@ -0,0 +1,145 @@
+# app/eventos.py
+"""
+Eventos en vivo por catálogo y por cliente (Server-Sent Events).
+
+- Origen: triggers de PostgreSQL (app/models.py) hacen `pg_notify` en
+  `eventos_catalogo` al commitear cambios de estado, versiones nuevas, cambio
+  de vigente y de final. Así llegan a todos los workers y dynos, vengan de la
+  API, de un UPDATE masivo o de un script.
+- Por proceso hay UN hilo con una conexión dedicada en `LISTEN` (se abre con
+  el primer suscriptor) que reparte cada aviso a las colas de los suscriptores
+  de ese catálogo / cliente.
+- Cada suscriptor es un generador que espera en su cola. El proceso `web`
+  del Procfile corre gunicorn con workers gevent: un stream cuesta una
+  greenlet. Con workers de hilos (gthread, sync) cada stream tomaría un hilo
+  durante `SSE_MAX_S`; ahí la vista responde 503 (`worker_asincrono`).
+"""
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+
+from .models import CANAL_EVENTOS
+
+log = logging.getLogger(__name__)
+
+
+class Suscripcion:
+    __slots__ = ("claves", "cola", "perdidos")
+
+    def __init__(self, claves, maximo: int):
+        self.claves = claves
+        self.cola = queue.Queue(maxsize=maximo)
+        self.perdidos = False
+
+
+class Hub:
+    def __init__(self):
+        self._subs: dict[tuple, set[Suscripcion]] = {}
+        self._lock = threading.Lock()
+        self._hilo: threading.Thread | None = None
+        self._dsn: str | None = None
+
+    # --- suscriptores ---
+    def suscribir(self, claves: list[tuple], maximo: int = 100) -> Suscripcion:
+        s = Suscripcion(tuple(claves), maximo)
+        with self._lock:
+            for k in s.claves:
+                self._subs.setdefault(k, set()).add(s)
+        return s
+
+    def desuscribir(self, s: Suscripcion):
+        with self._lock:
+            for k in s.claves:
+                grupo = self._subs.get(k)
+                if grupo is not None:
+                    grupo.discard(s)
+                    if not grupo:
+                        del self._subs[k]
+
+    def suscriptores(self) -> int:
+        with self._lock:
+            return len({s for g in self._subs.values() for s in g})
+
+    # --- reparto ---
+    def despachar(self, evento: dict):
+        claves = [("catalogo", evento.get("catalogo_id")), ("cliente", evento.get("cliente_id"))]
+        with self._lock:
+            destino = set()
+            for k in claves:
+                destino |= self._subs.get(k, set())
+        for s in destino:
+            try:
+                s.cola.put_nowait(evento)
+            except queue.Full:
+                # cliente lento: se le avisa que recargue en vez de crecer sin límite
+                s.perdidos = True
+
+    # --- LISTEN ---
+    def iniciar(self, dsn: str):
+        """Arranca el hilo LISTEN (una vez por proceso)."""
+        with self._lock:
+            if self._hilo is not None and self._hilo.is_alive():
+                return
+            self._dsn = dsn
+            self._hilo = threading.Thread(target=self._escuchar, name="eventos-listen", daemon=True)
+            self._hilo.start()
+
+    def _escuchar(self):
+        import psycopg
+
+        espera = 1.0
+        while True:
+            try:
+                with psycopg.connect(self._dsn, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {CANAL_EVENTOS}")
+                    espera = 1.0
+                    for n in conn.notifies():
+                        try:
+                            self.despachar(json.loads(n.payload))
+                        except ValueError:
+                            log.warning("evento no JSON: %r", n.payload[:200])
+            except Exception:
+                log.exception("LISTEN %s caído; reintento en %.0fs", CANAL_EVENTOS, espera)
+                time.sleep(espera)
+                espera = min(espera * 2, 30.0)
+
+
+hub = Hub()
+
+
+def worker_asincrono() -> bool:
+    """True si gevent parcheó la stdlib (worker gevent de gunicorn)."""
+    m = sys.modules.get("gevent.monkey")  # sin importarlo si nadie lo hizo
+    return bool(m and m.is_module_patched("socket"))
+
+
+def dsn_de(engine) -> str | None:
+    if engine.dialect.name != "postgresql":
+        return None
+    return engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+def stream(s: Suscripcion, latido_s: float, max_s: float):
+    """
+    Generador SSE. Manda un comentario cada `latido_s` (mantiene vivos
+    proxies y el router de Heroku) y cierra a los `max_s`: EventSource
+    reconecta solo (`retry`), y así ninguna conexión vive para siempre.
+    """
+    fin = time.monotonic() + max_s
+    try:
+        yield "retry: 3000\n\n"
+        while time.monotonic() < fin:
+            if s.perdidos:
+                s.perdidos = False
+                yield "event: reset\ndata: {}\n\n"
+            try:
+                ev = s.cola.get(timeout=latido_s)
+            except queue.Empty:
+                yield ": ping\n\n"
+                continue
+            yield f"event: {ev.get('tipo', 'mensaje')}\ndata: {json.dumps(ev, separators=(',', ':'))}\n\n"
+    finally:
+        hub.desuscribir(s)
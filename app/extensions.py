@@ -2,12 +2,31 @@
 from flask_migrate import Migrate
 from .models import db
 from flask_cors import CORS
+from .instrumentacion import instrumentacion
+from . import metrics
+from .limites import limitador
 
 migrate = Migrate()
 
+def _opciones_pool(app):
+    """Tamaño del pool desde la config (SQLite usa el suyo)."""
+    cfg = app.config
+    if not (cfg.get("SQLALCHEMY_DATABASE_URI") or "").startswith("postgresql"):
+        return
+    opts = dict(cfg.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    opts.setdefault("pool_size", cfg["DB_POOL_SIZE"])
+    opts.setdefault("max_overflow", cfg["DB_MAX_OVERFLOW"])
+    opts.setdefault("pool_timeout", cfg["DB_POOL_TIMEOUT_S"])
+    cfg["SQLALCHEMY_ENGINE_OPTIONS"] = opts
+
 def register_extensions(app):
+    _opciones_pool(app)
+    metrics.preparar_config(app)  # pool instrumentado: antes de crear el engine
     db.init_app(app)
     migrate.init_app(app, db)
+    instrumentacion.init_app(app)
+    metrics.init_app(app, db)
+    limitador.init_app(app)  # después de métricas: los 429/503 también se miden
     CORS(
         app,
         resources={r"/api/*": {"origins": "*"}},
@@ -0,0 +1,143 @@
+# app/idempotencia.py
+"""
+`Idempotency-Key` para los POST que crean o transicionan (crear_catalogo,
+crear_version, aprobar).
+
+Con el header, el primer request reclama (usuario, clave) insertando una fila
+"en curso" en `idempotencia` y la confirma antes de ejecutar la vista; al
+terminar guarda la respuesta 2xx (comprimida). Un reintento con la misma
+clave:
+
+- con la respuesta ya guardada: la devuelve tal cual (`Idempotent-Replayed:
+  true`) con una lectura por PK, sin ejecutar la vista ni tomar locks;
+- mientras el primero sigue en curso: 409 + Retry-After;
+- con otro método, ruta o cuerpo: 422.
+
+Las respuestas no 2xx no se guardan (se libera la clave): reintentar vuelve
+a ejecutar, y un 409/503 transitorio puede salir bien la segunda vez. Una
+fila "en curso" nunca se retoma: si el worker murió no se sabe si la vista
+llegó a commitear, y re-ejecutarla podría duplicar el efecto. Sigue en 409
+hasta que la clave caduca a las `IDEMPOTENCIA_TTL_H` horas (`flask
+purge-idempotencia` las borra); el cliente puede consultar el recurso.
+
+Orden de decoradores: @require_auth, @idempotente, @reintentar.
+"""
+import hashlib
+import zlib
+from functools import wraps
+
+import sqlalchemy as sa
+from flask import current_app, jsonify, request
+from sqlalchemy.exc import IntegrityError
+
+from .models import db, Idempotencia
+
+HEADER = "Idempotency-Key"
+CLAVE_MAX = 255
+
+
+def _hace(segundos: float):
+    if db.engine.dialect.name == "postgresql":
+        return sa.func.now() - sa.text(f"interval '{int(segundos)} seconds'")
+    return sa.func.datetime("now", f"-{int(segundos)} seconds")
+
+
+def _huella() -> bytes:
+    h = hashlib.sha256()
+    h.update(f"{request.method} {request.path}\0".encode())
+    h.update(request.get_data(cache=True))
+    return h.digest()
+
+
+def _pk(usuario_id: int, clave: str):
+    return sa.and_(Idempotencia.usuario_id == usuario_id, Idempotencia.clave == clave)
+
+
+def _reclamar(usuario_id: int, clave: str, huella: bytes):
+    """None si el request quedó reclamado; si no, la respuesta a devolver."""
+    try:
+        db.session.execute(sa.insert(Idempotencia).values(usuario_id=usuario_id, clave=clave, huella=huella))
+        db.session.commit()
+        return None
+    except IntegrityError:
+        db.session.rollback()
+
+    # Clave vencida (aunque no se haya purgado todavía): cuenta como nueva
+    retomada = db.session.execute(
+        sa.update(Idempotencia)
+        .where(_pk(usuario_id, clave),
+               Idempotencia.created_at < _hace(current_app.config["IDEMPOTENCIA_TTL_H"] * 3600))
+        .values(huella=huella, status=None, cuerpo=None, created_at=sa.func.now())
+    ).rowcount
+    db.session.commit()
+    if retomada:
+        return None
+
+    fila = db.session.execute(
+        sa.select(Idempotencia.huella, Idempotencia.status, Idempotencia.cuerpo)
+        .where(_pk(usuario_id, clave))
+    ).first()
+    db.session.rollback()
+    if fila is None:  # purgada entre medio
+        return _reclamar(usuario_id, clave, huella)
+    if fila.huella != huella:
+        return jsonify({"error": f"{HEADER} ya usada con otro request"}), 422
+    if fila.status is None:
+        r = jsonify({"error": "un request con esta Idempotency-Key sigue en curso"})
+        r.status_code = 409
+        r.headers["Retry-After"] = "1"
+        return r
+    r = current_app.response_class(zlib.decompress(fila.cuerpo), status=fila.status,
+                                   mimetype="application/json")
+    r.headers["Idempotent-Replayed"] = "true"
+    return r
+
+
+def _liberar(usuario_id: int, clave: str):
+    db.session.rollback()
+    db.session.execute(sa.delete(Idempotencia).where(_pk(usuario_id, clave)))
+    db.session.commit()
+
+
+def idempotente(fn):
+    @wraps(fn)
+    def _w(*args, **kwargs):
+        clave = request.headers.get(HEADER)
+        if clave is None:
+            return fn(*args, **kwargs)
+        clave = clave.strip()
+        if not clave or len(clave) > CLAVE_MAX:
+            return jsonify({"error": f"{HEADER} inválida (1 a {CLAVE_MAX} caracteres)"}), 400
+        usuario_id = int(request.user["sub"])
+
+        previa = _reclamar(usuario_id, clave, _huella())
+        if previa is not None:
+            return previa
+
+        try:
+            resp = current_app.make_response(fn(*args, **kwargs))
+        except Exception:
+            _liberar(usuario_id, clave)
+            raise
+
+        if not 200 <= resp.status_code < 300:
+            _liberar(usuario_id, clave)
+            return resp
+        # Termina la transacción de la vista (si dejó una abierta) y guarda
+        db.session.commit()
+        db.session.execute(
+            sa.update(Idempotencia)
+            .where(_pk(usuario_id, clave))
+            .values(status=resp.status_code, cuerpo=zlib.compress(resp.get_data()))
+        )
+        db.session.commit()
+        return resp
+    return _w
+
+
+def purgar(horas: int) -> int:
+    n = db.session.execute(
+        sa.delete(Idempotencia).where(Idempotencia.created_at < _hace(int(horas) * 3600))
+    ).rowcount
+    db.session.commit()
+    return n or 0
@@ -0,0 +1,144 @@
+# app/instrumentacion.py
+"""
+Instrumentación de BD por request (extensión Flask sobre eventos de Engine).
+
+- Cuenta consultas y tiempo de BD de cada request y lo emite en la cabecera
+  `Server-Timing` (`db;dur=..;desc="N consultas"`, `app;dur=..`).
+- Loguea los requests que superan `SLOW_REQUEST_MS` o `SLOW_REQUEST_QUERIES`.
+- Con `DB_DETECT_N1` (dev/test) avisa de sentencias idénticas repetidas
+  `DB_N1_THRESHOLD` veces o más en un mismo request: candidato a N+1.
+- `contar_consultas()`: contexto para tests (ver fixture `max_queries`).
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+log = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class _Stats:
+    __slots__ = ("n", "t", "sentencias")
+
+    def __init__(self):
+        self.n = 0
+        self.t = 0.0
+        self.sentencias = Counter()
+
+    def registrar(self, sql: str, dur: float):
+        self.n += 1
+        self.t += dur
+        self.sentencias[sql] += 1
+
+
+def _activos() -> list:
+    stats = list(getattr(_local, "contadores", ()))
+    if has_request_context():
+        s = g.get("_db_stats")
+        if s is not None:
+            stats.append(s)
+    return stats
+
+
+def _antes(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_t_consulta", []).append(time.perf_counter())
+
+
+def _despues(conn, cursor, statement, parameters, context, executemany):
+    pila = conn.info.get("_t_consulta")
+    if not pila:
+        return
+    dur = time.perf_counter() - pila.pop()
+    for s in _activos():
+        s.registrar(statement, dur)
+
+
+def _error(ctx):
+    # Una sentencia que falla no llega a after_cursor_execute: sin esto su
+    # inicio quedaría en la pila de la conexión (que vuelve al pool) y la
+    # siguiente consulta mediría desde ahí. No se cuenta como consulta.
+    if ctx.connection is not None and ctx.statement is not None:
+        pila = ctx.connection.info.get("_t_consulta")
+        if pila:
+            pila.pop()
+
+
+_escuchando = False
+
+
+def _escuchar():
+    # Una sola vez por proceso, a nivel de clase: cubre engines creados después
+    global _escuchando
+    if not _escuchando:
+        event.listen(Engine, "before_cursor_execute", _antes)
+        event.listen(Engine, "after_cursor_execute", _despues)
+        event.listen(Engine, "handle_error", _error)
+        _escuchando = True
+
+
+@contextmanager
+def contar_consultas():
+    """Cuenta las consultas del hilo actual dentro del bloque."""
+    _escuchar()
+    s = _Stats()
+    pila = _local.__dict__.setdefault("contadores", [])
+    pila.append(s)
+    try:
+        yield s
+    finally:
+        pila.remove(s)
+
+
+class DBInstrumentacion:
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        _escuchar()
+        app.before_request(self._inicio)
+        app.after_request(self._fin)
+
+    @staticmethod
+    def _inicio():
+        g._db_stats = _Stats()
+        g._t_inicio = time.perf_counter()
+
+    @staticmethod
+    def _fin(resp):
+        s = g.pop("_db_stats", None)
+        t0 = g.pop("_t_inicio", None)
+        if s is None or t0 is None:
+            return resp
+        cfg = current_app.config
+        total_ms = (time.perf_counter() - t0) * 1000
+        db_ms = s.t * 1000
+
+        if cfg.get("SERVER_TIMING"):
+            resp.headers.add(
+                "Server-Timing",
+                f'db;dur={db_ms:.1f};desc="{s.n} consultas", app;dur={total_ms:.1f}',
+            )
+
+        if total_ms >= cfg["SLOW_REQUEST_MS"] or s.n >= cfg["SLOW_REQUEST_QUERIES"]:
+            log.warning("request lento: %s %s -> %s en %.0f ms (%d consultas, %.0f ms en BD)",
+                        request.method, request.path, resp.status_code, total_ms, s.n, db_ms)
+
+        if cfg.get("DB_DETECT_N1"):
+            umbral = cfg["DB_N1_THRESHOLD"]
+            for sql, veces in s.sentencias.most_common():
+                if veces < umbral:
+                    break
+                log.warning("posible N+1 en %s %s: %d veces\n%s",
+                            request.method, request.path, veces, sql)
+        return resp
+
+
+instrumentacion = DBInstrumentacion()
@@ -0,0 +1,83 @@
+# app/json_provider.py
+"""
+Proveedor JSON de Flask basado en orjson (con fallback a la stdlib).
+
+Los `Decimal` (columnas NUMERIC) se emiten como número JSON con el texto
+exacto de la BD (p. ej. `12.3400`), sin pasar por `float`. Eso requiere
+`orjson.Fragment` (orjson >= 3.9); sin él se degrada a `float`, que es lo
+que hacía la API antes.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
+
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+_Fragment = getattr(orjson, "Fragment", None)
+
+
+def _decimal(d: Decimal):
+    if not d.is_finite():
+        return None
+    if _Fragment is not None:
+        return _Fragment(str(d))
+    return float(d)
+
+
+def _default(o):
+    if isinstance(o, Decimal):
+        return _decimal(o)
+    if isinstance(o, (datetime, date)):
+        return o.isoformat()
+    if isinstance(o, UUID):
+        return str(o)
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def _default_std(o):
+    # json stdlib no admite fragmentos crudos: Decimal -> float
+    if isinstance(o, Decimal):
+        return float(o) if o.is_finite() else None
+    return _default(o)
+
+
+def dumps_bytes(obj, sort_keys: bool = False, indent: bool = False) -> bytes:
+    if orjson is not None:
+        opts = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            opts |= orjson.OPT_SORT_KEYS
+        if indent:
+            opts |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=opts)
+    s = json.dumps(obj, default=_default_std, sort_keys=sort_keys,
+                   indent=2 if indent else None,
+                   separators=None if indent else (",", ":"))
+    return s.encode("utf-8")
+
+
+class FastJSONProvider(JSONProvider):
+    sort_keys = False
+    compact: bool | None = None
+    mimetype = "application/json"
+
+    def dumps(self, obj, **kwargs) -> str:
+        return dumps_bytes(obj, sort_keys=kwargs.get("sort_keys", self.sort_keys)).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = dumps_bytes(obj, sort_keys=self.sort_keys, indent=indent)
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
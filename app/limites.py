@@ -0,0 +1,247 @@
+# app/limites.py
+"""
+Límite de tasa por usuario y control de admisión global.
+
+- Token bucket por (presupuesto, clave). La clave es el `sub` del JWT del
+  header Authorization o, sin token válido, la IP del cliente. Hay tres
+  presupuestos: `auth` (blueprint /api/auth, siempre por IP: protege el
+  argon2 de login/register), `lectura` (GET/HEAD) y `escritura` (el resto).
+  Se configuran como "N/S": ráfaga de N requests, recarga de N cada S
+  segundos. Excedido -> 429 + Retry-After.
+- Backends: `Memoria` (por proceso, sin dependencias) y `Redis` (compartido
+  entre workers y dynos, un script Lua atómico). Si Redis no está instalado
+  o no responde se usa un `Memoria` local en su lugar: el límite pasa a ser
+  por proceso, pero no se corta el servicio.
+- Admisión: antes de tocar la BD se rechaza con 503 + Retry-After si el
+  proceso ya tiene `ADMISION_MAX_EN_CURSO` requests en curso, o si el
+  request esperó en cola (router + gunicorn) más de `ADMISION_MAX_COLA_MS`
+  según `X-Request-Start`. Con workers gevent no hay tope de hilos: cada
+  worker acepta hasta `--worker-connections` greenlets, que sin este tope
+  harían cola en el pool de la BD hasta fallar por `pool_timeout`. Por eso
+  el tope por defecto es el tamaño del pool (`DB_POOL_SIZE` +
+  `DB_MAX_OVERFLOW`): lo que no tendría conexión se rechaza barato.
+"""
+import logging
+import math
+import threading
+import time
+
+from flask import current_app, g, jsonify, request
+
+from . import metrics
+from .security import decode_access_token
+
+try:
+    import redis as redis_lib
+except ImportError:  # pragma: no cover - dependencia opcional
+    redis_lib = None
+
+log = logging.getLogger(__name__)
+
+PRESUPUESTOS = ("auth", "lectura", "escritura")
+_EXENTOS = {"metrics", "static"}
+
+
+def cuota(texto: str) -> tuple[float, float]:
+    """"10/60" -> (capacidad 10, recarga 10/60 tokens por segundo)."""
+    n, _, s = str(texto).partition("/")
+    capacidad = float(n)
+    return capacidad, capacidad / float(s or 1)
+
+
+# -------------------------
+# BACKENDS
+# -------------------------
+class Memoria:
+    """Buckets en un dict del proceso. Se poda cuando supera `max_claves`."""
+
+    def __init__(self, max_claves: int = 100_000):
+        self._buckets: dict[str, list[float]] = {}
+        self._lock = threading.Lock()
+        self.max_claves = max_claves
+
+    def tomar(self, clave: str, capacidad: float, tasa: float) -> float:
+        """Consume un token. Devuelve 0 si pasó, o los segundos hasta el próximo."""
+        ahora = time.monotonic()
+        with self._lock:
+            b = self._buckets.get(clave)
+            if b is None:
+                if len(self._buckets) >= self.max_claves:
+                    self._podar(ahora)
+                b = self._buckets[clave] = [capacidad, ahora]
+            tokens = min(capacidad, b[0] + (ahora - b[1]) * tasa)
+            b[1] = ahora
+            if tokens >= 1:
+                b[0] = tokens - 1
+                return 0.0
+            b[0] = tokens
+            return (1 - tokens) / tasa
+
+    def _podar(self, ahora: float):
+        # Un bucket quieto más de una hora está lleno: olvidarlo no cambia nada
+        viejos = [k for k, (_, t) in self._buckets.items() if ahora - t > 3600]
+        for k in viejos or list(self._buckets)[: len(self._buckets) // 2]:
+            del self._buckets[k]
+
+
+# KEYS[1] = bucket; ARGV = capacidad, tasa. Reloj del servidor Redis (TIME)
+# para que dynos con relojes distintos compartan el mismo bucket.
+_LUA = """
+local cap = tonumber(ARGV[1])
+local tasa = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local ahora = tonumber(t[1]) + tonumber(t[2]) / 1e6
+local b = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(b[1]) or cap
+local ts = tonumber(b[2]) or ahora
+tokens = math.min(cap, tokens + math.max(0, ahora - ts) * tasa)
+local espera = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  espera = (1 - tokens) / tasa
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', ahora)
+redis.call('EXPIRE', KEYS[1], math.ceil(cap / tasa) + 1)
+return tostring(espera)
+"""
+
+
+class Redis:
+    """Buckets compartidos en Redis; ante errores delega en `respaldo`."""
+
+    def __init__(self, url: str, respaldo: Memoria | None = None, prefijo: str = "rl:"):
+        self.respaldo = respaldo or Memoria()
+        self.prefijo = prefijo
+        self._r = redis_lib.Redis.from_url(url, socket_timeout=0.05, socket_connect_timeout=0.05)
+        self._script = self._r.register_script(_LUA)
+        self._caido_hasta = 0.0
+
+    def tomar(self, clave: str, capacidad: float, tasa: float) -> float:
+        if time.monotonic() < self._caido_hasta:
+            return self.respaldo.tomar(clave, capacidad, tasa)
+        try:
+            return float(self._script(keys=[self.prefijo + clave], args=[capacidad, tasa]))
+        except redis_lib.RedisError as e:
+            # No reintentar en cada request mientras Redis no responde
+            log.warning("rate limit: Redis no disponible (%s); límite local por 30 s", e)
+            self._caido_hasta = time.monotonic() + 30
+            return self.respaldo.tomar(clave, capacidad, tasa)
+
+
+def crear_backend(cfg):
+    url = cfg.get("RATELIMIT_REDIS_URL")
+    if not url:
+        return Memoria()
+    if redis_lib is None:
+        log.warning("RATELIMIT_REDIS_URL definido pero `redis` no está instalado; límite por proceso")
+        return Memoria()
+    return Redis(url)
+
+
+# -------------------------
+# EXTENSIÓN
+# -------------------------
+def _ip() -> str:
+    # Heroku agrega la IP real al final de X-Forwarded-For; lo anterior lo
+    # controla el cliente. RATELIMIT_PROXIES = saltos de proxy confiables.
+    saltos = current_app.config.get("RATELIMIT_PROXIES", 0)
+    ruta = request.access_route if saltos else []
+    if len(ruta) >= saltos > 0:
+        return ruta[-saltos]
+    return request.remote_addr or "?"
+
+
+def _sub() -> str | None:
+    auth = request.headers.get("Authorization", "")
+    if not auth.startswith("Bearer "):
+        return None
+    try:
+        return str(decode_access_token(auth.split()[1])["sub"])
+    except Exception:
+        return None
+
+
+def _clasificar() -> tuple[str, str]:
+    if request.blueprint == "api.auth":
+        return "auth", "ip:" + _ip()
+    presupuesto = "lectura" if request.method in ("GET", "HEAD") else "escritura"
+    sub = _sub()
+    return presupuesto, f"u:{sub}" if sub else "ip:" + _ip()
+
+
+def _rechazo(status: int, error: str, espera: float):
+    r = jsonify({"error": error})
+    r.status_code = status
+    r.headers["Retry-After"] = str(max(1, math.ceil(espera)))
+    return r
+
+
+def _espera_en_cola_ms() -> float | None:
+    # X-Request-Start: ms desde epoch (Heroku) o "t=<µs>" (nginx)
+    v = request.headers.get("X-Request-Start", "")
+    if v.startswith("t="):
+        v = v[2:]
+    try:
+        t = float(v)
+    except ValueError:
+        return None
+    if t > 1e14:  # microsegundos
+        t /= 1000
+    return time.time() * 1000 - t
+
+
+class Limitador:
+    def __init__(self, app=None):
+        self._en_curso = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions["limites"] = crear_backend(app.config)
+        app.before_request(self._antes)
+        app.teardown_request(self._despues)
+
+    @property
+    def en_curso(self) -> int:
+        return self._en_curso
+
+    def _antes(self):
+        if request.method == "OPTIONS" or request.endpoint in _EXENTOS:
+            return None
+        cfg = current_app.config
+
+        max_cola = cfg.get("ADMISION_MAX_COLA_MS") or 0
+        if max_cola:
+            espera = _espera_en_cola_ms()
+            if espera is not None and espera > max_cola:
+                metrics.RECHAZOS.labels("cola").inc()
+                return _rechazo(503, "servidor saturado, reintente", cfg["ADMISION_RETRY_AFTER_S"])
+
+        # Los streams SSE viven minutos: no cuentan como trabajo en curso
+        if request.blueprint != "api.eventos":
+            tope = cfg.get("ADMISION_MAX_EN_CURSO") or 0
+            with self._lock:
+                if tope and self._en_curso >= tope:
+                    metrics.RECHAZOS.labels("en_curso").inc()
+                    return _rechazo(503, "servidor saturado, reintente", cfg["ADMISION_RETRY_AFTER_S"])
+                self._en_curso += 1
+                g._admitido = True
+
+        if cfg.get("RATELIMIT_ENABLED"):
+            presupuesto, clave = _clasificar()
+            capacidad, tasa = cuota(cfg[f"RATELIMIT_{presupuesto.upper()}"])
+            espera = current_app.extensions["limites"].tomar(f"{presupuesto}:{clave}", capacidad, tasa)
+            if espera > 0:
+                metrics.RECHAZOS.labels(presupuesto).inc()
+                return _rechazo(429, "demasiadas solicitudes", espera)
+        return None
+
+    def _despues(self, _exc=None):
+        if g.pop("_admitido", False):
+            with self._lock:
+                self._en_curso -= 1
+
+
+limitador = Limitador()
@@ -0,0 +1,175 @@
+# app/metrics.py
+"""
+Métricas Prometheus en `GET /metrics` (prometheus_client, opcional).
+
+Con gunicorn (varios workers) se usa el modo multiproceso: cada worker
+escribe en `PROMETHEUS_MULTIPROC_DIR` y `/metrics` agrega todos; ver
+gunicorn.conf.py. Sin prometheus_client instalado todo es no-op y
+`/metrics` responde 404; en producción también si falta `METRICS_TOKEN`.
+
+En el camino del request solo hay un `observe()` por request (y por checkout
+de conexión): escribir en un histograma es una suma sobre memoria compartida.
+"""
+import hmac
+import os
+import time
+from contextlib import contextmanager
+
+from flask import Response, abort, current_app, g, request
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+try:
+    import prometheus_client as prom
+    from prometheus_client import multiprocess
+except ImportError:  # pragma: no cover - dependencia opcional
+    prom = None
+
+
+class _Nada:
+    """Sustituto no-op de una métrica cuando prometheus_client no está."""
+    def labels(self, *a, **kw):
+        return self
+
+    def observe(self, *a):
+        pass
+
+    def inc(self, *a):
+        pass
+
+    def dec(self, *a):
+        pass
+
+
+def _histograma(nombre, doc, labels=(), buckets=None):
+    if prom is None:
+        return _Nada()
+    kw = {"buckets": buckets} if buckets else {}
+    return prom.Histogram(nombre, doc, labels, **kw)
+
+
+def _contador(nombre, doc, labels=()):
+    return prom.Counter(nombre, doc, labels) if prom else _Nada()
+
+
+def _gauge(nombre, doc, labels=()):
+    # livesum: suma de los workers vivos (un worker muerto no deja su valor)
+    return prom.Gauge(nombre, doc, labels, multiprocess_mode="livesum") if prom else _Nada()
+
+
+_RAPIDOS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5)
+
+HTTP_LATENCIA = _histograma(
+    "http_request_duration_seconds", "Latencia por endpoint",
+    ("blueprint", "endpoint", "method", "status"),
+    buckets=(.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10),
+)
+POOL_ESPERA = _histograma(
+    "db_pool_checkout_wait_seconds", "Espera por una conexión del pool", buckets=_RAPIDOS,
+)
+POOL_EN_USO = _gauge("db_pool_connections_in_use", "Conexiones del pool prestadas")
+CACHE = _contador("cache_requests_total", "Consultas a caches de la app", ("cache", "resultado"))
+ARGON2_EN_CURSO = _gauge("argon2_in_flight", "Hash/verify argon2 en curso (cola de CPU)")
+ARGON2_LATENCIA = _histograma(
+    "argon2_duration_seconds", "Duración de hash/verify argon2", ("op",),
+    buckets=(.01, .025, .05, .1, .25, .5, 1, 2.5),
+)
+SUPABASE_LATENCIA = _histograma(
+    "supabase_request_duration_seconds", "Llamadas a Supabase Storage", ("op", "status"),
+)
+DB_REINTENTOS = _contador(
+    "db_retries_total", "Reintentos por contención (app/retry.py)", ("operacion", "resultado"),
+)
+RECHAZOS = _contador(
+    "http_rejected_total", "Requests rechazados por límite o admisión (app/limites.py)", ("motivo",),
+)
+
+
+def cache(nombre: str, hit: bool):
+    CACHE.labels(nombre, "hit" if hit else "miss").inc()
+
+
+@contextmanager
+def argon2(op: str):
+    ARGON2_EN_CURSO.inc()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        ARGON2_LATENCIA.labels(op).observe(time.perf_counter() - t0)
+        ARGON2_EN_CURSO.dec()
+
+
+@contextmanager
+def supabase(op: str):
+    """`with supabase("upload") as m: r = requests.post(...); m["status"] = r.status_code`"""
+    t0 = time.perf_counter()
+    m = {"status": "error"}
+    try:
+        yield m
+    finally:
+        SUPABASE_LATENCIA.labels(op, str(m["status"])).observe(time.perf_counter() - t0)
+
+
+class PoolInstrumentado(QueuePool):
+    """QueuePool que mide cuánto se espera por una conexión libre."""
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_ESPERA.observe(time.perf_counter() - t0)
+
+
+def _escuchar_pool(engine):
+    event.listen(engine, "checkout", lambda *a: POOL_EN_USO.inc())
+    event.listen(engine, "checkin", lambda *a: POOL_EN_USO.dec())
+
+
+def _inicio():
+    g._t_metrics = time.perf_counter()
+
+
+def _fin(resp):
+    t0 = g.pop("_t_metrics", None)
+    if t0 is not None and request.endpoint != "metrics":
+        HTTP_LATENCIA.labels(
+            request.blueprint or "", request.endpoint or "404",
+            request.method, str(resp.status_code),
+        ).observe(time.perf_counter() - t0)
+    return resp
+
+
+def _exponer():
+    token = current_app.config.get("METRICS_TOKEN")
+    if not token:
+        if current_app.config.get("METRICS_REQUIERE_TOKEN"):
+            abort(404)
+    elif not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        abort(401)
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = prom.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prom.REGISTRY
+    return Response(prom.generate_latest(registry), mimetype=prom.CONTENT_TYPE_LATEST)
+
+
+def preparar_config(app):
+    """Antes de db.init_app: usa PoolInstrumentado para los engines con QueuePool."""
+    uri = app.config.get("SQLALCHEMY_DATABASE_URI") or ""
+    if prom is None or not uri.startswith("postgresql"):
+        return
+    opts = dict(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    opts.setdefault("poolclass", PoolInstrumentado)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = opts
+
+
+def init_app(app, db):
+    if prom is None:
+        return
+    app.before_request(_inicio)
+    app.after_request(_fin)
+    app.add_url_rule("/metrics", "metrics", _exponer)
+    with app.app_context():
+        _escuchar_pool(db.engine)
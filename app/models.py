@@ -28,6 +28,7 @@ class Cliente(db.Model):
     clasificacion_riesgo = db.Column(db.String(10), nullable=False, default="MEDIO")  # BAJO|MEDIO|ALTO
 
     created_at = db.Column(db.DateTime(timezone=True), server_default=sa.func.now())
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=sa.func.now(), onupdate=sa.func.now())
 
     __table_args__ = (
         CheckConstraint("tipo_doc in ('DNI','RUC','CE','PASAPORTE','OTRO')", name="chk_cliente_tipo_doc"),
@@ -57,6 +58,7 @@ class Producto(db.Model):
     familia          = db.Column(db.Text, nullable=False)
     imagen_key       = db.Column(db.Text)
     created_at       = db.Column(db.DateTime(timezone=True), server_default=sa.func.now())
+    updated_at       = db.Column(db.DateTime(timezone=True), server_default=sa.func.now(), onupdate=sa.func.now())
 
     __table_args__ = (
         CheckConstraint("um in ('DOC','UNID','CIENTO')", name="chk_producto_um"),
@@ -82,6 +84,9 @@ class Catalogo(db.Model):
 
     estado     = db.Column(db.String(20), nullable=False, default="EN_PROCESO")
     created_at = db.Column(db.DateTime(timezone=True), server_default=sa.func.now())
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=sa.func.now(), onupdate=sa.func.now())
+    # Historial movido a las tablas *_archivo (app/archivo.py)
+    archivado_at = db.Column(db.DateTime(timezone=True))
 
     __table_args__ = (
         UniqueConstraint("cliente_id", "producto_id", name="uq_catalogo_cliente_producto"),
@@ -115,12 +120,28 @@ class CatalogoSesion(db.Model):
 
     etiqueta   = db.Column(db.Text)
     is_active  = db.Column(db.Boolean, nullable=False, default=True)
+    # Próximo version_num; se avanza con UPDATE ... RETURNING al crear versiones
+    next_version_num = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    # Versión vigente de la sesión (FK compuesta con id para asegurar pertenencia)
+    current_version_id = db.Column(sa.BigInteger)
     created_at = db.Column(db.DateTime(timezone=True), server_default=sa.func.now())
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=sa.func.now(), onupdate=sa.func.now())
 
     __table_args__ = (
         sa.Index("idx_sesion_catalogo", catalogo_id),
         # Para poder referenciar (id, catalogo_id) desde Version:
         UniqueConstraint("id", "catalogo_id", name="uq_sesion_id_catalogo"),
+
+        # FK compuesta: (current_version_id, id) -> (version.id, version.sesion_id).
+        # Diferida: al borrar sesión/catálogo en cascada las versiones se van
+        # antes que la sesión que las apunta.
+        ForeignKeyConstraint(
+            ["current_version_id", "id"],
+            ["catalogo_sesion_version.id", "catalogo_sesion_version.sesion_id"],
+            name="fk_sesion_current_belongs",
+            deferrable=True,
+            initially="DEFERRED",
+        ),
     )
 
     catalogo  = relationship("Catalogo", back_populates="sesiones")
@@ -131,6 +152,9 @@ class CatalogoSesion(db.Model):
         order_by="CatalogoSesionVersion.version_num",
         foreign_keys="CatalogoSesionVersion.sesion_id",
     )
+    current_version = relationship(
+        "CatalogoSesionVersion", foreign_keys=[current_version_id], uselist=False, post_update=True,
+    )
 
 
 # -------------------------
@@ -155,9 +179,18 @@ class CatalogoSesionVersion(db.Model):
     version_num = db.Column(db.Integer, nullable=False)
 
     estado     = db.Column(db.String(20), nullable=False, default="BORRADOR")
-    is_current = db.Column(db.Boolean,     nullable=False, default=True)
     is_final   = db.Column(db.Boolean,     nullable=False, default=False)
 
+    # Derivado de catalogo_sesion.current_version_id (se mantiene en la API)
+    # correlate_except: solo se correlaciona con la versión; no se "come" un
+    # catalogo_sesion de la consulta externa (p. ej. un JOIN a la sesión)
+    is_current = db.column_property(
+        sa.exists().where(
+            CatalogoSesion.id == sesion_id,
+            CatalogoSesion.current_version_id == id,
+        ).correlate_except(CatalogoSesion)
+    )
+
     # SNAPSHOT (con precisión y defaults donde convenga)
     um               = db.Column(db.String(10), nullable=False)
     doc_x_bulto_caja = db.Column(NUMERIC(10, 2))
@@ -173,11 +206,18 @@ class CatalogoSesionVersion(db.Model):
     foto_key         = db.Column(db.Text)
     observaciones    = db.Column(db.Text)
 
+    # Almacenamiento delta (ver app/snapshots.py): bits de CAMPOS_DELTA que se
+    # heredan de la versión base (guardados como NULL en esta fila).
+    delta_base_id    = db.Column(sa.BigInteger, db.ForeignKey("catalogo_sesion_version.id"))
+    campos_heredados = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
     created_at = db.Column(db.DateTime(timezone=True), server_default=sa.func.now())
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=sa.func.now(), onupdate=sa.func.now())
 
     __table_args__ = (
         UniqueConstraint("sesion_id", "version_num", name="uq_version_por_sesion"),
         UniqueConstraint("id", "catalogo_id", name="uq_version_id_catalogo"),
+        UniqueConstraint("id", "sesion_id", name="uq_version_id_sesion"),
         CheckConstraint("um in ('DOC','UNID','CIENTO')", name="chk_version_um"),
         CheckConstraint("precio_exw >= 0",               name="chk_version_precio"),
         CheckConstraint("estado in ('BORRADOR','ENVIADA','CONTRAOFERTA','APROBADA','RECHAZADA','EXPIRADA')",
@@ -192,9 +232,9 @@ class CatalogoSesionVersion(db.Model):
         CheckConstraint("(is_final = FALSE) OR (estado = 'APROBADA')", name="chk_final_aprobada"),
 
         # ÍNDICES parciales (PostgreSQL)
-        Index("uq_sesion_current", sesion_id, unique=True, postgresql_where=sa.text("is_current")),
         Index("uq_sesion_final",   sesion_id, unique=True, postgresql_where=sa.text("is_final")),
         Index("uq_catalogo_final_total", catalogo_id, unique=True, postgresql_where=sa.text("is_final")),
+        Index("idx_version_delta_base", delta_base_id, postgresql_where=sa.text("delta_base_id IS NOT NULL")),
 
         # FK compuesta: obliga a que catalogo_id coincida con el de la sesión
         ForeignKeyConstraint(
@@ -352,3 +392,298 @@ class RefreshToken(db.Model):
         sa.Index("idx_rt_user_open", "usuario_id", postgresql_where=sa.text("revoked_at IS NULL")),
         sa.Index("idx_rt_created", "created_at"),
     )
+
+
+# -------------------------
+# FEED DE CAMBIOS (GET /api/changes, ver app/cambios.py)
+# -------------------------
+class Cambio(db.Model):
+    """
+    Outbox de cambios: una fila por fila insertada/editada ('U') o borrada
+    ('D') en las tablas de `TABLAS_CON_CAMBIOS`. La escriben triggers en la
+    misma transacción que el cambio. `txid` (PostgreSQL) ordena el feed junto
+    con `id`; ver app/cambios.py.
+    """
+    __tablename__ = "cambio"
+    id = db.Column(sa.BigInteger, sa.Identity(), primary_key=True)
+    txid = db.Column(sa.BigInteger, nullable=False, server_default="0")
+    tabla = db.Column(db.String(40), nullable=False)
+    entidad_id = db.Column(sa.BigInteger, nullable=False)
+    op = db.Column(db.String(1), nullable=False)
+    created_at = db.Column(db.DateTime(timezone=True), server_default=sa.func.now())
+
+    __table_args__ = (
+        CheckConstraint("op in ('U','D')", name="chk_cambio_op"),
+        sa.Index("idx_cambio_cursor", txid, id),
+        sa.Index("idx_cambio_created", created_at),
+    )
+
+
+TABLAS_CON_CAMBIOS = ("cliente", "producto", "catalogo", "catalogo_sesion", "catalogo_sesion_version")
+
+
+class Idempotencia(db.Model):
+    """
+    Respuesta guardada por (usuario, Idempotency-Key); ver app/idempotencia.py.
+    `status` NULL = el primer request todavía está en curso. `huella` es el
+    sha256 de método + ruta + cuerpo; `cuerpo`, la respuesta comprimida.
+    """
+    __tablename__ = "idempotencia"
+    usuario_id = db.Column(sa.BigInteger, primary_key=True)
+    clave = db.Column(db.String(255), primary_key=True)
+    huella = db.Column(sa.LargeBinary(32), nullable=False)
+    status = db.Column(sa.SmallInteger)
+    cuerpo = db.Column(sa.LargeBinary)
+    created_at = db.Column(db.DateTime(timezone=True), server_default=sa.func.now(), nullable=False)
+
+    __table_args__ = (
+        sa.Index("idx_idempotencia_created", created_at),
+    )
+
+
+class Cotizacion(db.Model):
+    """
+    Estado de una cotización generada (app/cotizaciones.py). `id` es
+    "<hash>.<formato>"; el archivo vive en Supabase Storage (`archivo_key`).
+    `updated_at` marca el último reclamo: un `en_proceso` más viejo que
+    `COTIZACION_TIMEOUT_S` quedó abandonado y se puede retomar.
+    """
+    __tablename__ = "cotizacion"
+    id = db.Column(db.String(40), primary_key=True)
+    estado = db.Column(db.String(12), nullable=False)
+    archivo_key = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime(timezone=True), server_default=sa.func.now(), nullable=False)
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=sa.func.now(), nullable=False)
+
+    __table_args__ = (
+        sa.CheckConstraint("estado IN ('en_proceso','listo','error')", name="ck_cotizacion_estado"),
+    )
+
+
+# -------------------------
+# ARCHIVO (historial de catálogos cerrados; ver app/archivo.py)
+# -------------------------
+def _tabla_archivo(origen: sa.Table, nombre: str) -> sa.Table:
+    """Mismas columnas que `origen`; sin identidad, defaults, FKs ni índices parciales."""
+    return sa.Table(
+        nombre, db.metadata,
+        *(sa.Column(c.name, c.type, primary_key=c.primary_key, nullable=c.nullable)
+          for c in origen.columns),
+    )
+
+
+catalogo_sesion_archivo = _tabla_archivo(CatalogoSesion.__table__, "catalogo_sesion_archivo")
+sa.Index("idx_sesion_archivo_catalogo", catalogo_sesion_archivo.c.catalogo_id)
+
+catalogo_sesion_version_archivo = _tabla_archivo(CatalogoSesionVersion.__table__, "catalogo_sesion_version_archivo")
+sa.Index("idx_version_archivo_sesion", catalogo_sesion_version_archivo.c.sesion_id,
+         catalogo_sesion_version_archivo.c.version_num)
+sa.Index("idx_version_archivo_catalogo", catalogo_sesion_version_archivo.c.catalogo_id)
+
+
+# -------------------------
+# RESUMEN DE CATÁLOGOS (vista materializada, PostgreSQL)
+# -------------------------
+# Fuera de db.metadata para que create_all no la cree como tabla.
+_vistas = sa.MetaData()
+
+resumen_catalogo_mv = sa.Table(
+    "mv_resumen_catalogo", _vistas,
+    sa.Column("cliente_id", sa.BigInteger),
+    sa.Column("familia", sa.Text),
+    sa.Column("estado", sa.String(20)),
+    sa.Column("catalogos", sa.BigInteger),
+    sa.Column("con_version", sa.BigInteger),
+    sa.Column("subtotal_exw", sa.Numeric),
+    sa.Column("cbm_total", sa.Numeric),
+    sa.Column("peso_bruto_kg", sa.Numeric),
+    sa.Column("generado_at", sa.DateTime(timezone=True)),
+)
+
+
+def resumen_catalogo_select():
+    """
+    Agregado por (cliente, familia, estado) sobre la versión "vigente" de cada
+    catálogo: la final si existe; si no, la current más reciente.
+    """
+    V = CatalogoSesionVersion
+    S = CatalogoSesion
+    rn = sa.func.row_number().over(
+        partition_by=V.catalogo_id,
+        order_by=(V.is_final.desc(), V.id.desc()),
+    )
+    vig = (
+        sa.select(
+            V.catalogo_id.label("catalogo_id"),
+            V.subtotal_exw.label("subtotal_exw"),
+            V.cbm_total.label("cbm_total"),
+            V.peso_bruto_kg.label("peso_bruto_kg"),
+            rn.label("rn"),
+        )
+        .outerjoin(S, S.current_version_id == V.id)
+        .where(sa.or_(V.is_final, S.id.isnot(None)))
+        .subquery("vig")
+    )
+    return (
+        sa.select(
+            Catalogo.cliente_id.label("cliente_id"),
+            Producto.familia.label("familia"),
+            Catalogo.estado.label("estado"),
+            sa.func.count(Catalogo.id).label("catalogos"),
+            sa.func.count(vig.c.catalogo_id).label("con_version"),
+            sa.func.coalesce(sa.func.sum(vig.c.subtotal_exw), 0).label("subtotal_exw"),
+            sa.func.coalesce(sa.func.sum(vig.c.cbm_total), 0).label("cbm_total"),
+            sa.func.coalesce(sa.func.sum(vig.c.peso_bruto_kg), 0).label("peso_bruto_kg"),
+            sa.func.now().label("generado_at"),
+        )
+        .select_from(Catalogo)
+        .join(Producto, Producto.id == Catalogo.producto_id)
+        .outerjoin(vig, sa.and_(vig.c.catalogo_id == Catalogo.id, vig.c.rn == 1))
+        .group_by(Catalogo.cliente_id, Producto.familia, Catalogo.estado)
+    )
+
+
+@sa.event.listens_for(db.metadata, "after_create")
+def _crear_resumen_mv(target, connection, **kw):
+    if connection.dialect.name != "postgresql":
+        return
+    sql = resumen_catalogo_select().compile(
+        dialect=connection.dialect, compile_kwargs={"literal_binds": True}
+    )
+    connection.execute(sa.text(
+        f"CREATE MATERIALIZED VIEW IF NOT EXISTS mv_resumen_catalogo AS {sql} WITH DATA"
+    ))
+    # Índice único: requisito de REFRESH ... CONCURRENTLY
+    connection.execute(sa.text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_resumen_catalogo "
+        "ON mv_resumen_catalogo (cliente_id, familia, estado)"
+    ))
+
+
+@sa.event.listens_for(db.metadata, "before_drop")
+def _borrar_resumen_mv(target, connection, **kw):
+    if connection.dialect.name != "postgresql":
+        return
+    connection.execute(sa.text("DROP MATERIALIZED VIEW IF EXISTS mv_resumen_catalogo"))
+
+
+
+# Triggers del feed: por sentencia con tablas de transición en PostgreSQL
+# (un UPDATE masivo es un solo INSERT ... SELECT), por fila en SQLite.
+# `SET LOCAL app.sin_cambios = 'on'` los apaga en cargas masivas (flask seed).
+_PG_FUNCIONES_CAMBIO = """
+CREATE OR REPLACE FUNCTION cambio_upsert() RETURNS trigger AS $$
+BEGIN
+  IF coalesce(current_setting('app.sin_cambios', true), '') = 'on' THEN RETURN NULL; END IF;
+  INSERT INTO cambio (txid, tabla, entidad_id, op)
+  SELECT txid_current(), TG_TABLE_NAME, id, 'U' FROM nuevas;
+  RETURN NULL;
+END $$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION cambio_delete() RETURNS trigger AS $$
+BEGIN
+  IF coalesce(current_setting('app.sin_cambios', true), '') = 'on' THEN RETURN NULL; END IF;
+  INSERT INTO cambio (txid, tabla, entidad_id, op)
+  SELECT txid_current(), TG_TABLE_NAME, id, 'D' FROM viejas;
+  RETURN NULL;
+END $$ LANGUAGE plpgsql;
+"""
+
+
+@sa.event.listens_for(db.metadata, "after_create")
+def _crear_triggers_cambio(target, connection, **kw):
+    pg = connection.dialect.name == "postgresql"
+    if pg:
+        connection.execute(sa.text(_PG_FUNCIONES_CAMBIO))
+    elif connection.dialect.name != "sqlite":
+        return
+    for t in TABLAS_CON_CAMBIOS:
+        for ev, op in (("INSERT", "U"), ("UPDATE", "U"), ("DELETE", "D")):
+            nombre = f"trg_cambio_{t}_{ev.lower()}"
+            if pg:
+                ref = "OLD TABLE AS viejas" if op == "D" else "NEW TABLE AS nuevas"
+                fn = "cambio_delete" if op == "D" else "cambio_upsert"
+                connection.execute(sa.text(f"DROP TRIGGER IF EXISTS {nombre} ON {t}"))
+                connection.execute(sa.text(
+                    f"CREATE TRIGGER {nombre} AFTER {ev} ON {t} REFERENCING {ref} "
+                    f"FOR EACH STATEMENT EXECUTE FUNCTION {fn}()"
+                ))
+            else:
+                fila = "OLD" if op == "D" else "NEW"
+                connection.execute(sa.text(
+                    f"CREATE TRIGGER IF NOT EXISTS {nombre} AFTER {ev} ON {t} BEGIN "
+                    f"INSERT INTO cambio (tabla, entidad_id, op) VALUES ('{t}', {fila}.id, '{op}'); END"
+                ))
+
+
+# Eventos en vivo (app/eventos.py): NOTIFY por catálogo afectado, al commit.
+# Por sentencia: un UPDATE masivo manda un aviso por catálogo, no por fila.
+# Las listas van hasta 50 filas (NOTIFY admite 8000 bytes); más, null + `n`.
+# `app.sin_cambios` también los apaga (flask seed, flask archivar).
+CANAL_EVENTOS = "eventos_catalogo"
+
+_PG_EVENTOS = """
+CREATE OR REPLACE FUNCTION evento_versiones() RETURNS trigger AS $$
+BEGIN
+  IF coalesce(current_setting('app.sin_cambios', true), '') = 'on' THEN RETURN NULL; END IF;
+  PERFORM pg_notify('{canal}', json_build_object(
+      'tipo', CASE TG_OP WHEN 'INSERT' THEN 'version_creada' ELSE 'version_actualizada' END,
+      'catalogo_id', v.catalogo_id, 'cliente_id', c.cliente_id,
+      'versiones', CASE WHEN count(*) <= 50 THEN json_agg(json_build_object(
+          'id', v.id, 'sesion_id', v.sesion_id, 'version_num', v.version_num,
+          'estado', v.estado, 'is_final', v.is_final)) END,
+      'n', count(*))::text)
+  FROM nuevas v JOIN catalogo c ON c.id = v.catalogo_id
+  GROUP BY v.catalogo_id, c.cliente_id;
+  RETURN NULL;
+END $$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION evento_current() RETURNS trigger AS $$
+BEGIN
+  IF coalesce(current_setting('app.sin_cambios', true), '') = 'on' THEN RETURN NULL; END IF;
+  PERFORM pg_notify('{canal}', json_build_object(
+      'tipo', 'current', 'catalogo_id', n.catalogo_id, 'cliente_id', c.cliente_id,
+      'sesiones', CASE WHEN count(*) <= 50 THEN json_agg(json_build_object(
+          'id', n.id, 'current_version_id', n.current_version_id)) END,
+      'n', count(*))::text)
+  FROM nuevas n JOIN viejas o ON o.id = n.id JOIN catalogo c ON c.id = n.catalogo_id
+  WHERE n.current_version_id IS DISTINCT FROM o.current_version_id
+  GROUP BY n.catalogo_id, c.cliente_id;
+  RETURN NULL;
+END $$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION evento_catalogo() RETURNS trigger AS $$
+BEGIN
+  IF coalesce(current_setting('app.sin_cambios', true), '') = 'on' THEN RETURN NULL; END IF;
+  PERFORM pg_notify('{canal}', json_build_object(
+      'tipo', 'catalogo', 'catalogo_id', n.id, 'cliente_id', n.cliente_id,
+      'estado', n.estado, 'final_version_id', n.final_version_id)::text)
+  FROM nuevas n JOIN viejas o ON o.id = n.id
+  WHERE n.estado IS DISTINCT FROM o.estado OR n.final_version_id IS DISTINCT FROM o.final_version_id;
+  RETURN NULL;
+END $$ LANGUAGE plpgsql;
+""".replace("{canal}", CANAL_EVENTOS)
+
+_TRIGGERS_EVENTOS = (
+    ("trg_evento_version_insert", "INSERT", "catalogo_sesion_version",
+     "REFERENCING NEW TABLE AS nuevas", "evento_versiones"),
+    ("trg_evento_version_update", "UPDATE", "catalogo_sesion_version",
+     "REFERENCING NEW TABLE AS nuevas", "evento_versiones"),
+    ("trg_evento_current", "UPDATE", "catalogo_sesion",
+     "REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas", "evento_current"),
+    ("trg_evento_catalogo", "UPDATE", "catalogo",
+     "REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas", "evento_catalogo"),
+)
+
+
+@sa.event.listens_for(db.metadata, "after_create")
+def _crear_triggers_eventos(target, connection, **kw):
+    if connection.dialect.name != "postgresql":
+        return
+    connection.execute(sa.text(_PG_EVENTOS))
+    for nombre, ev, tabla, ref, fn in _TRIGGERS_EVENTOS:
+        connection.execute(sa.text(f"DROP TRIGGER IF EXISTS {nombre} ON {tabla}"))
+        connection.execute(sa.text(
+            f"CREATE TRIGGER {nombre} AFTER {ev} ON {tabla} {ref} "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION {fn}()"
+        ))
@@ -0,0 +1,51 @@
+# app/precios.py
+"""
+Repreciado de versiones abiertas cuando cambia el maestro de producto.
+
+Copia `precio_exw`, `doc_x_paq` y `um` del producto a sus versiones
+editables (por defecto BORRADOR) de catálogos EN_PROCESO, con UPDATEs por
+lotes de ids (keyset), un commit por lote. Solo toca las filas que difieren
+del maestro, así que repetirlo (o reintentarlo a mitad) es inocuo.
+"""
+import sqlalchemy as sa
+
+from .models import db, Catalogo, CatalogoSesionVersion, Producto
+from .retry import preparar_tx
+
+CAMPOS_MAESTRO = ("precio_exw", "doc_x_paq", "um")
+ESTADOS_EDITABLES = ("BORRADOR", "ENVIADA", "CONTRAOFERTA")
+
+
+def repreciar(producto: Producto, estados=("BORRADOR",), campos=CAMPOS_MAESTRO, lote: int = 1000) -> dict:
+    """Devuelve {"actualizadas": n, "lotes": k}."""
+    t = CatalogoSesionVersion.__table__
+    valores = {f: getattr(producto, f) for f in campos}
+    abiertos = sa.select(Catalogo.id).where(
+        Catalogo.producto_id == producto.id, Catalogo.estado == "EN_PROCESO"
+    )
+    filtro = (
+        t.c.producto_id == producto.id,
+        t.c.estado.in_(estados),
+        t.c.catalogo_id.in_(abiertos),
+        sa.or_(*(t.c[f].is_distinct_from(v) for f, v in valores.items())),
+    )
+
+    total = lotes = 0
+    ultimo = 0
+    while True:
+        preparar_tx()
+        ids = sa.select(t.c.id).where(*filtro, t.c.id > ultimo).order_by(t.c.id).limit(lote)
+        # el estado se vuelve a evaluar sobre la fila ya bloqueada
+        res = db.session.execute(
+            sa.update(t)
+            .where(t.c.id.in_(ids.scalar_subquery()), t.c.estado.in_(estados))
+            .values(valores)
+            .returning(t.c.id)
+        ).scalars().all()
+        db.session.commit()
+        if not res:
+            break
+        total += len(res)
+        lotes += 1
+        ultimo = max(res)
+    return {"actualizadas": total, "lotes": lotes}
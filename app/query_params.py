@@ -0,0 +1,88 @@
+# app/query_params.py
+"""
+Parámetros de query compartidos por los endpoints de listado/detalle.
+"""
+import sqlalchemy as sa
+from flask import request, abort, current_app
+
+from .models import db
+
+
+def parse_fields(esquema, extras: tuple[str, ...] = ()) -> tuple[str, ...] | None:
+    """
+    `?fields=id,estado,precio_exw` -> ("id", "estado", "precio_exw").
+
+    Devuelve None si no se pidió (respuesta completa). Los nombres deben
+    existir en el esquema (o en `extras`, campos que arma el endpoint);
+    cualquier otro -> 400.
+    """
+    raw = request.args.get("fields")
+    if raw is None:
+        return None
+    nombres = tuple(dict.fromkeys(n.strip() for n in raw.split(",") if n.strip()))
+    if not nombres:
+        abort(400, description="fields vacío")
+    desconocidos = [n for n in nombres if n not in esquema.campos and n not in extras]
+    if desconocidos:
+        abort(400, description=f"fields desconocidos: {', '.join(desconocidos)}")
+    return nombres
+
+
+def parse_ids() -> list[int] | None:
+    """
+    `?ids=3,1,3` -> [3, 1] (sin repetidos, en el orden pedido).
+
+    None si no se pidió; más de `MULTIGET_MAX` ids o un id no entero -> 400.
+    """
+    raw = request.args.get("ids")
+    if raw is None:
+        return None
+    try:
+        ids = list(dict.fromkeys(int(x) for x in raw.split(",") if x.strip()))
+    except ValueError:
+        abort(400, description="ids inválidos")
+    if not ids:
+        abort(400, description="ids vacío")
+    maximo = current_app.config["MULTIGET_MAX"]
+    if len(ids) > maximo:
+        abort(400, description=f"máximo {maximo} ids por llamada")
+    return ids
+
+
+def multi_get(modelo, esquema, ids: list[int], campos, opciones=(), antes=None) -> dict:
+    """
+    Carga `ids` en una sola consulta `IN` y responde en el orden pedido:
+    `{"data": [obj | null, ...], "no_encontrados": [ids]}`.
+    `antes(objs)`: para completar lo que el esquema no carga solo.
+    """
+    objs = db.session.scalars(
+        sa.select(modelo)
+        .options(*esquema.load_only(modelo, campos), *opciones)
+        .where(modelo.id.in_(ids))
+    ).all()
+    if antes is not None:
+        antes(objs)
+    por_id = {o.id: d for o, d in zip(objs, esquema.dump_many(objs, campos))}
+    return {
+        "data": [por_id.get(i) for i in ids],
+        "no_encontrados": [i for i in ids if i not in por_id],
+    }
+
+
+def parse_expand(permitidas) -> set[str]:
+    """
+    `?expand=cliente,sesiones.current` -> {"cliente", "sesiones", "sesiones.current"}
+    (pedir un anidado implica su padre). Nombres fuera de `permitidas` -> 400.
+    """
+    raw = request.args.get("expand")
+    if not raw:
+        return set()
+    nombres = {n.strip() for n in raw.split(",") if n.strip()}
+    desconocidos = sorted(n for n in nombres if n not in permitidas)
+    if desconocidos:
+        abort(400, description=f"expand desconocidos: {', '.join(desconocidos)}")
+    for n in list(nombres):
+        while "." in n:
+            n = n.rsplit(".", 1)[0]
+            nombres.add(n)
+    return nombres
@@ -0,0 +1,54 @@
+# app/resumen.py
+"""
+Refresco de la vista materializada `mv_resumen_catalogo`.
+
+- `refrescar()`: REFRESH ... CONCURRENTLY (no bloquea lecturas del dashboard).
+- `solicitar_refresco(app)`: lo agenda en segundo plano tras una aprobación,
+  agrupando ráfagas (una sola ejecución por ventana `RESUMEN_REFRESH_DEBOUNCE_S`).
+- `flask refresh-resumen`: para el scheduler (cron / Heroku Scheduler).
+"""
+import logging
+import threading
+
+import sqlalchemy as sa
+
+from .models import db
+
+log = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_pendiente: threading.Timer | None = None
+
+
+def disponible() -> bool:
+    return db.engine.dialect.name == "postgresql"
+
+
+def refrescar():
+    if not disponible():
+        return
+    with db.engine.begin() as conn:
+        conn.execute(sa.text("REFRESH MATERIALIZED VIEW CONCURRENTLY mv_resumen_catalogo"))
+
+
+def _ejecutar(app):
+    global _pendiente
+    with _lock:
+        _pendiente = None
+    with app.app_context():
+        try:
+            refrescar()
+        except Exception:
+            log.exception("no se pudo refrescar mv_resumen_catalogo")
+
+
+def solicitar_refresco(app):
+    global _pendiente
+    if not app.config.get("RESUMEN_REFRESH_ON_APPROVE"):
+        return
+    with _lock:
+        if _pendiente is not None:
+            return
+        _pendiente = threading.Timer(app.config["RESUMEN_REFRESH_DEBOUNCE_S"], _ejecutar, args=(app,))
+        _pendiente.daemon = True
+        _pendiente.start()
@@ -0,0 +1,111 @@
+# app/retry.py
+"""
+Reintentos ante contención en BD para los caminos con locks (aprobar, crear
+versión, cambiar current).
+
+- `preparar_tx(catalogo_id)`: `SET LOCAL lock_timeout` (las esperas por lock
+  dejan de ser ilimitadas) y, si se pasa `catalogo_id`,
+  `pg_advisory_xact_lock(catalogo_id)` para serializar por catálogo antes de
+  tomar los FOR UPDATE (siempre en el orden catálogo -> sesión -> versión).
+- `@reintentar("nombre")`: vuelve a ejecutar la vista ante fallas transitorias
+  (serialización 40001, deadlock 40P01, lock_timeout 55P03) con backoff
+  exponencial y jitter. Agotados los intentos responde 503 + Retry-After.
+  Los `IntegrityError` y los 409 de negocio no se reintentan.
+- `estadisticas()`: contadores de reintentos por operación (también en
+  /metrics como `db_retries_total`).
+"""
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+import sqlalchemy as sa
+from flask import current_app, jsonify
+from sqlalchemy.exc import DBAPIError, IntegrityError
+
+from .models import db
+from . import metrics
+
+log = logging.getLogger(__name__)
+
+SQLSTATE_TRANSITORIOS = {
+    "40001": "serializacion",
+    "40P01": "deadlock",
+    "55P03": "lock_timeout",
+}
+
+_lock = threading.Lock()
+_contadores = Counter()
+
+
+def _contar(operacion: str, resultado: str):
+    with _lock:
+        _contadores[(operacion, resultado)] += 1
+    metrics.DB_REINTENTOS.labels(operacion, resultado).inc()
+
+
+def estadisticas() -> dict:
+    """{"aprobar": {"reintento:deadlock": 3, "agotado": 1, "ok_tras_reintento": 2}, ...}"""
+    with _lock:
+        items = list(_contadores.items())
+    out = {}
+    for (op, res), n in items:
+        out.setdefault(op, {})[res] = n
+    return out
+
+
+def motivo_transitorio(exc: Exception) -> str | None:
+    if isinstance(exc, IntegrityError) or not isinstance(exc, DBAPIError):
+        return None
+    sqlstate = getattr(exc.orig, "sqlstate", None) or getattr(exc.orig, "pgcode", None)
+    return SQLSTATE_TRANSITORIOS.get(sqlstate)
+
+
+def preparar_tx(catalogo_id: int | None = None):
+    """Al inicio de la transacción, antes de cualquier lock de fila."""
+    if db.engine.dialect.name != "postgresql":
+        return
+    ms = int(current_app.config["DB_LOCK_TIMEOUT_MS"])
+    db.session.execute(sa.text(f"SET LOCAL lock_timeout = '{ms}ms'"))
+    if catalogo_id is not None:
+        db.session.execute(sa.select(sa.func.pg_advisory_xact_lock(catalogo_id)))
+
+
+def _espera(intento: int, cfg) -> float:
+    # "full jitter": uniforme entre 0 y el tope exponencial
+    tope = min(cfg["DB_RETRY_MAX_S"], cfg["DB_RETRY_BASE_S"] * (2 ** intento))
+    return random.uniform(0, tope)
+
+
+def reintentar(operacion: str):
+    def deco(fn):
+        @wraps(fn)
+        def _w(*args, **kwargs):
+            cfg = current_app.config
+            intentos = int(cfg["DB_RETRY_MAX"])
+            for intento in range(intentos + 1):
+                try:
+                    resp = fn(*args, **kwargs)
+                    if intento:
+                        _contar(operacion, "ok_tras_reintento")
+                    return resp
+                except DBAPIError as e:
+                    motivo = motivo_transitorio(e)
+                    if motivo is None:
+                        raise
+                    db.session.rollback()
+                    if intento == intentos:
+                        _contar(operacion, "agotado")
+                        log.warning("%s: contención persistente (%s) tras %d intentos",
+                                    operacion, motivo, intentos + 1)
+                        r = jsonify({"error": "contención en la base de datos, reintente"})
+                        r.status_code = 503
+                        r.headers["Retry-After"] = "1"
+                        return r
+                    _contar(operacion, f"reintento:{motivo}")
+                    log.info("%s: %s, reintento %d", operacion, motivo, intento + 1)
+                    time.sleep(_espera(intento, cfg))
+        return _w
+    return deco
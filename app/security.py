@@ -3,17 +3,30 @@ import jwt
 from passlib.hash import argon2
 from datetime import datetime, timezone, timedelta
 from flask import current_app
+from . import metrics
+from .eventos import worker_asincrono
 
 def now_utc() -> datetime:
     return datetime.now(timezone.utc)
 
 # -------- Password hashing --------
+def _fuera_del_loop(fn, *args):
+    # Con workers gevent, argon2 (CPU, libera el GIL) corre en un hilo real del
+    # threadpool del hub: si no, congelaría todas las greenlets del worker,
+    # latidos SSE incluidos.
+    if worker_asincrono():
+        import gevent
+        return gevent.get_hub().threadpool.apply(fn, args)
+    return fn(*args)
+
 def hash_pwd(p: str) -> str:
-    return argon2.hash(p)
+    with metrics.argon2("hash"):
+        return _fuera_del_loop(argon2.hash, p)
 
 def verify_pwd(p: str, h: str) -> bool:
     try:
-        return argon2.verify(p, h)
+        with metrics.argon2("verify"):
+            return _fuera_del_loop(argon2.verify, p, h)
     except Exception:
         return False
 
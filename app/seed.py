@@ -0,0 +1,233 @@
+# app/seed.py
+"""
+Generador de datos sintéticos (`flask seed`) para tener una BD de tamaño
+producción en local y para los benchmarks.
+
+- Respeta CHECKs, FKs compuestas e índices únicos parciales: por catálogo
+  1-3 sesiones y 1-4 versiones por sesión; ~30% CERRADA (última versión de la
+  primera sesión APROBADA y final), ~5% CANCELADA, resto EN_PROCESO; la
+  vigente de cada sesión es su última versión.
+- Determinista para la misma semilla y lote: cada lote de catálogos usa su
+  propio RNG y bloques de ids fijos (3 sesiones y 12 versiones por catálogo,
+  con huecos), así que los lotes son independientes y se cargan en paralelo.
+- En PostgreSQL cada lote va por COPY en su propio proceso; en otros motores,
+  INSERT multi-fila en serie. La carga no pasa por el feed de cambios.
+"""
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+
+import sqlalchemy as sa
+
+from .models import db, Catalogo, CatalogoSesion, CatalogoSesionVersion, Cliente, Producto
+
+ESCALAS = {
+    "chica":   {"clientes": 500,    "productos": 100,   "catalogos": 2_000},
+    "mediana": {"clientes": 5_000,  "productos": 1_000, "catalogos": 20_000},
+    "grande":  {"clientes": 50_000, "productos": 5_000, "catalogos": 200_000},
+    "xl":      {"clientes": 100_000, "productos": 10_000, "catalogos": 1_000_000},
+}
+
+SESIONES_MAX, VERSIONES_MAX = 3, 4
+
+_SILABAS = ("ma", "ri", "to", "sa", "len", "per", "qui", "ex", "no", "va", "dor", "lux")
+_FAMILIAS = ("Limpieza", "Hogar", "Cocina", "Jardín", "Oficina", "Higiene", "Mascotas")
+_CIUDADES = (("PE", "Lima"), ("PE", "Arequipa"), ("CL", "Santiago"), ("EC", "Quito"),
+             ("CO", "Bogotá"), ("BO", "La Paz"))
+_ESTADOS_ABIERTOS = ("BORRADOR", "ENVIADA", "CONTRAOFERTA", "RECHAZADA")
+
+_T = {
+    "cliente": Cliente.__table__,
+    "producto": Producto.__table__,
+    "catalogo": Catalogo.__table__,
+    "sesion": CatalogoSesion.__table__,
+    "version": CatalogoSesionVersion.__table__,
+}
+_COLS = {
+    "cliente": ("id", "tipo_doc", "num_doc", "nombre", "pais", "ciudad", "clasificacion_riesgo"),
+    "producto": ("id", "nombre", "um", "doc_x_bulto_caja", "doc_x_paq", "precio_exw", "familia"),
+    "catalogo": ("id", "cliente_id", "producto_id", "estado"),
+    "sesion": ("id", "catalogo_id", "etiqueta", "is_active", "next_version_num", "current_version_id"),
+    "version": ("id", "sesion_id", "catalogo_id", "producto_id", "version_num", "estado", "is_final",
+                "um", "doc_x_bulto_caja", "doc_x_paq", "precio_exw", "porc_desc", "cant_bultos",
+                "peso_gr", "largo_cm", "ancho_cm", "alto_cm", "familia", "campos_heredados"),
+}
+
+
+def _nombre(rng, n):
+    return "".join(rng.choice(_SILABAS) for _ in range(n)).capitalize()
+
+
+def _dec(x, q):
+    return Decimal(str(x)).quantize(Decimal(q))
+
+
+# ---------------------------
+# Generación (tuplas en el orden de _COLS)
+# ---------------------------
+def _clientes(semilla, base, n):
+    rng = random.Random(f"{semilla}:clientes")
+    for i in range(n):
+        pais, ciudad = rng.choice(_CIUDADES)
+        yield (base + i, "RUC", f"{20_000_000_000 + base + i}",
+               f"{_nombre(rng, 3)} {rng.choice(('S.A.', 'S.A.C.', 'E.I.R.L.'))}",
+               pais, ciudad, rng.choice(("BAJO", "MEDIO", "MEDIO", "ALTO")))
+
+
+def _productos(semilla, base, n):
+    rng = random.Random(f"{semilla}:productos")
+    return [
+        (base + i, f"{_nombre(rng, 2)} {_nombre(rng, 2)} {i}",
+         rng.choice(("DOC", "DOC", "UNID", "CIENTO")),
+         _dec(rng.choice((4, 5, 6, 10)), "0.01"), _dec(rng.choice((5, 10, 12, 20)), "0.01"),
+         _dec(rng.uniform(0.5, 40), "0.0001"), rng.choice(_FAMILIAS))
+        for i in range(n)
+    ]
+
+
+def _lote_catalogos(plan, ini, fin):
+    """Filas de catálogo/sesión/versión para los catálogos [ini, fin)."""
+    rng = random.Random(f"{plan['semilla']}:catalogos:{ini}")
+    prods = _productos(plan["semilla"], plan["base"]["producto"], plan["productos"])
+    nc, np_ = plan["clientes"], plan["productos"]
+    base = plan["base"]
+    cats, sess, vers = [], [], []
+    for k in range(ini, fin):
+        # (cliente, producto) único: para cada cliente a, j recorre productos distintos
+        a, j = k % nc, k // nc
+        pid, _, um, dxb, dxp, precio, familia = prods[(j + a) % np_]
+        cid = base["catalogo"] + k
+        r = rng.random()
+        estado = "CERRADA" if r < 0.30 else "CANCELADA" if r < 0.35 else "EN_PROCESO"
+        cats.append((cid, base["cliente"] + a, pid, estado))
+        for s in range(rng.randint(1, SESIONES_MAX)):
+            sid = base["sesion"] + k * SESIONES_MAX + s
+            n_v = rng.randint(1, VERSIONES_MAX)
+            vid0 = base["version"] + (k * SESIONES_MAX + s) * VERSIONES_MAX
+            for num in range(1, n_v + 1):
+                final = estado == "CERRADA" and s == 0 and num == n_v
+                vers.append((
+                    vid0 + num - 1, sid, cid, pid, num,
+                    "APROBADA" if final else rng.choice(_ESTADOS_ABIERTOS), final,
+                    um, dxb, dxp, _dec(float(precio) * rng.uniform(0.85, 1.05), "0.0001"),
+                    _dec(rng.choice((0, 0.03, 0.05, 0.1)), "0.0001"),
+                    _dec(rng.randint(10, 400), "0.01"), _dec(rng.uniform(50, 900), "0.01"),
+                    _dec(rng.uniform(20, 60), "0.01"), _dec(rng.uniform(15, 45), "0.01"),
+                    _dec(rng.uniform(10, 40), "0.01"), familia, 0,
+                ))
+            # la FK del puntero current es diferida: la versión puede llegar después
+            sess.append((sid, cid, f"escenario {s + 1}", True, n_v + 1, vid0 + n_v - 1))
+    return {"catalogo": cats, "sesion": sess, "version": vers}
+
+
+# ---------------------------
+# Carga
+# ---------------------------
+def _sin_cambios(conn):
+    # una carga masiva no va al feed de cambios (app/cambios.py)
+    if conn.dialect.name == "postgresql":
+        conn.execute(sa.text("SET LOCAL app.sin_cambios = 'on'"))
+
+
+def _fijar_finales(conn, ini_id, fin_id):
+    v, c = _T["version"], _T["catalogo"]
+    conn.execute(
+        sa.update(c)
+        .where(v.c.catalogo_id == c.c.id, v.c.is_final, c.c.id.between(ini_id, fin_id))
+        .values(final_version_id=v.c.id)
+    )
+
+
+def _insertar(conn, tabla, filas):
+    if filas:
+        cols = _COLS[tabla]
+        conn.execute(sa.insert(_T[tabla]), [dict(zip(cols, f)) for f in filas])
+
+
+def _copiar(conn, tabla, filas):
+    cols = _COLS[tabla]
+    cur = conn.connection.driver_connection.cursor()
+    with cur.copy(f"COPY {_T[tabla].name} ({', '.join(cols)}) FROM STDIN") as cp:
+        for f in filas:
+            cp.write_row(f)
+
+
+def _cargar_lote(conn, plan, ini, fin, volcar):
+    _sin_cambios(conn)
+    filas = _lote_catalogos(plan, ini, fin)
+    for tabla in ("catalogo", "sesion", "version"):
+        volcar(conn, tabla, filas[tabla])
+    _fijar_finales(conn, plan["base"]["catalogo"] + ini, plan["base"]["catalogo"] + fin - 1)
+    return len(filas["catalogo"]), len(filas["sesion"]), len(filas["version"])
+
+
+_engine = None
+
+
+def _init_worker(url):
+    global _engine
+    _engine = sa.create_engine(url, pool_size=1)
+
+
+def _lote_en_worker(args):
+    plan, ini, fin = args
+    with _engine.begin() as conn:
+        return _cargar_lote(conn, plan, ini, fin, _copiar)
+
+
+def sembrar(clientes: int, productos: int, catalogos: int, semilla: int = 42,
+            lote: int = 5_000, workers: int = 4, log=print) -> dict:
+    """Inserta el dataset y devuelve los conteos."""
+    if catalogos > clientes * productos:
+        raise ValueError("catalogos no puede superar clientes * productos")
+    t0 = time.perf_counter()
+    base = {
+        k: (db.session.scalar(sa.select(sa.func.max(t.c.id))) or 0) + 1 for k, t in _T.items()
+    }
+    db.session.commit()
+    plan = {"semilla": semilla, "clientes": clientes, "productos": productos, "base": base}
+    pg = db.engine.dialect.name == "postgresql"
+    volcar = _copiar if pg else _insertar
+
+    with db.engine.begin() as conn:
+        _sin_cambios(conn)
+        volcar(conn, "cliente", list(_clientes(semilla, base["cliente"], clientes)))
+        volcar(conn, "producto", _productos(semilla, base["producto"], productos))
+
+    tramos = [(plan, i, min(i + lote, catalogos)) for i in range(0, catalogos, lote)]
+    conteo = {"clientes": clientes, "productos": productos, "catalogos": 0, "sesiones": 0, "versiones": 0}
+
+    def sumar(res):
+        c, s, v = res
+        conteo["catalogos"] += c
+        conteo["sesiones"] += s
+        conteo["versiones"] += v
+        log(f"  {conteo['catalogos']}/{catalogos} catálogos, {conteo['versiones']} versiones "
+            f"({time.perf_counter() - t0:.0f}s)")
+
+    if pg and workers > 1:
+        url = db.engine.url.render_as_string(hide_password=False)
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(url,)) as ex:
+            for res in ex.map(_lote_en_worker, tramos):
+                sumar(res)
+    else:
+        for plan_, ini, fin in tramos:
+            with db.engine.begin() as conn:
+                sumar(_cargar_lote(conn, plan_, ini, fin, volcar))
+
+    _ajustar_identidades()
+    conteo["segundos"] = round(time.perf_counter() - t0, 1)
+    return conteo
+
+
+def _ajustar_identidades():
+    # ids explícitos: mover las secuencias IDENTITY para que la app siga insertando
+    if db.engine.dialect.name != "postgresql":
+        return
+    with db.engine.begin() as conn:
+        for t in _T.values():
+            conn.execute(sa.text(
+                f"SELECT setval(pg_get_serial_sequence('{t.name}', 'id'), "
+                f"(SELECT coalesce(max(id), 1) FROM {t.name}))"
+            ))
@@ -0,0 +1,232 @@
+# app/serializers.py
+"""
+Serialización declarativa de modelos a dicts listos para JSON.
+
+Cada recurso declara un `Esquema` (lista de `Campo`) y el esquema compila,
+una sola vez por combinación de campos, una función que arma el dict con
+accesos directos a atributos (sin getattr dinámico ni bucles por campo).
+
+Los NUMERIC se devuelven como `Decimal` sin convertir: el proveedor JSON
+(`app.json_provider`) los codifica como número exacto.
+"""
+from sqlalchemy.orm import load_only
+
+from .snapshots import CAMPOS_DELTA, materializar
+
+
+def _dt(x):
+    return x.isoformat() if x is not None else None
+
+
+class Campo:
+    """
+    Campo serializable.
+
+    - `attr`: atributo del modelo (por defecto, el mismo nombre).
+    - `fecha`: se emite con `isoformat()`.
+    - `fn`: campo derivado, se calcula como `fn(obj)`.
+    - `columnas`: atributos del modelo que hay que cargar para este campo
+      (por defecto `attr`; los derivados deben declararlos).
+    """
+    __slots__ = ("nombre", "attr", "fecha", "fn", "columnas")
+
+    def __init__(self, nombre: str, attr: str | None = None, fecha: bool = False,
+                 fn=None, columnas: tuple[str, ...] | None = None):
+        self.nombre = nombre
+        self.attr = attr or nombre
+        self.fecha = fecha
+        self.fn = fn
+        if columnas is None:
+            columnas = () if fn is not None else (self.attr,)
+        self.columnas = tuple(columnas)
+
+
+class Esquema:
+    """
+    `preparar(objs, campos)`, si se indica, corre antes de serializar (p. ej.
+    para completar datos en lote).
+    """
+    def __init__(self, nombre: str, campos: list[Campo], preparar=None):
+        self.nombre = nombre
+        self.campos = {c.nombre: c for c in campos}
+        self.preparar = preparar
+        self._compilados = {}
+        self._todos = self._compilar(tuple(self.campos))
+
+    def nombres(self) -> tuple[str, ...]:
+        return tuple(self.campos)
+
+    def columnas(self, campos) -> tuple[str, ...]:
+        """Atributos del modelo necesarios para serializar `campos`."""
+        vistos = {}
+        for n in campos:
+            for a in self.campos[n].columnas:
+                vistos[a] = None
+        return tuple(vistos)
+
+    def load_only(self, model, campos) -> list:
+        """
+        Opciones de carga para `?fields=`: solo se seleccionan las columnas
+        pedidas; el resto (incluidas las column_property calculadas) queda
+        diferido y la BD no las evalúa.
+        """
+        if campos is None:
+            return []
+        cols = self.columnas(campos) or ("id",)
+        return [load_only(*(getattr(model, a) for a in cols))]
+
+    def dump(self, obj, campos=None) -> dict | None:
+        if obj is None:
+            return None
+        f = self._todos if campos is None else self._funcion(campos)
+        if self.preparar is not None:
+            self.preparar((obj,), campos)
+        return f(obj)
+
+    def dump_many(self, objs, campos=None) -> list[dict]:
+        f = self._todos if campos is None else self._funcion(campos)
+        if self.preparar is not None:
+            objs = list(objs)
+            self.preparar(objs, campos)
+        return [f(o) for o in objs]
+
+    def _funcion(self, campos):
+        key = tuple(campos)
+        f = self._compilados.get(key)
+        if f is None:
+            f = self._compilar(key)
+            self._compilados[key] = f
+        return f
+
+    def _compilar(self, nombres: tuple[str, ...]):
+        """
+        Genera `def _dump(o): return {"id": o.id, ...}` para los campos pedidos.
+        """
+        ns = {"_dt": _dt}
+        partes = []
+        for i, n in enumerate(nombres):
+            c = self.campos.get(n)
+            if c is None:
+                raise KeyError(f"{self.nombre}: campo desconocido '{n}'")
+            if c.fn is not None:
+                ns[f"_f{i}"] = c.fn
+                expr = f"_f{i}(o)"
+            elif c.fecha:
+                expr = f"_dt(o.{c.attr})"
+            else:
+                expr = f"o.{c.attr}"
+            partes.append(f"{n!r}: {expr}")
+        src = "def _dump(o):\n    return {" + ", ".join(partes) + "}\n"
+        exec(compile(src, f"<esquema {self.nombre}>", "exec"), ns)
+        return ns["_dump"]
+
+
+# -------------------------
+# ESQUEMAS
+# -------------------------
+def _preparar_version(objs, campos):
+    # Snapshots en modo delta: completa los campos heredados de la base
+    if campos is None or any(f in CAMPOS_DELTA for f in campos):
+        materializar(objs)
+
+
+_DELTA = ("campos_heredados", "delta_base_id")
+
+VERSION = Esquema("version", [
+    Campo("id"),
+    Campo("sesion_id"),
+    Campo("catalogo_id"),
+    Campo("producto_id"),
+    Campo("version_num"),
+    Campo("estado"),
+    Campo("is_current"),
+    Campo("is_final"),
+    # snapshot
+    Campo("um"),
+    Campo("doc_x_bulto_caja", columnas=("doc_x_bulto_caja",) + _DELTA),
+    Campo("doc_x_paq"),
+    Campo("precio_exw"),
+    Campo("porc_desc"),
+    Campo("cant_bultos"),
+    Campo("peso_gr"),
+    Campo("largo_cm"),
+    Campo("ancho_cm"),
+    Campo("alto_cm"),
+    Campo("familia", columnas=("familia",) + _DELTA),
+    Campo("foto_key", columnas=("foto_key",) + _DELTA),
+    Campo("observaciones", columnas=("observaciones",) + _DELTA),
+    # calculados (column_property en BD)
+    Campo("precio_x_docena"),
+    Campo("precio_unidad_exw"),
+    Campo("subtotal_exw"),
+    Campo("volumen_paquete_cbm"),
+    Campo("cbm_total"),
+    Campo("cantidad_por_paquete"),
+    Campo("cantidad_unidades"),
+    Campo("peso_neto_kg"),
+    Campo("peso_bruto_kg"),
+    Campo("created_at", fecha=True),
+    Campo("updated_at", fecha=True),
+], preparar=_preparar_version)
+
+# Resumen de versión que viaja dentro de una sesión (`current_version`)
+VERSION_MIN = ("id", "version_num", "estado", "is_current", "is_final",
+               "precio_exw", "porc_desc", "subtotal_exw")
+
+PRODUCTO = Esquema("producto", [
+    Campo("id"),
+    Campo("nombre"),
+    Campo("um"),
+    Campo("doc_x_bulto_caja"),
+    Campo("doc_x_paq"),
+    Campo("precio_exw"),
+    Campo("familia"),
+    Campo("imagen_key"),
+    Campo("created_at", fecha=True),
+    Campo("updated_at", fecha=True),
+])
+
+CLIENTE = Esquema("cliente", [
+    Campo("id"),
+    Campo("tipo_doc"),
+    Campo("num_doc"),
+    Campo("nombre"),
+    Campo("descripcion"),
+    Campo("pais"),
+    Campo("ciudad"),
+    Campo("zona"),
+    Campo("direccion"),
+    Campo("clasificacion_riesgo"),
+    Campo("created_at", fecha=True),
+    Campo("updated_at", fecha=True),
+])
+
+SESION = Esquema("sesion", [
+    Campo("id"),
+    Campo("catalogo_id"),
+    Campo("etiqueta"),
+    Campo("is_active"),
+    Campo("current_version_id"),
+    Campo("created_at", fecha=True),
+    Campo("updated_at", fecha=True),
+])
+
+CATALOGO = Esquema("catalogo", [
+    Campo("id"),
+    Campo("cliente_id"),
+    Campo("producto_id"),
+    Campo("estado"),
+    Campo("final_version_id"),
+    Campo("created_at", fecha=True),
+    Campo("updated_at", fecha=True),
+    Campo("archivado_at", fecha=True),
+    # nombres para UI
+    Campo("cliente_nombre", columnas=("cliente_id",),
+          fn=lambda c: c.cliente.nombre if c.cliente else None),
+    Campo("producto_nombre", columnas=("producto_id",),
+          fn=lambda c: c.producto.nombre if c.producto else None),
+    # resumen de la final
+    Campo("final_version", columnas=("final_version_id",),
+          fn=lambda c: VERSION.dump(c.final_version) if c.final_version_id else None),
+])
+
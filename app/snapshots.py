@@ -0,0 +1,205 @@
+# app/snapshots.py
+"""
+Almacenamiento delta de snapshots de versión (opcional, VERSION_DELTA_STORAGE).
+
+Las versiones no iniciales de una sesión guardan como NULL los campos de
+`CAMPOS_DELTA` que coinciden con la versión base (version_num = 1) y marcan
+el bit correspondiente en `campos_heredados`. Se comprime contra la base y
+no contra la versión anterior para que leer sea una sola consulta (no hay
+que recorrer una cadena).
+
+Solo entran los campos descriptivos: los numéricos alimentan las columnas
+calculadas en SQL (precio_x_docena, subtotal_exw, cbm_total...) y deben
+estar en la fila.
+
+La lectura es transparente: el esquema VERSION llama a `materializar()`
+antes de serializar.
+"""
+import sqlalchemy as sa
+from flask import current_app
+from sqlalchemy.orm.attributes import set_committed_value
+
+from .models import db, CatalogoSesion, CatalogoSesionVersion
+
+CAMPOS_DELTA = ("doc_x_bulto_caja", "familia", "foto_key", "observaciones")
+BITS = {f: 1 << i for i, f in enumerate(CAMPOS_DELTA)}
+
+
+def activo() -> bool:
+    return bool(current_app.config.get("VERSION_DELTA_STORAGE"))
+
+
+def _base_de(sesion_id: int):
+    V = CatalogoSesionVersion
+    return db.session.execute(
+        sa.select(V.id, *(getattr(V, f) for f in CAMPOS_DELTA))
+        .where(V.sesion_id == sesion_id, V.version_num == 1)
+    ).first()
+
+
+def comprimir(v: CatalogoSesionVersion, base) -> None:
+    """Deja en NULL (heredados) los campos iguales a `base`."""
+    mask = 0
+    for f, bit in BITS.items():
+        valor = getattr(base, f)
+        if valor is not None and getattr(v, f) == valor:
+            mask |= bit
+            setattr(v, f, None)
+    v.campos_heredados = mask
+    v.delta_base_id = base.id if mask else None
+
+
+def comprimir_nueva(v: CatalogoSesionVersion) -> None:
+    """Para `crear_version`: comprime `v` contra la base de su sesión."""
+    if v.version_num == 1:
+        return
+    base = _base_de(v.sesion_id)
+    if base is not None:
+        comprimir(v, base)
+
+
+def _pendiente(v) -> bool:
+    # Un campo heredado nunca es NULL una vez completado (solo se comprime
+    # contra valores no nulos); se mira el estado cargado sin disparar lazy loads.
+    mask = v.campos_heredados
+    if not mask:
+        return False
+    cargado = sa.inspect(v).dict
+    return any(mask & bit and cargado.get(f) is None for f, bit in BITS.items())
+
+
+def materializar(versiones) -> None:
+    """
+    Completa en memoria los campos heredados (una consulta para todas las
+    bases). Usa set_committed_value: el objeto no queda "sucio" y un commit
+    posterior no reescribe los valores expandidos.
+    """
+    pend = [v for v in versiones if v is not None and _pendiente(v)]
+    if not pend:
+        return
+    V = CatalogoSesionVersion
+    ids = {v.delta_base_id for v in pend}
+    bases = {
+        r.id: r for r in db.session.execute(
+            sa.select(V.id, *(getattr(V, f) for f in CAMPOS_DELTA)).where(V.id.in_(ids))
+        )
+    }
+    for v in pend:
+        b = bases.get(v.delta_base_id)
+        if b is None:
+            continue
+        for f, bit in BITS.items():
+            if v.campos_heredados & bit:
+                set_committed_value(v, f, getattr(b, f))
+
+
+def antes_de_editar(v: CatalogoSesionVersion, campos) -> None:
+    """
+    Para `editar_version`, antes de asignar `campos`:
+      - los campos delta editados dejan de heredarse en `v`;
+      - si `v` es base de otras versiones, esas pasan a guardar el valor
+        actual, para no heredar el nuevo.
+    """
+    tocados = [f for f in CAMPOS_DELTA if f in campos]
+    if not tocados:
+        return
+    t = CatalogoSesionVersion.__table__
+
+    if v.version_num == 1:
+        materializar([v])
+        for f in tocados:
+            bit = BITS[f]
+            db.session.execute(
+                sa.update(t)
+                .where(t.c.delta_base_id == v.id, t.c.campos_heredados.op("&")(bit) != 0)
+                .values({f: getattr(v, f), "campos_heredados": t.c.campos_heredados - bit})
+            )
+        db.session.execute(
+            sa.update(t)
+            .where(t.c.delta_base_id == v.id, t.c.campos_heredados == 0)
+            .values(delta_base_id=None)
+        )
+
+    if v.campos_heredados:
+        for f in tocados:
+            if v.campos_heredados & BITS[f]:
+                v.campos_heredados -= BITS[f]
+        if not v.campos_heredados:
+            v.delta_base_id = None
+
+
+# -------------------------
+# COMPACTACIÓN (flask compact-versiones)
+# -------------------------
+def _lotes_de_sesiones(lote: int):
+    ultimo = 0
+    while True:
+        ids = db.session.scalars(
+            sa.select(CatalogoSesion.id)
+            .where(CatalogoSesion.id > ultimo)
+            .order_by(CatalogoSesion.id)
+            .limit(lote)
+        ).all()
+        if not ids:
+            return
+        yield ids
+        ultimo = ids[-1]
+
+
+def compactar(lote: int = 500) -> int:
+    """Convierte el histórico existente a delta. Devuelve campos comprimidos."""
+    t = CatalogoSesionVersion.__table__
+    k = t.alias("k")
+    total = 0
+    for ids in _lotes_de_sesiones(lote):
+        for f, bit in BITS.items():
+            res = db.session.execute(
+                sa.update(t)
+                .where(
+                    k.c.sesion_id == t.c.sesion_id,
+                    k.c.version_num == 1,
+                    t.c.version_num > 1,
+                    t.c.sesion_id.in_(ids),
+                    k.c[f].isnot(None),
+                    t.c[f] == k.c[f],
+                    t.c.campos_heredados.op("&")(bit) == 0,
+                )
+                .values({f: None, "campos_heredados": t.c.campos_heredados + bit, "delta_base_id": k.c.id})
+            )
+            total += res.rowcount or 0
+        db.session.commit()
+    return total
+
+
+def expandir_filas(donde) -> int:
+    """Vuelve a guardar el snapshot completo en las filas de `donde` (sin commit)."""
+    t = CatalogoSesionVersion.__table__
+    k = t.alias("k")
+    total = 0
+    for f, bit in BITS.items():
+        res = db.session.execute(
+            sa.update(t)
+            .where(
+                k.c.id == t.c.delta_base_id,
+                donde,
+                t.c.campos_heredados.op("&")(bit) != 0,
+            )
+            .values({f: k.c[f], "campos_heredados": t.c.campos_heredados - bit})
+        )
+        total += res.rowcount or 0
+    db.session.execute(
+        sa.update(t)
+        .where(donde, t.c.campos_heredados == 0, t.c.delta_base_id.isnot(None))
+        .values(delta_base_id=None)
+    )
+    return total
+
+
+def expandir(lote: int = 500) -> int:
+    """Inverso de `compactar`: vuelve a guardar el snapshot completo en cada fila."""
+    t = CatalogoSesionVersion.__table__
+    total = 0
+    for ids in _lotes_de_sesiones(lote):
+        total += expandir_filas(t.c.sesion_id.in_(ids))
+        db.session.commit()
+    return total
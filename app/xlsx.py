@@ -0,0 +1,105 @@
+# app/xlsx.py
+"""
+Escritor XLSX mínimo y en streaming (solo stdlib).
+
+Escribe la hoja fila por fila dentro del zip (`ZipFile.open(..., "w")`), sin
+armar el libro en memoria: la memoria no depende de la cantidad de filas.
+Strings inline (sin sharedStrings), números como número, una sola hoja,
+primera fila en negrita.
+"""
+import re
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+_INVALIDOS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>
+<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>
+</Types>"""
+
+_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>"""
+
+_WORKBOOK = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<sheets><sheet name="{hoja}" sheetId="1" r:id="rId1"/></sheets>
+</workbook>"""
+
+_WORKBOOK_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>
+</Relationships>"""
+
+# estilo 0: normal; 1: negrita
+_STYLES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><name val="Calibri"/></font></fonts>
+<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>
+<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>
+<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/><xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>
+</styleSheet>"""
+
+
+def _celda(v, estilo: str) -> str:
+    if v is None:
+        return "<c/>"
+    if isinstance(v, bool):
+        v = "Sí" if v else "No"
+    if isinstance(v, (int, float, Decimal)):
+        return f"<c{estilo}><v>{v}</v></c>"
+    if isinstance(v, (datetime, date)):
+        v = v.isoformat()
+    texto = escape(_INVALIDOS.sub("", str(v)))
+    return f'<c t="inlineStr"{estilo}><is><t xml:space="preserve">{texto}</t></is></c>'
+
+
+class EscritorXlsx:
+    """
+    with EscritorXlsx(path, "Cotización") as x:
+        x.fila(["Producto", "Precio"], negrita=True)
+        for ...: x.fila([...])
+    """
+    def __init__(self, path, hoja: str = "Hoja1"):
+        self._zip = zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED)
+        self._zip.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        self._zip.writestr("_rels/.rels", _RELS)
+        self._zip.writestr("xl/workbook.xml", _WORKBOOK.format(hoja=escape(hoja[:31])))
+        self._zip.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        self._zip.writestr("xl/styles.xml", _STYLES)
+        self._hoja = self._zip.open("xl/worksheets/sheet1.xml", "w", force_zip64=True)
+        self._escribir('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                       '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                       "<sheetData>")
+
+    def _escribir(self, s: str):
+        self._hoja.write(s.encode("utf-8"))
+
+    def fila(self, valores, negrita: bool = False):
+        estilo = ' s="1"' if negrita else ""
+        self._escribir("<row>" + "".join(_celda(v, estilo) for v in valores) + "</row>")
+
+    def cerrar(self):
+        self._escribir("</sheetData></worksheet>")
+        self._hoja.close()
+        self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if exc[0] is None:
+            self.cerrar()
+        else:
+            self._hoja.close()
+            self._zip.close()
@@ -0,0 +1,125 @@
+"""
+Benchmark: creación concurrente de versiones en una misma sesión.
+
+Compara la numeración anterior (FOR UPDATE sobre catálogo -> sesión -> última
+versión, luego MAX + 1) contra el contador `next_version_num` avanzado con
+UPDATE ... RETURNING que usa `crear_version`.
+
+Necesita PostgreSQL (los locks son el punto del benchmark). Crea sus propios
+datos en la BD indicada y los borra al terminar.
+
+Uso:
+    DATABASE_URL=postgresql+psycopg://... \
+    python benchmarks/bench_crear_version.py [--hilos 16] [--por-hilo 50]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlalchemy as sa  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.models import db, Catalogo, CatalogoSesion, CatalogoSesionVersion, Cliente, Producto  # noqa: E402
+from app.api.versiones import _reservar_version_num  # noqa: E402
+
+
+def legacy(sesion_id: int):
+    s = db.session.get(CatalogoSesion, sesion_id)
+    c = db.session.execute(
+        sa.select(Catalogo).where(Catalogo.id == s.catalogo_id).with_for_update()
+    ).scalar_one()
+    db.session.execute(
+        sa.select(CatalogoSesion).where(CatalogoSesion.id == s.id).with_for_update()
+    ).scalar_one()
+    last = db.session.scalar(
+        sa.select(CatalogoSesionVersion.version_num)
+        .where(CatalogoSesionVersion.sesion_id == s.id)
+        .order_by(CatalogoSesionVersion.version_num.desc())
+        .limit(1)
+        .with_for_update()
+    ) or 0
+    p = c.producto
+    return dict(version_num=last + 1, catalogo_id=c.id, producto_id=p.id, um=p.um,
+                doc_x_bulto_caja=p.doc_x_bulto_caja, doc_x_paq=p.doc_x_paq,
+                precio_exw=p.precio_exw, familia=p.familia, imagen_key=p.imagen_key)
+
+
+def nuevo(sesion_id: int):
+    return _reservar_version_num(sesion_id)
+
+
+def _crear(reservar, sesion_id: int):
+    r = reservar(sesion_id)
+    db.session.add(CatalogoSesionVersion(
+        sesion_id=sesion_id, catalogo_id=r["catalogo_id"], producto_id=r["producto_id"],
+        version_num=r["version_num"], estado="BORRADOR", is_final=False,
+        um=r["um"], doc_x_bulto_caja=r["doc_x_bulto_caja"], doc_x_paq=r["doc_x_paq"],
+        precio_exw=r["precio_exw"], familia=r["familia"], foto_key=r["imagen_key"],
+        cant_bultos=10,
+    ))
+    db.session.commit()
+
+
+def _preparar():
+    cli = Cliente(tipo_doc="RUC", num_doc="bench", nombre="bench")
+    prod = Producto(nombre="bench", um="DOC", doc_x_bulto_caja=5, doc_x_paq=10,
+                    precio_exw=1, familia="bench")
+    db.session.add_all([cli, prod])
+    db.session.flush()
+    cat = Catalogo(cliente_id=cli.id, producto_id=prod.id)
+    db.session.add(cat)
+    db.session.flush()
+    ses = CatalogoSesion(catalogo_id=cat.id)
+    db.session.add(ses)
+    db.session.commit()
+    return cli.id, prod.id, cat.id, ses.id
+
+
+def _limpiar(cli_id, prod_id, cat_id):
+    db.session.execute(sa.delete(Catalogo).where(Catalogo.id == cat_id))
+    db.session.execute(sa.delete(Cliente).where(Cliente.id == cli_id))
+    db.session.execute(sa.delete(Producto).where(Producto.id == prod_id))
+    db.session.commit()
+
+
+def correr(app, reservar, hilos: int, por_hilo: int) -> float:
+    with app.app_context():
+        cli_id, prod_id, cat_id, sesion_id = _preparar()
+
+    def trabajador():
+        with app.app_context():
+            for _ in range(por_hilo):
+                _crear(reservar, sesion_id)
+
+    ts = [threading.Thread(target=trabajador) for _ in range(hilos)]
+    t0 = time.perf_counter()
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    dt = time.perf_counter() - t0
+
+    with app.app_context():
+        _limpiar(cli_id, prod_id, cat_id)
+    return dt
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--hilos", type=int, default=16)
+    ap.add_argument("--por-hilo", type=int, default=50)
+    args = ap.parse_args()
+
+    app = create_app(config_overrides={"SQLALCHEMY_ENGINE_OPTIONS": {"pool_size": args.hilos + 2}})
+    total = args.hilos * args.por_hilo
+    for nombre, fn in (("FOR UPDATE x3 + MAX", legacy), ("UPDATE ... RETURNING", nuevo)):
+        dt = correr(app, fn, args.hilos, args.por_hilo)
+        print(f"{nombre:<22} {total / dt:8.1f} versiones/s ({total} en {dt:.2f}s, {args.hilos} hilos)")
+
+
+if __name__ == "__main__":
+    main()
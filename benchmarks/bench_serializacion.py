@@ -0,0 +1,114 @@
+"""
+Benchmark: codificación de una página de versiones (lista) a JSON.
+
+Compara el camino anterior (dict armado a mano + `_num` -> float + json stdlib,
+como hacía `jsonify` con el proveedor por defecto) contra `app.serializers`
++ `app.json_provider`.
+
+Uso:
+    python benchmarks/bench_serializacion.py [--per-page 100] [--repeticiones 2000]
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.serializers import VERSION  # noqa: E402
+from app.json_provider import dumps_bytes  # noqa: E402
+
+
+def _num(x):
+    return float(x) if x is not None else None
+
+
+def legacy_version_to_json(v) -> dict:
+    return {
+        "id": v.id,
+        "sesion_id": v.sesion_id,
+        "catalogo_id": v.catalogo_id,
+        "producto_id": v.producto_id,
+        "version_num": v.version_num,
+        "estado": v.estado,
+        "is_current": v.is_current,
+        "is_final": v.is_final,
+        "um": v.um,
+        "doc_x_bulto_caja": _num(v.doc_x_bulto_caja),
+        "doc_x_paq": _num(v.doc_x_paq),
+        "precio_exw": _num(v.precio_exw),
+        "porc_desc": _num(v.porc_desc),
+        "cant_bultos": _num(v.cant_bultos),
+        "peso_gr": _num(v.peso_gr),
+        "largo_cm": _num(v.largo_cm),
+        "ancho_cm": _num(v.ancho_cm),
+        "alto_cm": _num(v.alto_cm),
+        "familia": v.familia,
+        "foto_key": v.foto_key,
+        "observaciones": v.observaciones,
+        "precio_x_docena": _num(getattr(v, "precio_x_docena", None)),
+        "precio_unidad_exw": _num(getattr(v, "precio_unidad_exw", None)),
+        "subtotal_exw": _num(getattr(v, "subtotal_exw", None)),
+        "volumen_paquete_cbm": _num(getattr(v, "volumen_paquete_cbm", None)),
+        "cbm_total": _num(getattr(v, "cbm_total", None)),
+        "cantidad_por_paquete": _num(getattr(v, "cantidad_por_paquete", None)),
+        "cantidad_unidades": _num(getattr(v, "cantidad_unidades", None)),
+        "peso_neto_kg": _num(getattr(v, "peso_neto_kg", None)),
+        "peso_bruto_kg": _num(getattr(v, "peso_bruto_kg", None)),
+        "created_at": v.created_at.isoformat() if v.created_at else None,
+    }
+
+
+def fila(i: int):
+    """
+    Fila con los tipos que devuelve psycopg (NUMERIC -> Decimal). No es el
+    modelo: `is_current` es el valor que ya trae la consulta (column_property).
+    """
+    return SimpleNamespace(
+        id=i, sesion_id=1000 + i // 5, catalogo_id=500 + i // 10, producto_id=7,
+        version_num=i % 5 + 1, estado="ENVIADA", is_current=i % 5 == 0, is_final=False,
+        um="DOC", doc_x_bulto_caja=Decimal("5.00"), doc_x_paq=Decimal("10.00"),
+        precio_exw=Decimal("12.3456"), porc_desc=Decimal("0.0750"),
+        cant_bultos=Decimal("80.00"), peso_gr=Decimal("35.50"),
+        largo_cm=Decimal("40.00"), ancho_cm=Decimal("30.00"), alto_cm=Decimal("25.00"),
+        familia="Limpieza", foto_key=f"productos/{i:06d}/foto.jpg",
+        observaciones="Oferta con descuento por volumen",
+        precio_x_docena=Decimal("11.42"), precio_unidad_exw=Decimal("0.95166666666666666667"),
+        subtotal_exw=Decimal("761.3333333333333333360"),
+        volumen_paquete_cbm=Decimal("0.030000000"), cbm_total=Decimal("2.400000000"),
+        cantidad_por_paquete=Decimal("120.00"), cantidad_unidades=Decimal("9600.0000"),
+        peso_neto_kg=Decimal("340.8000000000000000"), peso_bruto_kg=Decimal("460.8000000000000000"),
+        created_at=datetime(2024, 2, 5, 10, 0, tzinfo=timezone.utc),
+        updated_at=datetime(2024, 2, 6, 9, 30, tzinfo=timezone.utc),
+        campos_heredados=0, delta_base_id=None,  # snapshot completo: nada que materializar
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--per-page", type=int, default=100)
+    ap.add_argument("--repeticiones", type=int, default=2000)
+    args = ap.parse_args()
+
+    items = [fila(i) for i in range(args.per_page)]
+
+    def legacy():
+        payload = {"data": [legacy_version_to_json(v) for v in items], "page": 1, "per_page": len(items)}
+        return json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+    def nuevo():
+        payload = {"data": VERSION.dump_many(items), "page": 1, "per_page": len(items)}
+        return dumps_bytes(payload)
+
+    for nombre, fn in (("actual (_num + json)", legacy), ("esquema + json_provider", nuevo)):
+        t = timeit.timeit(fn, number=args.repeticiones)
+        print(f"{nombre:<26} {t / args.repeticiones * 1e3:8.3f} ms/página "
+              f"({args.per_page} filas, {len(fn())} bytes)")
+
+
+if __name__ == "__main__":
+    main()
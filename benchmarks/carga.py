@@ -0,0 +1,293 @@
+"""
+Benchmark de carga de la API con p50/p95/p99 por escenario y comparación
+contra una línea base.
+
+Escenarios: listar catálogos, detalle, búsqueda, listar versiones de una
+sesión, crear versión y aprobar (crear -> enviar -> aprobar sobre un catálogo
+EN_PROCESO distinto cada vez; se mide solo la aprobación).
+
+Modos:
+  --modo cliente  app real vía Flask test client (sin red; aísla app + BD)
+  --modo http     contra un servidor levantado sin límite de tasa (si no,
+                  los 429 se cuentan como errores), p. ej.:
+                  RATELIMIT_ENABLED=0 gunicorn wsgi:app -c gunicorn.conf.py -b :8000 --workers 4
+                  python benchmarks/carga.py --modo http --url http://localhost:8000
+
+La BD se toma de DATABASE_URL. Para poblarla: benchmarks/dataset.py (o
+--sembrar aquí mismo).
+
+Línea base:
+  --guardar-baseline            escribe el resultado en --baseline
+  --baseline benchmarks/baseline.json --umbral 0.20
+                                sale con código 1 si el p95 de algún
+                                escenario empeora más de un 20%
+  --max-errores 0.01            también sale con código 1 (y no guarda la
+                                línea base) si algún escenario tiene más de
+                                un 1% de respuestas >= 400; esas respuestas
+                                no entran en los percentiles
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlalchemy as sa  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.models import db, Catalogo, CatalogoSesion, Usuario  # noqa: E402
+from app.security import hash_pwd  # noqa: E402
+
+EMAIL, PASSWORD = "bench@envaperu.local", "Bench!12345"
+BUSQUEDAS = ("ma", "ri", "to", "sa", "len", "per", "qui", "lux")
+
+
+# ---------------------------
+# Clientes (test client / HTTP) con la misma interfaz
+# ---------------------------
+class ClienteFlask:
+    def __init__(self, app, headers):
+        self.c = app.test_client()
+        self.h = headers
+
+    def get(self, url):
+        r = self.c.get(url, headers=self.h)
+        return r.status_code, r.get_json(silent=True)
+
+    def post(self, url, body=None):
+        r = self.c.post(url, headers=self.h, json=body or {})
+        return r.status_code, r.get_json(silent=True)
+
+
+class ClienteHTTP:
+    def __init__(self, base, headers):
+        import requests
+        self.s = requests.Session()
+        self.s.headers.update(headers)
+        self.base = base.rstrip("/")
+
+    def get(self, url):
+        r = self.s.get(self.base + url)
+        return r.status_code, r.json() if r.content else None
+
+    def post(self, url, body=None):
+        r = self.s.post(self.base + url, json=body or {})
+        return r.status_code, r.json() if r.content else None
+
+
+def _usuario_bench(app):
+    with app.app_context():
+        if not db.session.scalar(sa.select(Usuario.id).where(Usuario.email == EMAIL)):
+            db.session.add(Usuario(email=EMAIL, pass_hash=hash_pwd(PASSWORD), nombre="Benchmark"))
+            db.session.commit()
+
+
+def _token(login) -> dict:
+    status, body = login("/api/auth/login", {"email": EMAIL, "password": PASSWORD})
+    assert status == 200, body
+    return {"Authorization": f"Bearer {body['access_token']}"}
+
+
+# ---------------------------
+# Datos de entrada (ids reales de la BD)
+# ---------------------------
+def _pools(app, rng, n=5_000):
+    with app.app_context():
+        cats = db.session.scalars(sa.select(Catalogo.id).order_by(sa.func.random()).limit(n)).all()
+        abiertas = db.session.scalars(
+            sa.select(CatalogoSesion.id)
+            .join(Catalogo, Catalogo.id == CatalogoSesion.catalogo_id)
+            .where(Catalogo.estado == "EN_PROCESO")
+            .order_by(sa.func.random()).limit(n)
+        ).all()
+    if not cats or not abiertas:
+        sys.exit("BD vacía: poblarla con benchmarks/dataset.py o --sembrar")
+    # cada aprobación consume un catálogo: sesiones de catálogos distintos
+    por_catalogo = {}
+    with app.app_context():
+        for sid, cid in db.session.execute(
+            sa.select(CatalogoSesion.id, CatalogoSesion.catalogo_id).where(CatalogoSesion.id.in_(abiertas))
+        ):
+            por_catalogo.setdefault(cid, sid)
+    aprobables = list(por_catalogo.values())
+    rng.shuffle(aprobables)
+    return {"catalogos": cats, "sesiones": abiertas, "aprobables": aprobables}
+
+
+def escenarios(pools, rng):
+    lock = threading.Lock()
+
+    def listar(c):
+        return c.get(f"/api/catalogos?page={rng.randint(1, 50)}&per_page=50")
+
+    def detalle(c):
+        return c.get(f"/api/catalogos/{rng.choice(pools['catalogos'])}")
+
+    def buscar(c):
+        return c.get(f"/api/catalogos?search={rng.choice(BUSQUEDAS)}")
+
+    def versiones(c):
+        return c.get(f"/api/sesiones/{rng.choice(pools['sesiones'])}/versiones")
+
+    def crear_version(c):
+        return c.post(f"/api/sesiones/{rng.choice(pools['sesiones'])}/versiones", {"cant_bultos": 10})
+
+    def aprobar(c):
+        with lock:
+            if not pools["aprobables"]:
+                return None
+            sid = pools["aprobables"].pop()
+        status, v = c.post(f"/api/sesiones/{sid}/versiones", {"cant_bultos": 10})
+        if status != 201:
+            return status, v
+        c.post(f"/api/versiones/{v['id']}/enviar")
+        t0 = time.perf_counter()
+        res = c.post(f"/api/versiones/{v['id']}/aprobar")
+        return res, time.perf_counter() - t0
+
+    return {"listar": listar, "detalle": detalle, "buscar": buscar,
+            "versiones": versiones, "crear_version": crear_version, "aprobar": aprobar}
+
+
+# ---------------------------
+# Ejecución y reporte
+# ---------------------------
+def _percentil(ordenados, p):
+    if not ordenados:
+        return None
+    k = max(0, min(len(ordenados) - 1, round(p / 100 * len(ordenados) + 0.5) - 1))
+    return ordenados[k]
+
+
+def correr(fn, clientes, iteraciones):
+    lat, errores = [], 0
+    lock = threading.Lock()
+    restantes = [iteraciones]
+
+    def trabajador(c):
+        nonlocal errores
+        while True:
+            with lock:
+                if restantes[0] <= 0:
+                    return
+                restantes[0] -= 1
+            t0 = time.perf_counter()
+            res = fn(c)
+            dt = time.perf_counter() - t0
+            if res is None:
+                return
+            if isinstance(res[1], float):  # escenario que mide solo un tramo
+                res, dt = res
+            with lock:
+                # un 4xx/5xx rápido no es latencia de la API: solo se cuenta
+                if res[0] >= 400:
+                    errores += 1
+                else:
+                    lat.append(dt * 1000)
+
+    ts = [threading.Thread(target=trabajador, args=(c,)) for c in clientes]
+    t0 = time.perf_counter()
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    total = time.perf_counter() - t0
+    lat.sort()
+    return {
+        "n": len(lat) + errores, "errores": errores, "rps": round(len(lat) / total, 1) if total else None,
+        "p50": _percentil(lat, 50), "p95": _percentil(lat, 95), "p99": _percentil(lat, 99),
+    }
+
+
+def con_errores(actual: dict, maximo: float) -> list[str]:
+    return [
+        f"{nombre}: {r['errores']}/{r['n']} respuestas con error"
+        for nombre, r in actual.items()
+        if r["n"] and r["errores"] / r["n"] > maximo
+    ]
+
+
+def comparar(actual: dict, base: dict, umbral: float) -> list[str]:
+    regresiones = []
+    for nombre, r in actual.items():
+        b = base.get(nombre)
+        if not b or not b.get("p95") or r["p95"] is None:
+            continue
+        if r["p95"] > b["p95"] * (1 + umbral):
+            regresiones.append(f"{nombre}: p95 {r['p95']:.1f} ms vs base {b['p95']:.1f} ms")
+    return regresiones
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--modo", choices=("cliente", "http"), default="cliente")
+    ap.add_argument("--url", default="http://localhost:8000")
+    ap.add_argument("--escenarios", default="listar,detalle,buscar,versiones,crear_version,aprobar")
+    ap.add_argument("--iteraciones", type=int, default=300)
+    ap.add_argument("--concurrencia", type=int, default=4)
+    ap.add_argument("--semilla", type=int, default=7)
+    ap.add_argument("--sembrar", choices=("chica", "mediana", "grande", "xl"))
+    ap.add_argument("--baseline", default=os.path.join(os.path.dirname(__file__), "baseline.json"))
+    ap.add_argument("--guardar-baseline", action="store_true")
+    ap.add_argument("--umbral", type=float, default=0.20)
+    ap.add_argument("--max-errores", type=float, default=0.01,
+                    help="fracción de respuestas >= 400 tolerada por escenario")
+    args = ap.parse_args()
+
+    rng = random.Random(args.semilla)
+    app = create_app(config_overrides={
+        "DB_DETECT_N1": False, "RESUMEN_REFRESH_ON_APPROVE": False, "RATELIMIT_ENABLED": False,
+    })
+
+    if args.sembrar:
+        from app.seed import ESCALAS, sembrar
+        with app.app_context():
+            sembrar(**ESCALAS[args.sembrar])
+
+    _usuario_bench(app)
+    if args.modo == "cliente":
+        headers = _token(ClienteFlask(app, {}).post)
+        clientes = [ClienteFlask(app, headers) for _ in range(args.concurrencia)]
+    else:
+        headers = _token(ClienteHTTP(args.url, {}).post)
+        clientes = [ClienteHTTP(args.url, headers) for _ in range(args.concurrencia)]
+
+    pools = _pools(app, rng)
+    todos = escenarios(pools, rng)
+    resultados = {}
+    print(f"{'escenario':<14} {'n':>6} {'err':>4} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}  (ms)")
+    for nombre in args.escenarios.split(","):
+        r = correr(todos[nombre], clientes, args.iteraciones)
+        resultados[nombre] = r
+        fmt = lambda x: f"{x:8.1f}" if x is not None else "       -"  # noqa: E731
+        print(f"{nombre:<14} {r['n']:>6} {r['errores']:>4} {r['rps'] or 0:>8} "
+              f"{fmt(r['p50'])} {fmt(r['p95'])} {fmt(r['p99'])}")
+
+    fallidos = con_errores(resultados, args.max_errores)
+    for f in fallidos:
+        print("ERRORES", f)
+    if fallidos:
+        sys.exit(1)
+
+    if args.guardar_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"modo": args.modo, "concurrencia": args.concurrencia,
+                       "escenarios": resultados}, f, indent=2)
+        print(f"línea base guardada en {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            base = json.load(f)
+        regresiones = comparar(resultados, base["escenarios"], args.umbral)
+        for r in regresiones:
+            print("REGRESIÓN", r)
+        if regresiones:
+            sys.exit(1)
+        print(f"sin regresiones (umbral p95 +{args.umbral:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Puebla la BD de benchmarks (DATABASE_URL). Atajo de `flask seed`; ver
+app/seed.py.
+
+Uso:
+    python benchmarks/dataset.py --escala grande [--semilla 42] [--workers 4]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from app.seed import ESCALAS, sembrar  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--escala", choices=ESCALAS, default="chica")
+    ap.add_argument("--clientes", type=int)
+    ap.add_argument("--productos", type=int)
+    ap.add_argument("--catalogos", type=int)
+    ap.add_argument("--semilla", type=int, default=42)
+    ap.add_argument("--workers", type=int, default=4)
+    args = ap.parse_args()
+
+    tam = dict(ESCALAS[args.escala])
+    for k in tam:
+        if getattr(args, k):
+            tam[k] = getattr(args, k)
+    app = create_app()
+    with app.app_context():
+        print(sembrar(**tam, semilla=args.semilla, workers=args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+# gunicorn.conf.py
+# Métricas Prometheus multiproceso (app/metrics.py): cada worker escribe en
+# PROMETHEUS_MULTIPROC_DIR y /metrics agrega. Debe definirse antes de que los
+# workers importen prometheus_client.
+import os
+import shutil
+
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus_multiproc")
+
+# Workers gevent (Procfile): gunicorn parchea la stdlib en cada worker antes de
+# cargar la app, y psycopg, importado después, elige esperas cooperativas en
+# vez de wait_c (que bloquearía el worker entero mientras espera a PostgreSQL).
+# Con preload_app la app (y psycopg) se importaría en el master, sin parchear.
+preload_app = False
+
+
+def on_starting(server):
+    d = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(d, ignore_errors=True)  # valores de un arranque anterior
+    os.makedirs(d, exist_ok=True)
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def post_worker_init(worker):
+    if worker.__class__.__name__.startswith("Gevent"):
+        from psycopg import waiting
+        if waiting.wait is getattr(waiting, "wait_c", None):
+            raise RuntimeError("psycopg importado antes del parche de gevent: usa wait_c")
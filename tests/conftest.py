@@ -1,7 +1,10 @@
 import os
+from contextlib import contextmanager
+
 import pytest
 from app import create_app
 from app.models import db, Cliente, Producto
+from app.instrumentacion import contar_consultas
 from dotenv import load_dotenv
 import sqlalchemy as sa
 
@@ -70,6 +73,14 @@ def _reset_db_per_test(app):
 
 
 
+@pytest.fixture()
+def solo_pg(app):
+    """Para tests de SQL propio de PostgreSQL (triggers, NOTIFY, locks, MVs)."""
+    with app.app_context():
+        if db.engine.dialect.name != "postgresql":
+            pytest.skip("requiere PostgreSQL")
+
+
 @pytest.fixture()
 def client(app):
     return app.test_client()
@@ -122,3 +133,18 @@ def seed_cliente_producto(app):
         db.session.add_all([c, p])
         db.session.commit()
         return {"cliente_id": c.id, "producto_id": p.id}
+
+
+@pytest.fixture()
+def max_queries():
+    """
+    with max_queries(3):
+        client.get("/api/catalogos", headers=auth_headers)
+    """
+    @contextmanager
+    def _max(n: int):
+        with contar_consultas() as stats:
+            yield stats
+        detalle = "\n".join(f"{v}x {sql}" for sql, v in stats.sentencias.most_common())
+        assert stats.n <= n, f"{stats.n} consultas (máximo {n}):\n{detalle}"
+    return _max
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta, timezone
+
+import sqlalchemy as sa
+from flask import url_for
+
+from app.archivo import archivar
+from app.models import db, Cambio, Catalogo, CatalogoSesionVersion
+
+
+def _contar(modelo):
+    return db.session.scalar(sa.select(sa.func.count()).select_from(modelo))
+
+
+def test_archivar_y_leer_a_traves(app, client, auth_headers, seed_cliente_producto, monkeypatch):
+    monkeypatch.setitem(app.config, "VERSION_DELTA_STORAGE", True)
+    cat = client.post("/api/catalogos", headers=auth_headers, json=seed_cliente_producto).get_json()
+    s1 = client.get(f"/api/catalogos/{cat['id']}/sesiones", headers=auth_headers).get_json()["data"][0]["id"]
+    s2 = client.post(f"/api/catalogos/{cat['id']}/sesiones", headers=auth_headers,
+                     json={"etiqueta": "alternativa"}).get_json()["id"]
+
+    url = f"/api/sesiones/{s1}/versiones"
+    v1, v2, v3 = (client.post(url, headers=auth_headers, json={"cant_bultos": n, "observaciones": "oferta"})
+                  .get_json()["id"] for n in (10, 12, 14))
+    v4 = client.post(f"/api/sesiones/{s2}/versiones", headers=auth_headers, json={"cant_bultos": 1}).get_json()["id"]
+    client.post(f"/api/versiones/{v3}/enviar", headers=auth_headers)
+    assert client.post(f"/api/versiones/{v3}/aprobar", headers=auth_headers).status_code == 200
+
+    # recién cerrado: todavía no se archiva
+    with app.app_context():
+        assert archivar(12, log=lambda *_: None)["catalogos"] == 0
+        db.session.execute(sa.update(Catalogo).values(
+            updated_at=datetime.now(timezone.utc) - timedelta(days=800)))
+        db.session.commit()
+        cambios = _contar(Cambio)
+
+        t = archivar(12, lote=1, log=lambda *_: None)
+        assert t == {"catalogos": 1, "sesiones": 1, "versiones": 3}
+        # en caliente queda la final (con snapshot completo: su base se fue)
+        final = db.session.get(CatalogoSesionVersion, v3)
+        assert _contar(CatalogoSesionVersion) == 1 and final.delta_base_id is None
+        assert _contar(Cambio) == cambios
+        assert archivar(12, log=lambda *_: None)["catalogos"] == 0
+
+    r = client.get(f"/api/versiones/{v2}", headers=auth_headers)
+    assert r.status_code == 200 and r.get_json()["observaciones"] == "oferta"
+    assert r.get_json()["subtotal_exw"] is not None and r.get_json()["is_current"] is False
+    assert client.get(f"/api/catalogos/{cat['id']}/final", headers=auth_headers).get_json()["id"] == v3
+
+    r = client.get(f"/api/sesiones/{s1}/versiones?fields=id", headers=auth_headers)
+    assert [d["id"] for d in r.get_json()["data"]] == [v3, v2, v1]
+    r = client.get(f"/api/sesiones/{s2}/versiones", headers=auth_headers)
+    assert [d["id"] for d in r.get_json()["data"]] == [v4]
+
+    body = client.get(f"/api/versiones?ids={v1},{v3},999", headers=auth_headers).get_json()
+    assert [d and d["id"] for d in body["data"]] == [v1, v3, None] and body["no_encontrados"] == [999]
+    r = client.get(f"/api/versiones/{v1}/diff/{v3}", headers=auth_headers)
+    assert r.get_json()["cambios"]["cant_bultos"]["delta"] == 4
+    r = client.get(f"/api/sesiones/{s1}/versiones/timeline", headers=auth_headers)
+    assert r.get_json()["base"]["id"] == v1 and len(r.get_json()["pasos"]) == 2
+
+    # las sesiones archivadas siguen existiendo
+    with app.test_request_context():
+        url_sesion = url_for("api.sesiones.obtener_sesion", sesion_id=s2)
+    r = client.get(f"{url_sesion}?with_current=true", headers=auth_headers)
+    assert r.status_code == 200 and r.get_json()["etiqueta"] == "alternativa"
+    assert r.get_json()["current_version"] is None
+    r = client.get(f"/api/catalogos/{cat['id']}/sesiones?with_current=true", headers=auth_headers)
+    assert [d["id"] for d in r.get_json()["data"]] == [s2, s1]
+    r = client.get(f"/api/catalogos/{cat['id']}/sesiones?is_active=true&per_page=1&page=2", headers=auth_headers)
+    assert [d["id"] for d in r.get_json()["data"]] == [s1]
+
+    r = client.get(f"/api/catalogos/{cat['id']}?expand=sesiones.current,sesiones.versiones", headers=auth_headers)
+    d = r.get_json()
+    assert d["sesiones_total"] == 2 and [x["id"] for x in d["sesiones"]] == [s2, s1]
+    assert [v["id"] for v in d["sesiones"][0]["versiones"]] == [v4]
+    assert [v["id"] for v in d["sesiones"][1]["versiones"]] == [v3, v2, v1]
+    assert d["sesiones"][1]["versiones_total"] == 3 and d["sesiones"][1]["current_version"]["id"] == v3
@@ -0,0 +1,32 @@
+def test_feed_de_cambios(client, auth_headers, seed_cliente_producto):
+    inicio = client.get("/api/changes", headers=auth_headers).get_json()["cursor"]
+
+    cat = client.post("/api/catalogos", headers=auth_headers, json=seed_cliente_producto).get_json()
+    pid = seed_cliente_producto["producto_id"]
+    client.patch(f"/api/productos/{pid}", headers=auth_headers, json={"nombre": "Detergente Max"})
+
+    r = client.get(f"/api/changes?since={inicio}", headers=auth_headers)
+    body = r.get_json()
+    assert body["mas"] is False
+    assert [c["id"] for c in body["cambios"]["catalogo"]["upserts"]] == [cat["id"]]
+    assert body["cambios"]["producto"]["upserts"][0]["nombre"] == "Detergente Max"
+    assert body["cambios"]["producto"]["upserts"][0]["updated_at"]
+    assert len(body["cambios"]["catalogo_sesion"]["upserts"]) == 1
+
+    # en lotes: limit=1 avanza de a un cambio
+    r = client.get(f"/api/changes?since={inicio}&limit=1", headers=auth_headers)
+    assert r.get_json()["mas"] is True
+
+    cursor = body["cursor"]
+    cid = client.post("/api/clientes", headers=auth_headers,
+                      json={"tipo_doc": "DNI", "num_doc": "123", "nombre": "Temporal"}).get_json()["id"]
+    client.delete(f"/api/clientes/{cid}", headers=auth_headers)
+    body = client.get(f"/api/changes?since={cursor}", headers=auth_headers).get_json()
+    assert body["cambios"] == {"cliente": {"upserts": [], "deletes": [cid]}}
+
+    # sin cambios nuevos el cursor no se mueve
+    again = client.get(f"/api/changes?since={body['cursor']}", headers=auth_headers).get_json()
+    assert again["cambios"] == {} and again["cursor"] == body["cursor"]
+
+    assert client.get("/api/changes?since=abc", headers=auth_headers).status_code == 400
+    assert client.get("/api/changes?since=0:999999", headers=auth_headers).status_code == 410
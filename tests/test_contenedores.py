@@ -0,0 +1,41 @@
+from app.contenedores import Linea, planificar
+
+PERFILES = {"20": {"cbm": 33.2, "kg": 28200}, "40HC": {"cbm": 76.3, "kg": 26500}}
+
+def test_planificar_reparte_por_bultos():
+    # 1000 bultos de 0.1 m³ = 100 m³ -> 2 x 40HC; el resto (23.7 m³) entra en un 20'
+    lineas = [Linea(1, 1, 1, 600, 0.1, 10), Linea(2, 2, 2, 400, 0.1, 5)]
+    plan = planificar(lineas, PERFILES, factor=1.0)
+
+    assert plan["totales"]["bultos"] == 1000
+    p40 = next(p for p in plan["planes"] if p["perfil"] == "40HC")
+    assert p40["cantidad"] == 2
+    assert sum(i["bultos"] for c in p40["contenedores"] for i in c["items"]) == 1000
+    assert all(c["llenado_cbm"] <= 1 for c in p40["contenedores"])
+
+    rec = plan["recomendado"]["contenedores"]
+    assert rec[0]["perfil"] == "40HC"
+    assert rec[-1]["perfil"] == "20"
+
+def test_planificar_endpoint_sin_finales(client, auth_headers, seed_cliente_producto):
+    r = client.post("/api/logistica/contenedores", headers=auth_headers,
+                    json={"cliente_id": seed_cliente_producto["cliente_id"]})
+    assert r.status_code == 200, r.text
+    assert r.get_json()["totales"]["lineas"] == 0
+
+    r = client.post("/api/logistica/contenedores", headers=auth_headers, json={})
+    assert r.status_code == 400
+
+def test_no_caben_por_perfil():
+    # un bulto de 50 m³ no entra en un 20' pero sí en un 40HC, en cualquier orden de perfiles
+    lineas = [Linea(1, 1, 1, 1, 1, 1), Linea(2, 2, 2, 1, 50, 100), Linea(3, 3, 3, 1, 90, 100)]
+    for perfiles in (PERFILES, dict(reversed(PERFILES.items()))):
+        plan = planificar(lineas, perfiles, factor=1.0)
+        por_perfil = {p["perfil"]: p["no_caben"] for p in plan["planes"]}
+        assert por_perfil == {"20": [3, 2], "40HC": [3]}
+        assert plan["no_caben"] == [3]
+
+
+def test_cliente_id_invalido(client, auth_headers):
+    r = client.post("/api/logistica/contenedores", headers=auth_headers, json={"cliente_id": "abc"})
+    assert r.status_code == 400
@@ -0,0 +1,39 @@
+from app.models import db, Cliente
+
+
+def test_count_y_facets_clientes(app, client, auth_headers):
+    with app.app_context():
+        db.session.add_all([
+            Cliente(tipo_doc="RUC", num_doc=f"20{i:09d}", nombre=f"Cliente {i}",
+                    pais="PE" if i < 3 else "CL", ciudad="Lima" if i < 2 else "Otra")
+            for i in range(5)
+        ])
+        db.session.commit()
+
+    r = client.get("/api/clientes?per_page=2", headers=auth_headers)
+    assert "total" not in r.get_json()
+
+    r = client.get("/api/clientes?per_page=2&count=exact&pais=PE", headers=auth_headers)
+    body = r.get_json()
+    assert len(body["data"]) == 2 and body["total"] == 3 and body["total_estimado"] is False
+
+    # estimate en tablas chicas (o fuera de Postgres) cuenta exacto
+    r = client.get("/api/clientes?count=estimate", headers=auth_headers)
+    assert r.get_json()["total"] == 5
+
+    r = client.get("/api/clientes?facets=pais,ciudad", headers=auth_headers)
+    f = r.get_json()["facets"]
+    assert f["pais"] == [{"valor": "PE", "n": 3}, {"valor": "CL", "n": 2}]
+    assert {d["valor"]: d["n"] for d in f["ciudad"]} == {"Lima": 2, "Otra": 3}
+
+    assert client.get("/api/clientes?count=todo", headers=auth_headers).status_code == 400
+    assert client.get("/api/clientes?facets=familia", headers=auth_headers).status_code == 400
+
+
+def test_facets_catalogos(client, auth_headers, seed_cliente_producto):
+    client.post("/api/catalogos", headers=auth_headers, json=seed_cliente_producto)
+    r = client.get("/api/catalogos?facets=estado,familia&count=exact", headers=auth_headers)
+    body = r.get_json()
+    assert body["total"] == 1
+    assert body["facets"]["estado"] == [{"valor": "EN_PROCESO", "n": 1}]
+    assert body["facets"]["familia"] == [{"valor": "Limpieza", "n": 1}]
@@ -0,0 +1,132 @@
+import io
+import time
+import zipfile
+from types import SimpleNamespace
+
+from app import cotizaciones
+
+
+def _esperar(client, headers, cid):
+    for _ in range(100):
+        body = client.get(f"/api/cotizaciones/{cid}", headers=headers).get_json()
+        if body["estado"] != "en_proceso":
+            return body
+        time.sleep(0.05)
+    raise AssertionError("la cotización no terminó")
+
+
+def _storage(monkeypatch):
+    """Supabase Storage en memoria: key -> bytes."""
+    objetos = {}
+
+    def subir(cfg, key, path, mimetype):
+        with open(path, "rb") as fh:
+            objetos[key] = fh.read()
+
+    monkeypatch.setattr(cotizaciones, "_subir", subir)
+    monkeypatch.setattr(cotizaciones, "_firmar_archivo", lambda cfg, key, nombre: f"https://storage.test/{key}")
+    return objetos
+
+
+def test_cotizacion_xlsx_cacheada(app, client, auth_headers, seed_cliente_producto, monkeypatch):
+    objetos = _storage(monkeypatch)
+    cat = client.post("/api/catalogos", headers=auth_headers, json=seed_cliente_producto).get_json()
+    sesion_id = client.get(f"/api/catalogos/{cat['id']}/sesiones", headers=auth_headers).get_json()["data"][0]["id"]
+    vid = client.post(f"/api/sesiones/{sesion_id}/versiones", headers=auth_headers,
+                      json={"cant_bultos": 10, "largo_cm": 40, "ancho_cm": 30, "alto_cm": 25}).get_json()["id"]
+    client.post(f"/api/versiones/{vid}/current", headers=auth_headers)
+
+    pedido = {"cliente_id": seed_cliente_producto["cliente_id"], "origen": "current"}
+    r = client.post("/api/cotizaciones", headers=auth_headers, json=pedido)
+    assert r.status_code == 202
+    body = _esperar(client, auth_headers, r.get_json()["id"])
+    assert body["estado"] == "listo"
+
+    r = client.get(body["url"], headers=auth_headers)
+    key = f"cotizaciones/{body['id']}"
+    assert r.status_code == 302 and r.headers["Location"] == f"https://storage.test/{key}"
+    hoja = zipfile.ZipFile(io.BytesIO(objetos[key])).read("xl/worksheets/sheet1.xml").decode()
+    assert "Detergente Pro X" in hoja and "TOTAL" in hoja
+
+    # mismas entradas: al instante; si cambia la versión, otra clave
+    r = client.post("/api/cotizaciones", headers=auth_headers, json=pedido)
+    assert r.status_code == 200 and r.get_json()["id"] == body["id"]
+    client.patch(f"/api/versiones/{vid}", headers=auth_headers, json={"cant_bultos": 11})
+    r = client.post("/api/cotizaciones", headers=auth_headers, json=pedido)
+    assert r.status_code == 202 and r.get_json()["id"] != body["id"]
+    _esperar(client, auth_headers, r.get_json()["id"])
+
+    assert client.post("/api/cotizaciones", headers=auth_headers,
+                       json={"cliente_id": 999}).status_code == 404
+
+
+def test_cotizacion_fallida_se_retoma(app, client, auth_headers, seed_cliente_producto, monkeypatch):
+    _storage(monkeypatch)
+
+    def caida(cfg, key, path, mimetype):
+        raise RuntimeError("storage caído")
+
+    monkeypatch.setattr(cotizaciones, "_subir", caida)
+    pedido = {"cliente_id": seed_cliente_producto["cliente_id"], "formato": "csv"}
+    cid = client.post("/api/cotizaciones", headers=auth_headers, json=pedido).get_json()["id"]
+    assert _esperar(client, auth_headers, cid)["estado"] == "error"
+    assert client.get(f"/api/cotizaciones/{cid}/archivo", headers=auth_headers).status_code == 404
+
+    # el siguiente pedido con las mismas entradas la vuelve a generar
+    monkeypatch.undo()
+    objetos = _storage(monkeypatch)
+    r = client.post("/api/cotizaciones", headers=auth_headers, json=pedido)
+    assert r.status_code == 202 and r.get_json()["id"] == cid
+    assert _esperar(client, auth_headers, cid)["estado"] == "listo"
+    assert b"TOTAL" in objetos[f"cotizaciones/{cid}"]
+
+
+def test_purge_cotizaciones(app, client, auth_headers, seed_cliente_producto, monkeypatch):
+    import sqlalchemy as sa
+    from app.models import db, Cotizacion
+
+    objetos = _storage(monkeypatch)
+    borrados = []
+
+    def borrar(cfg, keys):
+        borrados.extend(keys)
+        for k in keys:
+            objetos.pop(k, None)
+
+    monkeypatch.setattr(cotizaciones, "_borrar", borrar)
+    pedido = {"cliente_id": seed_cliente_producto["cliente_id"], "formato": "csv"}
+    vieja = client.post("/api/cotizaciones", headers=auth_headers, json=pedido).get_json()["id"]
+    assert _esperar(client, auth_headers, vieja)["estado"] == "listo"
+    nueva = client.post("/api/cotizaciones", headers=auth_headers,
+                        json={**pedido, "formato": "xlsx"}).get_json()["id"]
+    assert _esperar(client, auth_headers, nueva)["estado"] == "listo"
+    with app.app_context():
+        db.session.execute(sa.update(Cotizacion).where(Cotizacion.id == vieja)
+                           .values(updated_at=sa.func.datetime("now", "-2 days")
+                                   if db.engine.dialect.name == "sqlite"
+                                   else sa.text("now() - interval '2 days'")))
+        db.session.commit()
+
+    r = app.test_cli_runner().invoke(args=["purge-cotizaciones", "--horas", "24"])
+    assert r.exit_code == 0 and "1 cotizaciones borradas" in r.output, r.output
+    assert borrados == [f"cotizaciones/{vieja}"]
+    assert set(objetos) == {f"cotizaciones/{nueva}"}
+    assert client.get(f"/api/cotizaciones/{vieja}", headers=auth_headers).status_code == 404
+    assert client.get(f"/api/cotizaciones/{nueva}", headers=auth_headers).get_json()["estado"] == "listo"
+
+
+def test_imagenes_publicas_no_vencen(app, seed_cliente_producto, monkeypatch):
+    cfg = {**app.config, "SUPABASE_URL": "https://x.supabase.co/", "SUPABASE_BUCKET": "imgs",
+           "COTIZACION_IMAGEN_PUBLICA": True}
+    assert cotizaciones._firmar(cfg, ["a/1.png"]) == {
+        "a/1.png": "https://x.supabase.co/storage/v1/object/public/imgs/a/1.png"}
+    # la clave ya no cambia con el reloj (con URLs firmadas, sí)
+    cid = seed_cliente_producto["cliente_id"]
+    with app.app_context():
+        claves = []
+        for t in (0, 10 * cfg["COTIZACION_IMAGEN_TTL_S"]):
+            monkeypatch.setattr(cotizaciones, "time", SimpleNamespace(time=lambda t=t: t))
+            claves.append((cotizaciones.huella(cid, "final", "csv", cfg),
+                           cotizaciones.huella(cid, "final", "csv", {**cfg, "COTIZACION_IMAGEN_PUBLICA": False})))
+    assert claves[0][0] == claves[1][0]
+    assert claves[0][1] != claves[1][1]
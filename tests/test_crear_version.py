@@ -0,0 +1,58 @@
+import sqlalchemy as sa
+
+from app.models import db, Catalogo
+
+
+def _sesion(client, auth_headers, seed):
+    cat = client.post("/api/catalogos", headers=auth_headers, json=seed).get_json()
+    return cat, client.get(f"/api/catalogos/{cat['id']}/sesiones", headers=auth_headers).get_json()["data"][0]["id"]
+
+
+def test_numeracion_secuencial(client, auth_headers, seed_cliente_producto):
+    cat, sesion_id = _sesion(client, auth_headers, seed_cliente_producto)
+    otra = client.post(f"/api/catalogos/{cat['id']}/sesiones", headers=auth_headers,
+                       json={"etiqueta": "alternativa"}).get_json()["id"]
+
+    nums = []
+    for _ in range(3):
+        r = client.post(f"/api/sesiones/{sesion_id}/versiones", headers=auth_headers, json={"cant_bultos": 1})
+        assert r.status_code == 201
+        nums.append(r.get_json()["version_num"])
+    assert nums == [1, 2, 3]
+    # cada sesión numera por su cuenta; los defaults salen del producto
+    v = client.post(f"/api/sesiones/{otra}/versiones", headers=auth_headers, json={}).get_json()
+    assert v["version_num"] == 1 and v["um"] == "DOC" and v["familia"] == "Limpieza"
+
+
+def test_sesion_inexistente_y_catalogo_cerrado(app, client, auth_headers, seed_cliente_producto):
+    assert client.post("/api/sesiones/999/versiones", headers=auth_headers, json={}).status_code == 404
+
+    cat, sesion_id = _sesion(client, auth_headers, seed_cliente_producto)
+    with app.app_context():
+        db.session.execute(sa.update(Catalogo).where(Catalogo.id == cat["id"]).values(estado="CANCELADA"))
+        db.session.commit()
+    r = client.post(f"/api/sesiones/{sesion_id}/versiones", headers=auth_headers, json={})
+    assert r.status_code == 409
+    # no consumió número
+    with app.app_context():
+        db.session.execute(sa.update(Catalogo).where(Catalogo.id == cat["id"]).values(estado="EN_PROCESO"))
+        db.session.commit()
+    r = client.post(f"/api/sesiones/{sesion_id}/versiones", headers=auth_headers, json={})
+    assert r.status_code == 201 and r.get_json()["version_num"] == 1
+
+
+def test_espera_a_la_aprobacion_que_cierra(app, client, auth_headers, seed_cliente_producto, solo_pg, monkeypatch):
+    # Con el catálogo tomado FOR UPDATE (lo que hace aprobar) la reserva no
+    # pasa de largo: espera el lock (y acá vence lock_timeout -> 503)
+    monkeypatch.setitem(app.config, "DB_LOCK_TIMEOUT_MS", 100)
+    monkeypatch.setitem(app.config, "DB_RETRY_MAX", 0)
+    cat, sesion_id = _sesion(client, auth_headers, seed_cliente_producto)
+    with app.app_context():
+        with db.engine.connect() as otra:
+            otra.execute(sa.select(Catalogo.id).where(Catalogo.id == cat["id"]).with_for_update())
+            r = client.post(f"/api/sesiones/{sesion_id}/versiones", headers=auth_headers, json={})
+            assert r.status_code == 503
+            otra.execute(sa.update(Catalogo).where(Catalogo.id == cat["id"]).values(estado="CANCELADA"))
+            otra.commit()
+    r = client.post(f"/api/sesiones/{sesion_id}/versiones", headers=auth_headers, json={})
+    assert r.status_code == 409
@@ -0,0 +1,104 @@
+def _sesion(client, headers, seed):
+    r = client.post("/api/catalogos", headers=headers, json=seed)
+    assert r.status_code == 201, r.text
+    catalogo_id = r.get_json()["id"]
+    r = client.get(f"/api/catalogos/{catalogo_id}/sesiones", headers=headers)
+    return catalogo_id, r.get_json()["data"][0]["id"]
+
+def test_puntero_current(client, auth_headers, seed_cliente_producto):
+    catalogo_id, sesion_id = _sesion(client, auth_headers, seed_cliente_producto)
+    url = f"/api/sesiones/{sesion_id}/versiones"
+    v1 = client.post(url, headers=auth_headers, json={"cant_bultos": 1}).get_json()["id"]
+    v2 = client.post(url, headers=auth_headers, json={"cant_bultos": 2}).get_json()["id"]
+
+    r = client.post(f"/api/versiones/{v1}/current", headers=auth_headers)
+    assert r.status_code == 200, r.text
+    assert r.get_json()["is_current"] is True
+
+    r = client.post(f"/api/versiones/{v2}/current", headers=auth_headers)
+    assert r.get_json()["is_current"] is True
+    assert client.get(f"/api/versiones/{v1}", headers=auth_headers).get_json()["is_current"] is False
+
+    r = client.get(f"{url}?is_current=true", headers=auth_headers)
+    assert [v["id"] for v in r.get_json()["data"]] == [v2]
+    r = client.get(f"{url}?is_current=false", headers=auth_headers)
+    assert [v["id"] for v in r.get_json()["data"]] == [v1]
+
+    r = client.get(f"/api/catalogos/{catalogo_id}/sesiones?with_current=true", headers=auth_headers)
+    s = r.get_json()["data"][0]
+    assert s["current_version_id"] == v2 and s["current_version"]["id"] == v2
+
+def test_transiciones(client, auth_headers, seed_cliente_producto):
+    _, sesion_id = _sesion(client, auth_headers, seed_cliente_producto)
+    v = client.post(f"/api/sesiones/{sesion_id}/versiones", headers=auth_headers,
+                    json={"cant_bultos": 3}).get_json()["id"]
+
+    r = client.post(f"/api/versiones/{v}/rechazar", headers=auth_headers)
+    assert r.status_code == 409
+    assert r.get_json()["error"] == "solo ENVIADA/CONTRAOFERTA puede RECHAZARSE"
+
+    r = client.post(f"/api/versiones/{v}/enviar", headers=auth_headers)
+    assert r.status_code == 200, r.text
+    assert r.get_json()["estado"] == "ENVIADA" and r.get_json()["subtotal_exw"] is not None
+
+    r = client.post(f"/api/versiones/{v}/contraoferta", headers=auth_headers)
+    assert r.get_json()["estado"] == "CONTRAOFERTA"
+
+    assert client.post("/api/versiones/999999/enviar", headers=auth_headers).status_code == 404
+
+def test_estado_en_lote(client, auth_headers, seed_cliente_producto):
+    _, sesion_id = _sesion(client, auth_headers, seed_cliente_producto)
+    url = f"/api/sesiones/{sesion_id}/versiones"
+    v1, v2, v3 = (client.post(url, headers=auth_headers, json={"cant_bultos": n}).get_json()["id"]
+                  for n in (1, 2, 3))
+    client.post(f"/api/versiones/{v3}/enviar", headers=auth_headers)
+
+    r = client.post("/api/versiones/estado", headers=auth_headers,
+                    json={"ids": [v1, v3, 999999, v2], "estado": "ENVIADA"})
+    assert r.status_code == 200, r.text
+    body = r.get_json()
+    assert [x["id"] for x in body["resultados"]] == [v1, v3, 999999, v2]
+    assert body["rechazados"] == [v3, 999999]
+    assert body["resultados"][0] == {"id": v1, "ok": True, "desde": "BORRADOR"}
+    assert body["resultados"][1]["estado"] == "ENVIADA"
+
+    r = client.post("/api/versiones/estado", headers=auth_headers,
+                    json={"ids": [v1, v2, v3], "estado": "RECHAZADA"})
+    assert r.get_json()["rechazados"] == []
+
+    r = client.post("/api/versiones/estado", headers=auth_headers, json={"ids": [v1], "estado": "APROBADA"})
+    assert r.status_code == 400
+
+def test_is_current_con_join_a_sesion(app, client, auth_headers, seed_cliente_producto):
+    import sqlalchemy as sa
+    from app.models import db, CatalogoSesion, CatalogoSesionVersion as V
+
+    _, sesion_id = _sesion(client, auth_headers, seed_cliente_producto)
+    url = f"/api/sesiones/{sesion_id}/versiones"
+    v1 = client.post(url, headers=auth_headers, json={"cant_bultos": 1}).get_json()["id"]
+    client.post(url, headers=auth_headers, json={"cant_bultos": 2})
+    client.post(f"/api/versiones/{v1}/current", headers=auth_headers)
+    # la subconsulta de is_current no se correlaciona con el JOIN
+    with app.app_context():
+        filas = db.session.scalars(
+            sa.select(V).join(CatalogoSesion, CatalogoSesion.id == V.sesion_id).order_by(V.id)
+        ).all()
+        assert [v.is_current for v in filas] == [True, False]
+    r = client.post(f"/api/versiones/{v1 + 1}/enviar", headers=auth_headers)
+    assert r.get_json()["estado"] == "ENVIADA" and r.get_json()["is_current"] is False
+
+def test_current_de_version_borrada_en_medio(client, auth_headers, seed_cliente_producto, solo_pg, monkeypatch):
+    import sqlalchemy as sa
+    from app.api import versiones
+    from app.models import db, CatalogoSesionVersion as V
+
+    _, sesion_id = _sesion(client, auth_headers, seed_cliente_producto)
+    vid = client.post(f"/api/sesiones/{sesion_id}/versiones", headers=auth_headers, json={}).get_json()["id"]
+
+    # otra transacción la borra entre la lectura y el UPDATE del puntero: la FK
+    # (diferida) falla al commit. SQLite de tests no aplica FKs.
+    def borrar(_catalogo_id=None):
+        db.session.execute(sa.delete(V).where(V.id == vid))
+    monkeypatch.setattr(versiones, "preparar_tx", borrar)
+    r = client.post(f"/api/versiones/{vid}/current", headers=auth_headers)
+    assert r.status_code == 409
@@ -0,0 +1,32 @@
+def _sesion(client, headers, seed):
+    r = client.post("/api/catalogos", headers=headers, json=seed)
+    assert r.status_code == 201, r.text
+    r = client.get(f"/api/catalogos/{r.get_json()['id']}/sesiones", headers=headers)
+    return r.get_json()["data"][0]["id"]
+
+def test_diff_y_timeline(client, auth_headers, seed_cliente_producto):
+    sesion_id = _sesion(client, auth_headers, seed_cliente_producto)
+
+    r = client.post(f"/api/sesiones/{sesion_id}/versiones", headers=auth_headers,
+                    json={"cant_bultos": 10, "porc_desc": 0.05, "observaciones": "oferta"})
+    v1 = r.get_json()["id"]
+    r = client.post(f"/api/sesiones/{sesion_id}/versiones", headers=auth_headers,
+                    json={"cant_bultos": 10, "porc_desc": 0.10, "observaciones": "oferta"})
+    v2 = r.get_json()["id"]
+
+    r = client.get(f"/api/versiones/{v1}/diff/{v2}", headers=auth_headers)
+    assert r.status_code == 200, r.text
+    cambios = r.get_json()["cambios"]
+    assert "porc_desc" in cambios and "subtotal_exw" in cambios
+    assert "observaciones" not in cambios and "cant_bultos" not in cambios
+    assert round(cambios["porc_desc"]["delta"], 4) == 0.05
+    assert cambios["subtotal_exw"]["delta"] < 0
+
+    r = client.get(f"/api/sesiones/{sesion_id}/versiones/timeline", headers=auth_headers)
+    assert r.status_code == 200, r.text
+    body = r.get_json()
+    assert body["base"]["id"] == v1
+    assert [p["hasta_id"] for p in body["pasos"]] == [v2]
+
+    r = client.get(f"/api/versiones/{v1}/diff/999999", headers=auth_headers)
+    assert r.status_code == 404
@@ -0,0 +1,102 @@
+import json
+
+import sqlalchemy as sa
+
+from app.eventos import hub
+from app.models import db, CANAL_EVENTOS, CatalogoSesion
+
+
+def test_sse_por_catalogo(app, client, auth_headers, seed_cliente_producto, monkeypatch):
+    monkeypatch.setitem(app.config, "SSE_LATIDO_S", 0.05)
+    monkeypatch.setitem(app.config, "SSE_MAX_S", 5)
+    cat = client.post("/api/catalogos", headers=auth_headers, json=seed_cliente_producto).get_json()
+    token = auth_headers["Authorization"].split()[1]
+
+    r = client.get(f"/api/eventos/catalogos/{cat['id']}?access_token={token}", buffered=False)
+    assert r.status_code == 200 and r.mimetype == "text/event-stream"
+    partes = iter(r.response)
+    assert next(partes) == b"retry: 3000\n\n"
+
+    hub.despachar({"tipo": "version_creada", "catalogo_id": cat["id"], "cliente_id": cat["cliente_id"]})
+    hub.despachar({"tipo": "version_creada", "catalogo_id": cat["id"] + 1, "cliente_id": 999})
+    assert next(partes).startswith(b"event: version_creada\ndata: {")
+    assert next(partes) == b": ping\n\n"  # el del otro catálogo no llega
+    r.close()
+    assert hub.suscriptores() == 0
+
+    assert client.get(f"/api/eventos/catalogos/{cat['id']}").status_code == 401
+    assert client.get(f"/api/eventos/clientes/999?access_token={token}").status_code == 404
+
+
+def test_sse_503_en_worker_de_hilos(app, client, auth_headers, monkeypatch):
+    monkeypatch.setitem(app.config, "SSE_SOLO_ASYNC", True)
+    token = auth_headers["Authorization"].split()[1]
+    r = client.get(f"/api/eventos/clientes/1?access_token={token}")
+    assert r.status_code == 503 and r.headers["Retry-After"] == "30"
+    assert hub.suscriptores() == 0
+
+
+def _escuchar():
+    import psycopg
+    from app.eventos import dsn_de
+
+    conn = psycopg.connect(dsn_de(db.engine), autocommit=True)
+    conn.execute(f"LISTEN {CANAL_EVENTOS}")
+    return conn
+
+
+def _avisos(conn) -> list[dict]:
+    return [json.loads(n.payload) for n in conn.notifies(timeout=1)]
+
+
+def test_triggers_notify(app, client, auth_headers, seed_cliente_producto, solo_pg):
+    cat = client.post("/api/catalogos", headers=auth_headers, json=seed_cliente_producto).get_json()
+    sesion_id = client.get(f"/api/catalogos/{cat['id']}/sesiones", headers=auth_headers).get_json()["data"][0]["id"]
+    with app.app_context():
+        conn = _escuchar()
+    try:
+        vid = client.post(f"/api/sesiones/{sesion_id}/versiones", headers=auth_headers,
+                          json={"cant_bultos": 1}).get_json()["id"]
+        creada = [a for a in _avisos(conn) if a["tipo"] == "version_creada"]
+        assert creada[0]["catalogo_id"] == cat["id"] and creada[0]["versiones"][0]["id"] == vid
+
+        client.post(f"/api/versiones/{vid}/current", headers=auth_headers)
+        current = [a for a in _avisos(conn) if a["tipo"] == "current"]
+        assert current[0]["sesiones"] == [{"id": sesion_id, "current_version_id": vid}]
+
+        client.post(f"/api/versiones/{vid}/enviar", headers=auth_headers)
+        client.post(f"/api/versiones/{vid}/aprobar", headers=auth_headers)
+        estado = [a for a in _avisos(conn) if a["tipo"] == "catalogo"]
+        assert estado[-1]["estado"] == "CERRADA" and estado[-1]["final_version_id"] == vid
+
+        # carga masiva con app.sin_cambios: ni un aviso
+        with app.app_context():
+            db.session.execute(sa.text("SET LOCAL app.sin_cambios = 'on'"))
+            db.session.execute(sa.update(CatalogoSesion).where(CatalogoSesion.id == sesion_id)
+                               .values(current_version_id=None))
+            db.session.commit()
+        assert _avisos(conn) == []
+    finally:
+        conn.close()
+
+
+def test_sse_desde_listen(app, client, auth_headers, seed_cliente_producto, solo_pg, monkeypatch):
+    # de punta a punta: commit -> trigger -> hilo LISTEN -> hub -> stream
+    monkeypatch.setitem(app.config, "SSE_LATIDO_S", 0.2)
+    cat = client.post("/api/catalogos", headers=auth_headers, json=seed_cliente_producto).get_json()
+    sesion_id = client.get(f"/api/catalogos/{cat['id']}/sesiones", headers=auth_headers).get_json()["data"][0]["id"]
+    token = auth_headers["Authorization"].split()[1]
+
+    r = client.get(f"/api/eventos/catalogos/{cat['id']}?access_token={token}", buffered=False)
+    partes = iter(r.response)
+    next(partes)
+    try:
+        # el hilo LISTEN arranca con el primer suscriptor: reintentar hasta que escuche
+        for _ in range(25):
+            client.post(f"/api/sesiones/{sesion_id}/versiones", headers=auth_headers, json={})
+            parte = next(partes)
+            if parte != b": ping\n\n":
+                break
+        assert parte.startswith(b"event: version_creada\n") and str(cat["id"]).encode() in parte
+    finally:
+        r.close()
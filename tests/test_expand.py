@@ -0,0 +1,27 @@
+def test_expand_negociacion(app, client, auth_headers, seed_cliente_producto, max_queries, monkeypatch):
+    monkeypatch.setitem(app.config, "EXPAND_VERSIONES_MAX", 2)
+    cat = client.post("/api/catalogos", headers=auth_headers, json=seed_cliente_producto).get_json()
+    sesion_id = client.get(f"/api/catalogos/{cat['id']}/sesiones", headers=auth_headers).get_json()["data"][0]["id"]
+    ids = [
+        client.post(f"/api/sesiones/{sesion_id}/versiones", headers=auth_headers, json={"cant_bultos": n}).get_json()["id"]
+        for n in (1, 2, 3)
+    ]
+    client.post(f"/api/versiones/{ids[1]}/current", headers=auth_headers)
+    client.post(f"/api/catalogos/{cat['id']}/sesiones", headers=auth_headers, json={"etiqueta": "b"})
+
+    url = f"/api/catalogos/{cat['id']}?expand=cliente,producto,sesiones.current,sesiones.versiones"
+    with max_queries(6):
+        r = client.get(url, headers=auth_headers)
+    body = r.get_json()
+    assert body["cliente"]["nombre"] == "Cliente S.A."
+    assert body["producto"]["familia"] == "Limpieza"
+    assert body["sesiones_total"] == 2
+
+    s = next(x for x in body["sesiones"] if x["id"] == sesion_id)
+    assert [v["version_num"] for v in s["versiones"]] == [3, 2]
+    assert s["versiones_total"] == 3
+    assert s["current_version"]["version_num"] == 2
+    otra = next(x for x in body["sesiones"] if x["id"] != sesion_id)
+    assert otra["versiones"] == [] and otra["current_version"] is None
+
+    assert client.get(f"/api/catalogos/{cat['id']}?expand=todo", headers=auth_headers).status_code == 400
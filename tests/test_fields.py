@@ -0,0 +1,22 @@
+def test_fields_recorta_respuesta(client, auth_headers, seed_cliente_producto):
+    pid = seed_cliente_producto["producto_id"]
+
+    r = client.get("/api/productos?fields=id,nombre,precio_exw", headers=auth_headers)
+    assert r.status_code == 200, r.text
+    item = r.get_json()["data"][0]
+    assert set(item) == {"id", "nombre", "precio_exw"}
+
+    r = client.get(f"/api/productos/{pid}?fields=familia", headers=auth_headers)
+    assert r.status_code == 200, r.text
+    assert r.get_json() == {"familia": "Limpieza"}
+
+def test_fields_desconocido_400(client, auth_headers, seed_cliente_producto):
+    r = client.get("/api/clientes?fields=id,no_existe", headers=auth_headers)
+    assert r.status_code == 400
+
+    r = client.post("/api/catalogos", headers=auth_headers, json=seed_cliente_producto)
+    catalogo_id = r.get_json()["id"]
+    r = client.get(f"/api/catalogos/{catalogo_id}/sesiones?fields=id,current_version&with_current=true",
+                   headers=auth_headers)
+    assert r.status_code == 200, r.text
+    assert set(r.get_json()["data"][0]) == {"id", "current_version"}
@@ -0,0 +1,83 @@
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+
+import sqlalchemy as sa
+
+from app.idempotencia import purgar
+from app.models import db, Catalogo, Idempotencia, CatalogoSesionVersion
+
+
+def _hace(**kw):
+    return datetime.now(timezone.utc) - timedelta(**kw)
+
+
+def _sesion(client, auth_headers, seed):
+    cat = client.post("/api/catalogos", headers=auth_headers, json=seed).get_json()
+    return cat, client.get(f"/api/catalogos/{cat['id']}/sesiones", headers=auth_headers).get_json()["data"][0]["id"]
+
+
+def test_reintento_devuelve_la_respuesta_original(app, client, auth_headers, seed_cliente_producto, max_queries):
+    _, sesion_id = _sesion(client, auth_headers, seed_cliente_producto)
+    h = {**auth_headers, "Idempotency-Key": "movil-1"}
+    r1 = client.post(f"/api/sesiones/{sesion_id}/versiones", headers=h, json={"cant_bultos": 3})
+    assert r1.status_code == 201
+
+    with max_queries(2):  # insert de la clave (falla) + lectura por PK
+        r2 = client.post(f"/api/sesiones/{sesion_id}/versiones", headers=h, json={"cant_bultos": 3})
+    assert r2.status_code == 201 and r2.headers["Idempotent-Replayed"] == "true"
+    assert r2.get_json() == r1.get_json()
+    with app.app_context():
+        assert db.session.scalar(sa.select(sa.func.count()).select_from(CatalogoSesionVersion)) == 1
+
+    # misma clave con otro cuerpo
+    r = client.post(f"/api/sesiones/{sesion_id}/versiones", headers=h, json={"cant_bultos": 4})
+    assert r.status_code == 422
+
+    # aprobar reintentado: el 200 original, no "ya tiene versión final"
+    vid = r1.get_json()["id"]
+    client.post(f"/api/versiones/{vid}/enviar", headers=auth_headers)
+    ha = {**auth_headers, "Idempotency-Key": "aprobar-1"}
+    assert client.post(f"/api/versiones/{vid}/aprobar", headers=ha).status_code == 200
+    r = client.post(f"/api/versiones/{vid}/aprobar", headers=ha)
+    assert r.status_code == 200 and r.get_json()["is_final"] is True
+
+
+def test_en_curso_y_errores(app, client, auth_headers, seed_cliente_producto):
+    h = {**auth_headers, "Idempotency-Key": "cat-1"}
+    r = client.post("/api/catalogos", headers=h, json={"cliente_id": seed_cliente_producto["cliente_id"]})
+    assert r.status_code == 400
+    # los errores no se guardan: el reintento corregido se ejecuta
+    with app.app_context():
+        assert db.session.get(Idempotencia, (1, "cat-1")) is None
+
+    # otro request con la clave todavía en curso
+    cuerpo = json.dumps(seed_cliente_producto).encode()
+    with app.app_context():
+        huella = hashlib.sha256(b"POST /api/catalogos\0" + cuerpo).digest()
+        db.session.add(Idempotencia(usuario_id=1, clave="cat-2", huella=huella))
+        db.session.commit()
+    r = client.post("/api/catalogos", headers={**auth_headers, "Idempotency-Key": "cat-2"}, data=cuerpo)
+    assert r.status_code == 409 and r.headers["Retry-After"] == "1"
+
+    # aunque el worker haya muerto: la vista pudo haber commiteado, no se re-ejecuta
+    with app.app_context():
+        db.session.execute(sa.update(Idempotencia).values(created_at=_hace(hours=2)))
+        db.session.commit()
+    r = client.post("/api/catalogos", headers={**auth_headers, "Idempotency-Key": "cat-2"}, data=cuerpo)
+    assert r.status_code == 409
+    with app.app_context():
+        assert db.session.scalar(sa.select(sa.func.count()).select_from(Catalogo)) == 0
+
+    # vencida: cuenta como clave nueva
+    with app.app_context():
+        db.session.execute(sa.update(Idempotencia).values(created_at=_hace(hours=25)))
+        db.session.commit()
+    r = client.post("/api/catalogos", headers={**auth_headers, "Idempotency-Key": "cat-2"}, data=cuerpo)
+    assert r.status_code == 201
+
+    with app.app_context():
+        assert purgar(24) == 0
+        db.session.execute(sa.update(Idempotencia).values(created_at=_hace(days=2)))
+        db.session.commit()
+        assert purgar(24) == 1
@@ -0,0 +1,46 @@
+from app.models import db, Producto
+
+
+def test_listar_catalogos_sin_n_mas_1(app, client, auth_headers, seed_cliente_producto, max_queries):
+    with app.app_context():
+        productos = [
+            Producto(nombre=f"Prod {i}", um="DOC", doc_x_bulto_caja=5, doc_x_paq=10,
+                     precio_exw=1, familia="Limpieza")
+            for i in range(6)
+        ]
+        db.session.add_all(productos)
+        db.session.commit()
+        ids = [p.id for p in productos]
+    for pid in ids:
+        r = client.post("/api/catalogos", headers=auth_headers,
+                        json={"cliente_id": seed_cliente_producto["cliente_id"], "producto_id": pid})
+        assert r.status_code == 201, r.text
+
+    with max_queries(2):
+        r = client.get("/api/catalogos", headers=auth_headers)
+    assert r.status_code == 200
+    assert len(r.get_json()["data"]) == 6
+    assert all(c["cliente_nombre"] == "Cliente S.A." for c in r.get_json()["data"])
+    assert r.headers["Server-Timing"].startswith("db;dur=")
+
+    with max_queries(1):
+        r = client.get(f"/api/catalogos/{r.get_json()['data'][0]['id']}", headers=auth_headers)
+    assert r.get_json()["producto_nombre"].startswith("Prod")
+
+
+def test_consulta_fallida_no_deja_inicio_colgado(app):
+    import pytest
+    import sqlalchemy as sa
+    from sqlalchemy.exc import DBAPIError
+    from app.instrumentacion import contar_consultas
+
+    with app.app_context(), db.engine.connect() as conn:
+        with contar_consultas() as stats:
+            for _ in range(3):
+                with pytest.raises(DBAPIError):
+                    conn.execute(sa.text("SELECT * FROM tabla_que_no_existe"))
+                conn.rollback()
+            conn.execute(sa.text("SELECT 1"))
+        assert not conn.info.get("_t_consulta")
+        assert stats.n == 1
+        assert stats.sentencias["SELECT 1"] == 1
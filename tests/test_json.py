@@ -0,0 +1,109 @@
+import json
+from decimal import Decimal
+
+import pytest
+from flask import jsonify
+
+from app import json_provider
+from app.json_provider import dumps_bytes
+from app.models import db, Producto, Cliente, CatalogoSesionVersion
+from app.serializers import PRODUCTO, CLIENTE, VERSION
+
+
+def test_decimal_exacto(app):
+    if json_provider._Fragment is None:
+        pytest.skip("requiere orjson.Fragment (orjson >= 3.9)")
+    valores = {
+        "precio": Decimal("12.3400"),          # NUMERIC(12,4) tal cual sale de la BD
+        "cero": Decimal("0.0000"),
+        "negativo": Decimal("-0.0500"),
+        "grande": Decimal("123456789012345678901234.5678"),  # no cabe en un double
+        "chico": Decimal("0.00000001"),
+        "exp": Decimal("1E-12"),
+        "nan": Decimal("NaN"),
+    }
+    with app.test_request_context():
+        body = jsonify(valores).get_data(as_text=True)
+
+    assert '"precio":12.3400' in body
+    assert '"cero":0.0000' in body
+    assert '"negativo":-0.0500' in body
+    assert '"grande":123456789012345678901234.5678' in body
+    assert '"chico":1E-8' in body
+    assert '"exp":1E-12' in body
+    assert '"nan":null' in body
+    # sigue siendo JSON válido y sin pérdida si se lee como Decimal
+    leido = json.loads(body, parse_float=Decimal)
+    assert leido["grande"] == valores["grande"]
+    assert leido["chico"] == valores["chico"]
+
+
+# Serializadores previos al Esquema (NUMERIC -> float), como referencia
+def _num(x):
+    return float(x) if x is not None else None
+
+
+def _dt(x):
+    return x.isoformat() if x else None
+
+
+def legacy_producto(p):
+    return {
+        "id": p.id, "nombre": p.nombre, "um": p.um,
+        "doc_x_bulto_caja": _num(p.doc_x_bulto_caja), "doc_x_paq": _num(p.doc_x_paq),
+        "precio_exw": _num(p.precio_exw), "familia": p.familia,
+        "imagen_key": p.imagen_key, "created_at": _dt(p.created_at),
+    }
+
+
+def legacy_cliente(c):
+    return {
+        "id": c.id, "tipo_doc": c.tipo_doc, "num_doc": c.num_doc, "nombre": c.nombre,
+        "descripcion": c.descripcion, "pais": c.pais, "ciudad": c.ciudad, "zona": c.zona,
+        "direccion": c.direccion, "clasificacion_riesgo": c.clasificacion_riesgo,
+        "created_at": _dt(c.created_at),
+    }
+
+
+_NUMERICOS_VERSION = (
+    "doc_x_bulto_caja", "doc_x_paq", "precio_exw", "porc_desc", "cant_bultos", "peso_gr",
+    "largo_cm", "ancho_cm", "alto_cm", "precio_x_docena", "cantidad_por_paquete",
+    "precio_unidad_exw", "volumen_paquete_cbm", "cantidad_unidades", "subtotal_exw",
+    "cbm_total", "peso_neto_kg", "peso_bruto_kg",
+)
+
+
+def legacy_version(v):
+    d = {k: getattr(v, k) for k in (
+        "id", "sesion_id", "catalogo_id", "producto_id", "version_num", "estado",
+        "is_current", "is_final", "um", "familia", "foto_key", "observaciones")}
+    d.update({k: _num(getattr(v, k)) for k in _NUMERICOS_VERSION})
+    d["created_at"] = _dt(v.created_at)
+    return d
+
+
+def _ida_y_vuelta(d):
+    return json.loads(dumps_bytes(d))
+
+
+def test_esquemas_equivalen_a_serializadores_previos(app, client, auth_headers, seed_cliente_producto):
+    cat = client.post("/api/catalogos", headers=auth_headers, json=seed_cliente_producto).get_json()
+    sesion_id = client.get(f"/api/catalogos/{cat['id']}/sesiones", headers=auth_headers).get_json()["data"][0]["id"]
+    r = client.post(f"/api/sesiones/{sesion_id}/versiones", headers=auth_headers,
+                    json={"cant_bultos": 3, "porc_desc": 7.5, "peso_gr": 850,
+                          "largo_cm": 30, "ancho_cm": 20, "alto_cm": 15, "observaciones": "ok"})
+    assert r.status_code == 201, r.text
+    vid = r.get_json()["id"]
+
+    with app.app_context():
+        casos = [
+            (PRODUCTO, legacy_producto, db.session.get(Producto, seed_cliente_producto["producto_id"])),
+            (CLIENTE, legacy_cliente, db.session.get(Cliente, seed_cliente_producto["cliente_id"])),
+            (VERSION, legacy_version, db.session.get(CatalogoSesionVersion, vid)),
+        ]
+        for esquema, legacy, obj in casos:
+            nuevo = _ida_y_vuelta(esquema.dump(obj))
+            previo = _ida_y_vuelta(legacy(obj))
+            # el esquema solo agrega claves (updated_at, ...); las previas no cambian
+            assert set(previo) <= set(nuevo), esquema.nombre
+            assert {k: nuevo[k] for k in previo} == previo, esquema.nombre
@@ -0,0 +1,108 @@
+import time
+
+from app.limites import Memoria, limitador
+from app.security import make_access_token
+
+
+def _limitar(app, monkeypatch, **cuotas):
+    monkeypatch.setitem(app.config, "RATELIMIT_ENABLED", True)
+    monkeypatch.setitem(app.extensions, "limites", Memoria())
+    for k, v in cuotas.items():
+        monkeypatch.setitem(app.config, f"RATELIMIT_{k.upper()}", v)
+
+
+def test_presupuestos_por_usuario(app, client, auth_headers, monkeypatch):
+    _limitar(app, monkeypatch, lectura="3/60", escritura="1/60")
+    for _ in range(3):
+        assert client.get("/api/clientes", headers=auth_headers).status_code == 200
+    r = client.get("/api/clientes", headers=auth_headers)
+    assert r.status_code == 429 and int(r.headers["Retry-After"]) >= 1
+
+    # otro usuario tiene su propio bucket; las escrituras, su propio presupuesto
+    with app.app_context():
+        otro = {"Authorization": f"Bearer {make_access_token(999, 'otro@x', [])}"}
+    assert client.get("/api/clientes", headers=otro).status_code == 200
+    nuevo = {"tipo_doc": "RUC", "num_doc": "20999999999", "nombre": "X", "pais": "PE", "ciudad": "Lima"}
+    assert client.post("/api/clientes", headers=auth_headers, json=nuevo).status_code == 201
+    assert client.post("/api/clientes", headers=auth_headers, json=nuevo).status_code == 429
+
+
+def test_auth_por_ip(app, client, monkeypatch):
+    _limitar(app, monkeypatch, auth="2/60")
+    cred = {"email": "nadie@x", "password": "x"}
+    assert client.post("/api/auth/login", json=cred).status_code == 401
+    assert client.post("/api/auth/login", json=cred).status_code == 401
+    assert client.post("/api/auth/login", json=cred).status_code == 429
+    # otra IP (último salto de X-Forwarded-For, el que agrega el router)
+    r = client.post("/api/auth/login", json=cred, headers={"X-Forwarded-For": "1.2.3.4, 10.0.0.9"})
+    assert r.status_code == 401
+
+
+def test_bucket_recarga():
+    m = Memoria()
+    assert m.tomar("k", 1, 100) == 0
+    assert m.tomar("k", 1, 100) > 0
+    time.sleep(0.02)
+    assert m.tomar("k", 1, 100) == 0
+
+
+def test_admision(app, client, auth_headers, monkeypatch):
+    monkeypatch.setitem(app.config, "ADMISION_MAX_EN_CURSO", 1)
+    monkeypatch.setattr(limitador, "_en_curso", 1)  # otro request ocupa el cupo
+    r = client.get("/api/clientes", headers=auth_headers)
+    assert r.status_code == 503 and r.headers["Retry-After"] == "2"
+    monkeypatch.setattr(limitador, "_en_curso", 0)
+    assert client.get("/api/clientes", headers=auth_headers).status_code == 200
+    assert limitador.en_curso == 0
+
+    # llegó hace 30 s: ya no vale la pena atenderlo
+    viejo = {**auth_headers, "X-Request-Start": str(int(time.time() * 1000) - 30_000)}
+    assert client.get("/api/clientes", headers=viejo).status_code == 503
+
+
+class _RedisFalso:
+    """Lo justo de redis-py: from_url + register_script."""
+
+    class RedisError(Exception):
+        pass
+
+    def __init__(self):
+        self.llamadas = []
+        self.caido = False
+        self.Redis = self
+
+    def from_url(self, url, **kw):
+        return self
+
+    def register_script(self, lua):
+        assert "HMGET" in lua
+
+        def script(keys, args):
+            self.llamadas.append(keys[0])
+            if self.caido:
+                raise self.RedisError("connection refused")
+            return b"0.25"
+        return script
+
+
+def test_redis_y_respaldo(app, monkeypatch):
+    from app import limites
+
+    falso = _RedisFalso()
+    monkeypatch.setattr(limites, "redis_lib", falso)
+    b = limites.crear_backend({"RATELIMIT_REDIS_URL": "redis://x"})
+    assert isinstance(b, limites.Redis)
+    assert b.tomar("lectura:u:1", 5, 1) == 0.25 and falso.llamadas == ["rl:lectura:u:1"]
+
+    # Redis cae: responde el bucket local y no se vuelve a intentar por 30 s
+    falso.caido = True
+    assert b.tomar("lectura:u:1", 1, 1) == 0
+    assert b.tomar("lectura:u:1", 1, 1) > 0
+    assert len(falso.llamadas) == 2
+    monkeypatch.setattr(b, "_caido_hasta", 0.0)
+    falso.caido = False
+    assert b.tomar("lectura:u:1", 1, 1) == 0.25
+
+    # sin la librería: límite por proceso
+    monkeypatch.setattr(limites, "redis_lib", None)
+    assert isinstance(limites.crear_backend({"RATELIMIT_REDIS_URL": "redis://x"}), limites.Memoria)
@@ -0,0 +1,28 @@
+import pytest
+
+pytest.importorskip("prometheus_client")
+
+
+def test_metrics_expone_latencia_por_endpoint(client, auth_headers):
+    client.get("/api/productos", headers=auth_headers)
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    texto = r.get_data(as_text=True)
+    assert 'http_request_duration_seconds_count{blueprint="api.productos"' in texto
+    assert "argon2_duration_seconds" in texto
+    assert "db_pool_checkout_wait_seconds" in texto
+
+
+def test_metrics_token(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, "METRICS_TOKEN", "s3creto")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer otro"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer s3creto"}).status_code == 200
+
+
+def test_metrics_sin_token_en_produccion_404(app, client, monkeypatch):
+    from app.config import ProdConfig
+    assert ProdConfig.METRICS_REQUIERE_TOKEN
+    monkeypatch.setitem(app.config, "METRICS_TOKEN", "")
+    monkeypatch.setitem(app.config, "METRICS_REQUIERE_TOKEN", True)
+    assert client.get("/metrics").status_code == 404
@@ -0,0 +1,23 @@
+def test_multi_get_en_orden(client, auth_headers, seed_cliente_producto, max_queries):
+    cat = client.post("/api/catalogos", headers=auth_headers, json=seed_cliente_producto).get_json()
+    pid = seed_cliente_producto["producto_id"]
+
+    with max_queries(2):
+        r = client.get(f"/api/productos?ids=999,{pid},999", headers=auth_headers)
+    body = r.get_json()
+    assert body["data"][0] is None and body["data"][1]["id"] == pid and len(body["data"]) == 2
+    assert body["no_encontrados"] == [999]
+
+    r = client.get(f"/api/catalogos?ids={cat['id']}&fields=id,producto_nombre", headers=auth_headers)
+    assert r.get_json()["data"] == [{"id": cat["id"], "producto_nombre": "Detergente Pro X"}]
+
+    sesion_id = client.get(f"/api/catalogos/{cat['id']}/sesiones", headers=auth_headers).get_json()["data"][0]["id"]
+    v1 = client.post(f"/api/sesiones/{sesion_id}/versiones", headers=auth_headers, json={"cant_bultos": 1}).get_json()["id"]
+    v2 = client.post(f"/api/sesiones/{sesion_id}/versiones", headers=auth_headers, json={"cant_bultos": 2}).get_json()["id"]
+    r = client.get(f"/api/versiones?ids={v2},{v1}&fields=id,version_num", headers=auth_headers)
+    assert r.get_json()["data"] == [{"id": v2, "version_num": 2}, {"id": v1, "version_num": 1}]
+
+    assert client.get("/api/versiones", headers=auth_headers).status_code == 400
+    assert client.get("/api/clientes?ids=1,x", headers=auth_headers).status_code == 400
+    ids = ",".join(str(i) for i in range(1, 202))
+    assert client.get(f"/api/clientes?ids={ids}", headers=auth_headers).status_code == 400
@@ -0,0 +1,35 @@
+from app.models import db, Catalogo
+
+
+def test_repreciar_versiones_abiertas(app, client, auth_headers, seed_cliente_producto):
+    pid = seed_cliente_producto["producto_id"]
+    cat = client.post("/api/catalogos", headers=auth_headers, json=seed_cliente_producto).get_json()
+    sesion_id = client.get(f"/api/catalogos/{cat['id']}/sesiones", headers=auth_headers).get_json()["data"][0]["id"]
+    url = f"/api/sesiones/{sesion_id}/versiones"
+    borrador = client.post(url, headers=auth_headers, json={"cant_bultos": 1}).get_json()["id"]
+    enviada = client.post(url, headers=auth_headers, json={"cant_bultos": 2}).get_json()["id"]
+    client.post(f"/api/versiones/{enviada}/enviar", headers=auth_headers)
+
+    r = client.patch(f"/api/productos/{pid}?repreciar=true", headers=auth_headers, json={"precio_exw": 15})
+    assert r.get_json()["repreciado"] == {"actualizadas": 1, "lotes": 1}
+
+    def precio(vid):
+        return float(client.get(f"/api/versiones/{vid}", headers=auth_headers).get_json()["precio_exw"])
+    assert precio(borrador) == 15 and precio(enviada) == 12.34
+
+    # idempotente; con estados explícitos alcanza a la ENVIADA
+    r = client.post(f"/api/productos/{pid}/repreciar", headers=auth_headers, json={"estados": ["BORRADOR"]})
+    assert r.get_json()["actualizadas"] == 0
+    r = client.post(f"/api/productos/{pid}/repreciar", headers=auth_headers, json={"estados": ["ENVIADA"]})
+    assert r.get_json()["actualizadas"] == 1 and precio(enviada) == 15
+
+    # catálogos cerrados no se tocan
+    with app.app_context():
+        db.session.get(Catalogo, cat["id"]).estado = "CANCELADA"
+        db.session.commit()
+    client.patch(f"/api/productos/{pid}", headers=auth_headers, json={"precio_exw": 20})
+    r = client.post(f"/api/productos/{pid}/repreciar", headers=auth_headers)
+    assert r.get_json()["actualizadas"] == 0
+
+    r = client.post(f"/api/productos/{pid}/repreciar", headers=auth_headers, json={"estados": ["APROBADA"]})
+    assert r.status_code == 400
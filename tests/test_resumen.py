@@ -0,0 +1,74 @@
+import time
+from decimal import Decimal
+
+from app import resumen
+from app.models import db, Producto
+
+
+def _aprobada(app, client, auth_headers, seed):
+    cat = client.post("/api/catalogos", headers=auth_headers, json=seed).get_json()
+    sesion_id = client.get(f"/api/catalogos/{cat['id']}/sesiones", headers=auth_headers).get_json()["data"][0]["id"]
+    v = client.post(f"/api/sesiones/{sesion_id}/versiones", headers=auth_headers,
+                    json={"cant_bultos": 10, "largo_cm": 40, "ancho_cm": 30, "alto_cm": 25}).get_json()
+    client.post(f"/api/versiones/{v['id']}/enviar", headers=auth_headers)
+    assert client.post(f"/api/versiones/{v['id']}/aprobar", headers=auth_headers).status_code == 200
+    # otro catálogo del mismo cliente y familia, en proceso y sin versión
+    with app.app_context():
+        p = Producto(nombre="Lavavajilla", um="DOC", doc_x_bulto_caja=5, doc_x_paq=10,
+                     precio_exw=3, familia="Limpieza")
+        db.session.add(p)
+        db.session.commit()
+        otro = {"cliente_id": seed["cliente_id"], "producto_id": p.id}
+    assert client.post("/api/catalogos", headers=auth_headers, json=otro).status_code == 201
+    return client.get(f"/api/versiones/{v['id']}", headers=auth_headers).get_json()
+
+
+def _fila_esperada(r, v, seed):
+    assert r.status_code == 200, r.text
+    (fila,) = r.get_json()["data"]
+    assert fila["cliente_id"] == seed["cliente_id"] and fila["cliente_nombre"] == "Cliente S.A."
+    assert fila["catalogos"] == 2 and fila["con_version"] == 1
+    assert fila["por_estado"] == {"EN_PROCESO": 1, "CERRADA": 1, "CANCELADA": 0}
+    assert Decimal(str(fila["subtotal_exw"])) == Decimal(str(v["subtotal_exw"]))
+    assert Decimal(str(fila["cbm_total"])) == Decimal(str(v["cbm_total"]))
+
+
+def test_resumen_en_vivo(app, client, auth_headers, seed_cliente_producto):
+    v = _aprobada(app, client, auth_headers, seed_cliente_producto)
+    r = client.get("/api/resumen/catalogos?agrupar=cliente&fresh=true", headers=auth_headers)
+    assert r.get_json()["fuente"] == "vivo"
+    _fila_esperada(r, v, seed_cliente_producto)
+
+    r = client.get("/api/resumen/catalogos?agrupar=cliente&fresh=true&estado=CANCELADA", headers=auth_headers)
+    assert r.get_json()["data"] == []
+    assert client.get("/api/resumen/catalogos?cliente_id=abc", headers=auth_headers).status_code == 400
+    assert client.get("/api/resumen/catalogos?agrupar=pais", headers=auth_headers).status_code == 400
+
+
+def test_resumen_mv(app, client, auth_headers, seed_cliente_producto, solo_pg):
+    v = _aprobada(app, client, auth_headers, seed_cliente_producto)
+    with app.app_context():
+        resumen.refrescar()
+    r = client.get(f"/api/resumen/catalogos?agrupar=cliente&cliente_id={seed_cliente_producto['cliente_id']}",
+                   headers=auth_headers)
+    assert r.get_json()["fuente"] == "mv" and r.get_json()["generado_at"] is not None
+    _fila_esperada(r, v, seed_cliente_producto)
+
+
+def test_refresco_agrupa_rafagas(app, monkeypatch):
+    corridas = []
+    monkeypatch.setattr(resumen, "refrescar", lambda: corridas.append(time.monotonic()))
+    monkeypatch.setitem(app.config, "RESUMEN_REFRESH_ON_APPROVE", True)
+    monkeypatch.setitem(app.config, "RESUMEN_REFRESH_DEBOUNCE_S", 0.05)
+    for _ in range(5):
+        resumen.solicitar_refresco(app)
+    time.sleep(0.3)
+    assert len(corridas) == 1
+    resumen.solicitar_refresco(app)  # pasada la ventana, se agenda otro
+    time.sleep(0.3)
+    assert len(corridas) == 2
+
+    monkeypatch.setitem(app.config, "RESUMEN_REFRESH_ON_APPROVE", False)
+    resumen.solicitar_refresco(app)
+    time.sleep(0.1)
+    assert len(corridas) == 2
@@ -0,0 +1,46 @@
+import pytest
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app import retry
+
+
+class _Orig(Exception):
+    def __init__(self, sqlstate):
+        self.sqlstate = sqlstate
+
+
+def _falla(sqlstate, cls=OperationalError):
+    return cls("UPDATE ...", {}, _Orig(sqlstate))
+
+
+def test_reintenta_transitorios_y_no_los_de_negocio(app, monkeypatch):
+    monkeypatch.setitem(app.config, "DB_RETRY_BASE_S", 0)
+    llamadas = []
+
+    @retry.reintentar("prueba")
+    def vista():
+        llamadas.append(1)
+        if len(llamadas) < 3:
+            raise _falla("40P01")
+        return "ok"
+
+    with app.test_request_context():
+        assert vista() == "ok"
+    assert len(llamadas) == 3
+    assert retry.estadisticas()["prueba"]["reintento:deadlock"] >= 2
+
+    @retry.reintentar("prueba_agotada")
+    def siempre():
+        raise _falla("55P03")
+
+    with app.test_request_context():
+        r = siempre()
+    assert r.status_code == 503 and r.headers["Retry-After"]
+    assert retry.estadisticas()["prueba_agotada"]["agotado"] == 1
+
+    @retry.reintentar("prueba_integridad")
+    def integridad():
+        raise _falla("23505", IntegrityError)
+
+    with app.test_request_context(), pytest.raises(IntegrityError):
+        integridad()
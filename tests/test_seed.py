@@ -0,0 +1,29 @@
+import sqlalchemy as sa
+
+from app import seed
+from app.models import db, Catalogo, CatalogoSesion, CatalogoSesionVersion
+
+
+def test_seed_determinista_y_valido(app):
+    plan = {"semilla": 7, "clientes": 20, "productos": 5,
+            "base": {"cliente": 1, "producto": 1, "catalogo": 1, "sesion": 1, "version": 1}}
+    assert seed._lote_catalogos(plan, 0, 30) == seed._lote_catalogos(plan, 0, 30)
+
+    with app.app_context():
+        conteo = seed.sembrar(clientes=20, productos=5, catalogos=60, semilla=7, lote=25, log=lambda *_: None)
+        assert db.session.scalar(sa.select(sa.func.count()).select_from(Catalogo)) == 60
+        assert db.session.scalar(sa.select(sa.func.count()).select_from(CatalogoSesionVersion)) == conteo["versiones"]
+
+        # cada CERRADA tiene su final y cada sesión apunta a su última versión
+        sin_final = db.session.scalar(
+            sa.select(sa.func.count()).select_from(Catalogo)
+            .where(Catalogo.estado == "CERRADA", Catalogo.final_version_id.is_(None))
+        )
+        assert sin_final == 0
+        V = CatalogoSesionVersion
+        malas = db.session.scalar(
+            sa.select(sa.func.count()).select_from(CatalogoSesion)
+            .join(V, V.id == CatalogoSesion.current_version_id)
+            .where(V.version_num != CatalogoSesion.next_version_num - 1)
+        )
+        assert malas == 0
@@ -0,0 +1,29 @@
+from app.models import db, CatalogoSesionVersion
+
+
+def _sesion(client, headers, seed):
+    r = client.post("/api/catalogos", headers=headers, json=seed)
+    assert r.status_code == 201, r.text
+    r = client.get(f"/api/catalogos/{r.get_json()['id']}/sesiones", headers=headers)
+    return r.get_json()["data"][0]["id"]
+
+def test_versiones_delta_transparentes(app, client, auth_headers, seed_cliente_producto, monkeypatch):
+    monkeypatch.setitem(app.config, "VERSION_DELTA_STORAGE", True)
+    sesion_id = _sesion(client, auth_headers, seed_cliente_producto)
+    url = f"/api/sesiones/{sesion_id}/versiones"
+
+    v1 = client.post(url, headers=auth_headers, json={"cant_bultos": 10, "observaciones": "oferta"}).get_json()["id"]
+    v2 = client.post(url, headers=auth_headers, json={"cant_bultos": 12, "observaciones": "oferta"}).get_json()["id"]
+
+    with app.app_context():
+        fila = db.session.get(CatalogoSesionVersion, v2)
+        assert fila.observaciones is None and fila.delta_base_id == v1
+
+    r = client.get(f"/api/versiones/{v2}", headers=auth_headers)
+    assert r.get_json()["observaciones"] == "oferta"
+
+    # editar la base no cambia lo que heredaba v2
+    r = client.patch(f"/api/versiones/{v1}", headers=auth_headers, json={"observaciones": "nueva"})
+    assert r.status_code == 200, r.text
+    r = client.get(f"/api/versiones/{v2}", headers=auth_headers)
+    assert r.get_json()["observaciones"] == "oferta"